@@ -0,0 +1,137 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def response_body(model: str, text: str = "ok") -> dict:
+    """Build a minimal Responses API response body."""
+    return {
+        "id": "resp_bench",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": "msg_bench",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": 10,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": 2,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": 12,
+        },
+    }
+
+
+class FakeResponsesServer(ThreadingHTTPServer):
+    """
+    In-process stand-in for the OpenAI Responses API.
+
+    Each accepted request waits latency seconds (plus up to jitter more) before answering.
+    At most `limit` requests are accepted per `window` seconds, the others get a 429 with a
+    retry-after-ms header like the real API, and a share `error_rate` of the accepted ones
+    fails with a 500. Use it as a context manager to serve on a free local port. The test
+    suite's fake_openai_server fixtures serve this same class.
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, limit: int = None, window: float = 1.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.limit = limit
+        self.window = window
+        self.error_rate = error_rate
+        self.accepted = 0
+        self.throttled = 0
+        self.failed = 0
+        # Optional callable building the response body of an accepted request, e.g. to answer with function calls
+        self.respond = None
+        self.requests = []
+        self._random = random.Random(seed)
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def admit(self) -> tuple:
+        """Return (status, seconds to wait before answering or retrying) for a new request."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start, self._window_count = now, 0
+            if self.limit is not None and self._window_count >= self.limit:
+                self.throttled += 1
+                return 429, self.window - (now - self._window_start)
+            self._window_count += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if self._random.random() < self.error_rate:
+                self.failed += 1
+                return 500, delay
+            self.accepted += 1
+            return 200, delay
+
+    def counters(self) -> dict:
+        """Return the accepted, throttled and failed request counts."""
+        with self._lock:
+            return {"accepted": self.accepted, "throttled": self.throttled, "failed": self.failed}
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive like the real API, without Nagle delaying the body written after the headers
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.requests.append(request)
+        status, delay = self.server.admit()
+        if status == 429:
+            return self._send(429, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                              {"retry-after-ms": str(int(delay * 1000) + 1)})
+        if delay:
+            time.sleep(delay)
+        if status == 500:
+            return self._send(500, {"error": {"message": "The server had an error", "type": "server_error"}})
+        body = response_body(request.get("model", "gpt-4o"))
+        if self.server.respond is not None:
+            body.update(self.server.respond(request))
+        self._send(200, body)
@@ -0,0 +1,324 @@
+"""
+Offline benchmarks of adoptagentai's own overhead and throughput.
+
+Model calls go to an in-process fake of the Responses API, so results don't depend on
+the network or on a provider. Results are written as JSON; pass a previous run with
+--compare to list the metrics that regressed.
+
+    python -m benchmarks.run --quick --output results.json
+    python -m benchmarks.run --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, "src")
+# Benchmark the checkout, not an installed copy of the package
+sys.path.insert(0, SOURCE)
+
+from benchmarks.fake_openai import FakeResponsesServer  # noqa: E402
+
+SUITES = ("agent", "batch", "memory", "vector", "credentials", "import")
+MODEL = "gpt-4o"
+
+
+def percentiles(samples: list) -> dict:
+    """Summarize timings in seconds: mean, p50, p90, p99 and max."""
+    ordered = sorted(samples)
+
+    def rank(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"mean": statistics.fmean(ordered), "p50": rank(0.5), "p90": rank(0.9), "p99": rank(0.99), "max": ordered[-1], "count": len(ordered)}
+
+
+def timed(function, repeat: int) -> list:
+    """Return the duration of each of repeat calls of function."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Results:
+    """Collects metrics as name -> {value, unit, better} for the JSON output and comparisons."""
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name: str, value: float, unit: str, better: str = "lower", **extra) -> None:
+        self.metrics[name] = dict(extra, value=value, unit=unit, better=better)
+        print(f"{name:<55} {value:>14.6g} {unit}", flush=True)
+
+    def add_latency(self, name: str, samples: list) -> None:
+        summary = percentiles(samples)
+        for key in ("p50", "p90", "p99"):
+            self.add(f"{name}.{key}", summary[key], "s", samples=summary["count"])
+
+
+def _agent(server: FakeResponsesServer, **scheduler_options):
+    """Build an agent whose model calls go to the fake server, with its own scheduler."""
+    from adoptagentai.core.agent import Agent
+    from adoptagentai.core.scheduler import RateLimitScheduler
+
+    prefix = f"{MODEL.upper()}_BENCH"
+    os.environ[f"{prefix}_API_KEY"] = "bench-key"
+    os.environ[f"{prefix}_BASE_URL"] = server.base_url
+    return Agent(name="bench", model_name=MODEL, model_account_name="bench", scheduler=RateLimitScheduler(**scheduler_options))
+
+
+def bench_agent(results: Results, config: dict) -> None:
+    """run_agent latency percentiles, next to raw client calls to isolate the library's overhead."""
+    from adoptagentai.core.clients import get_openai_client, close_clients
+
+    latency = config["latency"]
+    with FakeResponsesServer(latency=latency) as server:
+        agent = _agent(server)
+        client = get_openai_client(agent.model_credentials)
+        for _ in range(config["warmup"]):
+            agent.run_agent("warm up")
+
+        raw = timed(lambda: client.responses.create(model=MODEL, input="Hello", instructions="Be brief."), config["calls"])
+        wrapped = timed(lambda: agent.run_agent("Hello"), config["calls"])
+        results.add_latency("agent.client_call.latency", raw)
+        results.add_latency("agent.run_agent.latency", wrapped)
+        results.add("agent.run_agent.overhead.p50", percentiles(wrapped)["p50"] - percentiles(raw)["p50"], "s")
+    close_clients()
+
+
+def _errors(responses: list) -> int:
+    """Count the prompts of a batch that failed: raised errors and run_agent's error messages."""
+    return sum(1 for response in responses if isinstance(response, (Exception, str)))
+
+
+def bench_batch(results: Results, config: dict) -> None:
+    """Throughput of run_batch and arun_batch, clean and against throttling and server errors."""
+    from adoptagentai.core.clients import close_clients
+
+    prompts = [f"Prompt {index}" for index in range(config["batch_size"])]
+    concurrency = config["concurrency"]
+    scenarios = {
+        "clean": {},
+        "throttled": {"limit": max(1, config["batch_size"] // 4), "window": 0.25},
+        "errors": {"error_rate": 0.05},
+    }
+    for scenario, options in scenarios.items():
+        with FakeResponsesServer(latency=config["latency"], **options) as server:
+            agent = _agent(server, base_delay=0.01, max_delay=1.0)
+            start = time.perf_counter()
+            responses = agent.run_batch(prompts, max_concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            results.add(f"batch.run_batch.{scenario}.throughput", len(prompts) / elapsed, "prompts/s", better="higher",
+                        errors=_errors(responses), server=server.counters())
+
+            start = time.perf_counter()
+            responses = asyncio.run(agent.arun_batch(prompts, max_concurrency=concurrency))
+            elapsed = time.perf_counter() - start
+            results.add(f"batch.arun_batch.{scenario}.throughput", len(prompts) / elapsed, "prompts/s", better="higher",
+                        errors=_errors(responses), server=server.counters())
+        close_clients()
+
+
+def bench_memory(results: Results, config: dict) -> None:
+    """Insert and retrieve costs of the in-memory store and the SQLite backend at several sizes."""
+    from adoptagentai.core.memory import MemoryStore, SQLiteMemoryBackend
+
+    categories = [f"topic-{index}" for index in range(20)]
+    for size in config["memory_sizes"]:
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        rows = [(f"Memory entry {index} about {categories[index % 20]}", categories[index % 20], base + timedelta(seconds=index))
+                for index in range(size)]
+        middle = base + timedelta(seconds=size // 2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            for backend_name in ("memory", "sqlite"):
+                backend = SQLiteMemoryBackend(os.path.join(directory, "memory.db")) if backend_name == "sqlite" else None
+                store = MemoryStore(backend=backend)
+                start = time.perf_counter()
+                for data, category, timestamp in rows:
+                    store.add(data, category, timestamp)
+                if backend is not None:
+                    backend.flush()
+                elapsed = time.perf_counter() - start
+                results.add(f"memory.{backend_name}.{size}.insert_per_entry", elapsed / size, "s")
+
+                queries = {
+                    "latest": lambda: store.retrieve(limit=10),
+                    "category_latest": lambda: store.retrieve("topic-3", limit=10),
+                    "time_range": lambda: store.retrieve(since=middle, until=middle + timedelta(seconds=100)),
+                }
+                for query, function in queries.items():
+                    results.add(f"memory.{backend_name}.{size}.retrieve_{query}", statistics.median(timed(function, 50)), "s")
+
+                if backend is not None:
+                    # A restarted agent pages history in lazily instead of loading it all
+                    reopened = SQLiteMemoryBackend(os.path.join(directory, "memory.db"))
+                    start = time.perf_counter()
+                    MemoryStore(backend=reopened).retrieve("topic-3", limit=10)
+                    results.add(f"memory.sqlite.{size}.reopen_and_retrieve", time.perf_counter() - start, "s")
+                    reopened.close()
+                    backend.close()
+                store = queries = None
+
+
+def bench_vector(results: Results, config: dict) -> None:
+    """VectorIndex indexing cost and top-k retrieval latency, the target being under a millisecond at 100k entries."""
+    from adoptagentai.core.embeddings import VectorIndex
+
+    categories = [f"topic-{index}" for index in range(20)]
+    queries = [f"What do we know about {categories[index % 20]} and entry {index}?" for index in range(config["vector_queries"])]
+    for size in config["vector_sizes"]:
+        texts = [f"Memory entry {index} about {categories[index % 20]}" for index in range(size)]
+        index = VectorIndex()
+        start = time.perf_counter()
+        for offset in range(0, size, 10_000):
+            index.add_many(range(offset, min(size, offset + 10_000)), texts[offset:offset + 10_000])
+        results.add(f"vector.{size}.add_per_entry", (time.perf_counter() - start) / size, "s")
+
+        for query in queries[:config["warmup"]]:
+            index.search(query, k=5)
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, k=5)
+            samples.append(time.perf_counter() - start)
+        results.add_latency(f"vector.{size}.search_top5.latency", samples)
+
+        start = time.perf_counter()
+        index.search_many(queries, k=5)
+        results.add(f"vector.{size}.search_many_top5_per_query", (time.perf_counter() - start) / len(queries), "s")
+
+
+def bench_credentials(results: Results, config: dict) -> None:
+    """get_api_credentials and list_api_accounts cost with many configured accounts."""
+    from adoptagentai.utils.api_keys import get_api_credentials, list_api_accounts
+
+    accounts = config["accounts"]
+    for index in range(accounts):
+        os.environ[f"{MODEL.upper()}_ACCOUNT{index}_API_KEY"] = f"key-{index}"
+    try:
+        lookups = timed(lambda: get_api_credentials(MODEL, f"account{accounts // 2}"), 2000)
+        results.add("credentials.get_api_credentials", statistics.median(lookups), "s", accounts=accounts)
+        listings = timed(lambda: list_api_accounts(MODEL), 200)
+        results.add("credentials.list_api_accounts", statistics.median(listings), "s", accounts=accounts)
+    finally:
+        for index in range(accounts):
+            os.environ.pop(f"{MODEL.upper()}_ACCOUNT{index}_API_KEY", None)
+
+
+def bench_import(results: Results, config: dict) -> None:
+    """Cold import time of the package and its subpackages, each in a fresh interpreter."""
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SOURCE, os.environ.get("PYTHONPATH")])))
+    for module in ("adoptagentai", "adoptagentai.core", "adoptagentai.integrations"):
+        code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+        samples = [float(subprocess.run([sys.executable, "-c", code], env=environment, capture_output=True, text=True, check=True).stdout)
+                   for _ in range(config["import_runs"])]
+        results.add(f"import.{module}", statistics.median(samples), "s")
+
+
+BENCHMARKS = {
+    "agent": bench_agent,
+    "batch": bench_batch,
+    "memory": bench_memory,
+    "vector": bench_vector,
+    "credentials": bench_credentials,
+    "import": bench_import,
+}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compares two runs metric by metric.
+
+    Args:
+        current (dict): The metrics of this run.
+        baseline (dict): The metrics of the run to compare with.
+        threshold (float): The relative change beyond which a worse value is a regression.
+
+    Returns:
+        list: The names of the regressed metrics.
+    """
+    regressions = []
+    print(f"\n{'metric':<55} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, metric in current.items():
+        previous = baseline.get(name)
+        if previous is None or not previous["value"]:
+            continue
+        change = (metric["value"] - previous["value"]) / abs(previous["value"])
+        worse = change > threshold if metric["better"] == "lower" else change < -threshold
+        if worse:
+            regressions.append(name)
+        print(f"{name:<55} {previous['value']:>12.4g} {metric['value']:>12.4g} {change:>+7.1%}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suite", action="append", choices=SUITES, help="Benchmark to run, repeatable. Defaults to all.")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes, for a fast sanity run.")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds the fake server takes per response.")
+    parser.add_argument("--memory-sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        help="Comma separated memory sizes. Defaults to 10000,100000,1000000 (10000 with --quick).")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="A previous results file to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression. Defaults to 0.1.")
+    args = parser.parse_args(argv)
+
+    config = {
+        "latency": args.latency,
+        "warmup": 5,
+        "calls": 50 if args.quick else 300,
+        "batch_size": 100 if args.quick else 1000,
+        "concurrency": 16,
+        "memory_sizes": args.memory_sizes or ([10_000] if args.quick else [10_000, 100_000, 1_000_000]),
+        "vector_sizes": [10_000] if args.quick else [10_000, 100_000],
+        "vector_queries": 100 if args.quick else 1000,
+        "accounts": 100 if args.quick else 1000,
+        "import_runs": 3 if args.quick else 10,
+    }
+    results = Results()
+    for suite in args.suite or SUITES:
+        BENCHMARKS[suite](results, config)
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": config,
+        },
+        "metrics": results.metrics,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["metrics"]
+        regressions = compare(results.metrics, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
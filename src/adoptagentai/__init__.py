@@ -1,8 +1,11 @@
 """
 """
 
+import logging
+
 from adoptagentai.core.agent import Agent
-from adoptagentai.utils.api_keys import list_api_requirements, define_api_credentials, get_api_credentials, remove_api_credentials, list_api_accounts, list_configured_apis
+from adoptagentai.core.modelStrategies import gpt_4o_strategy, gpt_4o_mini_strategy
+from adoptagentai.utils.api_keys import list_api_requirements, define_api_credentials, get_api_credentials, remove_api_credentials, list_api_accounts, list_configured_apis, reload_api_credentials, define_api_credentials_bulk, remove_api_credentials_bulk, register_api
 
 __all__ = [
     'Agent',
@@ -13,7 +16,14 @@ __all__ = [
     'get_api_credentials',
     'remove_api_credentials',
     'list_api_accounts',
-    'list_configured_apis'
+    'list_configured_apis',
+    'reload_api_credentials',
+    'define_api_credentials_bulk',
+    'remove_api_credentials_bulk',
+    'register_api'
 ]
 
 __version__ = '0.1.0'
+
+# Applications opt in to the library's logs by configuring logging themselves
+logging.getLogger("adoptagentai").addHandler(logging.NullHandler())
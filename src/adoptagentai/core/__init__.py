@@ -1,6 +1,68 @@
+import importlib
+
 from adoptagentai.core.agent import Agent
-from adoptagentai.core.modelStrategies import gpt_4o_strategy, gpt_4o_mini_strategy
+from adoptagentai.core.modelStrategies import gpt_4o_strategy, gpt_4o_mini_strategy, gpt_4o_strategy_async, gpt_4o_mini_strategy_async, register_strategy, resolve_strategy
+
+# Optional features are imported on first access, so `import adoptagentai` stays cheap
+_LAZY_IMPORTS = {
+    'get_openai_client': 'adoptagentai.core.clients',
+    'configure_clients': 'adoptagentai.core.clients',
+    'close_clients': 'adoptagentai.core.clients',
+    'aclose_clients': 'adoptagentai.core.clients',
+    'ResponseCache': 'adoptagentai.core.cache',
+    'MemoryEntry': 'adoptagentai.core.memory',
+    'MemoryStore': 'adoptagentai.core.memory',
+    'SQLiteMemoryBackend': 'adoptagentai.core.memory',
+    'HashingEmbedder': 'adoptagentai.core.embeddings',
+    'VectorIndex': 'adoptagentai.core.embeddings',
+    'PromptAssembler': 'adoptagentai.core.prompting',
+    'count_tokens': 'adoptagentai.core.prompting',
+    'CallRecord': 'adoptagentai.core.instrumentation',
+    'HistogramSink': 'adoptagentai.core.instrumentation',
+    'PrometheusSink': 'adoptagentai.core.instrumentation',
+    'CallbackSink': 'adoptagentai.core.instrumentation',
+    'RateLimitScheduler': 'adoptagentai.core.scheduler',
+    'get_default_scheduler': 'adoptagentai.core.scheduler',
+    'set_default_scheduler': 'adoptagentai.core.scheduler',
+    'AccountPool': 'adoptagentai.core.accounts',
+    'Tool': 'adoptagentai.core.tools',
+    'ToolExecutor': 'adoptagentai.core.tools',
+}
 
 __all__ = ['Agent',
            'gpt_4o_strategy',
-           'gpt_4o_mini_strategy']
+           'gpt_4o_mini_strategy',
+           'gpt_4o_strategy_async',
+           'gpt_4o_mini_strategy_async',
+           'register_strategy',
+           'resolve_strategy',
+           'get_openai_client',
+           'configure_clients',
+           'close_clients',
+           'aclose_clients',
+           'ResponseCache',
+           'MemoryEntry',
+           'MemoryStore',
+           'SQLiteMemoryBackend',
+           'HashingEmbedder',
+           'VectorIndex',
+           'PromptAssembler',
+           'count_tokens',
+           'CallRecord',
+           'HistogramSink',
+           'PrometheusSink',
+           'CallbackSink',
+           'RateLimitScheduler',
+           'get_default_scheduler',
+           'set_default_scheduler',
+           'AccountPool',
+           'Tool',
+           'ToolExecutor']
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
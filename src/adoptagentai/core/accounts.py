@@ -0,0 +1,150 @@
+import itertools
+import threading
+import time
+
+from adoptagentai.core.scheduler import is_retryable, retry_after, status_code
+
+
+BALANCING_MODES = ('least_outstanding', 'rate_budget')
+
+# Errors that mean the account itself is unusable (revoked key, exhausted quota), not just busy
+ACCOUNT_ERROR_STATUS_CODES = frozenset({401, 403})
+
+
+class _AccountState:
+    __slots__ = ('name', 'outstanding', 'requests', 'failures', 'consecutive_failures', 'ejections', 'ejected_until')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+
+class AccountPool:
+    """
+    Spreads the calls of one model over several accounts of the same API.
+
+    Each call goes to the healthy account with the fewest calls in flight
+    ('least_outstanding') or with the most rate limit budget left in the scheduler
+    ('rate_budget'), ties going round robin. An account is ejected when it is
+    throttled (for as long as the provider asked) or after failure_threshold
+    consecutive failures (for ejection_time, doubling with each ejection up to
+    max_ejection_time). When every account is ejected the one coming back first is
+    used, so the pool never refuses a call on its own.
+    """
+    def __init__(self, accounts, balancing: str = 'least_outstanding', ejection_time: float = 5.0, max_ejection_time: float = 120.0, failure_threshold: int = 1):
+        if balancing not in BALANCING_MODES:
+            raise ValueError(f"Unknown balancing mode '{balancing}', expected one of: {', '.join(BALANCING_MODES)}")
+        self._states = {}
+        for account in accounts:
+            self._states.setdefault(account, _AccountState(account))
+        if not self._states:
+            raise ValueError("An account pool needs at least one account.")
+        self.balancing = balancing
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.failure_threshold = failure_threshold
+        self._rotation = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def accounts(self) -> list:
+        """The account names of the pool."""
+        return list(self._states)
+
+    def acquire(self, scheduler=None, model_name: str = None, exclude=()) -> str:
+        """
+        Picks the account for the next call and counts the call as outstanding on it.
+
+        Args:
+            scheduler (RateLimitScheduler, optional): Used to skip paused accounts and, in 'rate_budget' mode, to rank them.
+            model_name (str, optional): The model the call is for, required with a scheduler.
+            exclude (iterable, optional): Accounts already tried for this call.
+
+        Returns:
+            str: The account name.
+        """
+        with self._lock:
+            now = time.monotonic()
+            states = [state for state in self._states.values() if state.name not in exclude] or list(self._states.values())
+            healthy = [state for state in states if state.ejected_until <= now]
+            if scheduler is not None and healthy:
+                ready = [state for state in healthy if not scheduler.cooldown(model_name, state.name)]
+                healthy = ready or healthy
+            if not healthy:
+                healthy = [min(states, key=lambda state: state.ejected_until)]
+
+            # Rotate the candidates so ties are broken round robin instead of always favoring the first account
+            offset = next(self._rotation) % len(healthy)
+            healthy = healthy[offset:] + healthy[:offset]
+            if self.balancing == 'rate_budget' and scheduler is not None:
+                chosen = max(healthy, key=lambda state: (scheduler.headroom(model_name, state.name), -state.outstanding))
+            else:
+                chosen = min(healthy, key=lambda state: state.outstanding)
+
+            chosen.outstanding += 1
+            chosen.requests += 1
+            return chosen.name
+
+    def release(self, account: str, error: Exception = None) -> None:
+        """
+        Marks a call as finished, ejecting the account if the error was its fault.
+
+        Args:
+            account (str): The account returned by acquire().
+            error (Exception, optional): The error the call failed with, if any.
+        """
+        with self._lock:
+            state = self._states[account]
+            state.outstanding -= 1
+            if error is None:
+                state.consecutive_failures = 0
+                state.ejections = 0
+                return
+            if not self.should_failover(error):
+                return
+
+            state.failures += 1
+            state.consecutive_failures += 1
+            now = time.monotonic()
+            if status_code(error) == 429:
+                requested = retry_after(error)
+                duration = requested if requested is not None else self.ejection_time
+            elif state.consecutive_failures >= self.failure_threshold:
+                duration = min(self.max_ejection_time, self.ejection_time * 2 ** state.ejections)
+            else:
+                return
+            state.ejections += 1
+            state.ejected_until = max(state.ejected_until, now + duration)
+
+    def eject(self, account: str, seconds: float) -> None:
+        """Take an account out of rotation for the given number of seconds."""
+        with self._lock:
+            state = self._states[account]
+            state.ejected_until = max(state.ejected_until, time.monotonic() + seconds)
+
+    @staticmethod
+    def should_failover(error: Exception) -> bool:
+        """Return True if another account may succeed where this one failed."""
+        return is_retryable(error) or status_code(error) in ACCOUNT_ERROR_STATUS_CODES
+
+    def stats(self) -> dict:
+        """Return the outstanding, request and failure counters of every account and how long it stays ejected."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                state.name: {
+                    'outstanding': state.outstanding,
+                    'requests': state.requests,
+                    'failures': state.failures,
+                    'ejected_for': max(0.0, state.ejected_until - now),
+                }
+                for state in self._states.values()
+            }
+
+    def __len__(self):
+        return len(self._states)
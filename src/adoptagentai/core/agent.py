@@ -1,10 +1,24 @@
+import contextlib
+import json
 import logging
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from adoptagentai.utils.api_keys import get_api_credentials
+from adoptagentai.core.memory import MemoryEntry, MemoryStore
+from adoptagentai.core.instrumentation import CallRecord, enqueued_at, dispatched_at, dispatched_account, response_usage
+from adoptagentai.core.scheduler import get_default_scheduler
+from adoptagentai.core.accounts import AccountPool
+from adoptagentai.core.tools import Tool, ToolExecutor, function_calls, tool_turn_input
 import adoptagentai.core.modelStrategies as modelStrategies
 
+# Output tokens reserved in the tokens-per-minute bucket for each call, corrected once the usage is known
+ESTIMATED_OUTPUT_TOKENS = 256
+
+# Model turns answering tool calls before run_agent gives up and returns the last response
+MAX_TOOL_ROUNDS = 8
+
 class Agent:
-    def __init__(self, name: str = None, model_name: str = None, model_account_name: str = None, tool_list: list = None, tool_credentials: dict = None, memory: list = None):
+    def __init__(self, name: str = None, model_name: str = None, model_account_name: str = None, tool_list: list = None, tool_credentials: dict = None, memory: list = None, response_cache=None, memory_backend=None, memory_index=None, prompt_assembler=None, metrics_sinks: list = None, scheduler=None, account_pool=None, tools: list = None, tool_executor: ToolExecutor = None, tool_choice="auto", parallel_tool_calls: bool = True, max_tool_rounds: int = MAX_TOOL_ROUNDS, model_options: dict = None):
         """Initialize an AI agent with optional model and tool configuration."""
         # Agent general
         self.name = name
@@ -12,46 +26,87 @@ class Agent:
         # Retrieval Model
         self.model_name = model_name if model_name else None
         self.model_account_name = model_account_name
-        self.model_credentials = get_api_credentials(self.model_name, self.model_account_name) if model_name else None
-        self.strategies = {
-            "gpt-4o": modelStrategies.gpt_4o_strategy,
-            "gpt-4o-mini": modelStrategies.gpt_4o_mini_strategy,
-        }
+        # Several accounts of the model's API sharing the load (an AccountPool or a list of account names)
+        self.account_pool = account_pool if account_pool is None or isinstance(account_pool, AccountPool) else AccountPool(account_pool)
+        self.model_credentials = self._load_credentials(self.model_account_name) if model_name and (model_account_name or self.account_pool is None) else None
+        self._resolve_pool_credentials()
+        self._resolve_strategies()
+        # Sampling options sent with every call, e.g. {'temperature': 0} to make responses cacheable
+        self.model_options = dict(model_options) if model_options else {}
         
         # Tools
         self.tool_list = tool_list if tool_list else []
         self.tool_credentials = tool_credentials if tool_credentials else {}
+        # Callables the model can call, run concurrently by the tool executor (see adoptagentai.core.tools)
+        self.tools = {}
+        self.tool_executor = tool_executor if tool_executor is not None else ToolExecutor()
+        self.tool_choice = tool_choice
+        self.parallel_tool_calls = parallel_tool_calls
+        self.max_tool_rounds = max_tool_rounds
         
         # Memory
-        self.memory = memory if memory else []
+        # An optional backend (see adoptagentai.core.memory.SQLiteMemoryBackend) makes memory durable
+        self.memory = memory if isinstance(memory, MemoryStore) else MemoryStore(memory, backend=memory_backend)
+
+        # An optional similarity index (see adoptagentai.core.embeddings.VectorIndex) enables search_memory
+        self.memory_index = memory_index
+        if memory_index is not None and not len(memory_index):
+            entries = self.memory.retrieve()
+            memory_index.add_many([entry.id for entry in entries], [entry.data for entry in entries])
         
-        # Logging configuration
+        # Optional token budgeting of prompts (see adoptagentai.core.prompting.PromptAssembler)
+        self.prompt_assembler = prompt_assembler
+
+        # Opt-in response cache, looked up before calls take a rate limit slot (see adoptagentai.core.cache.ResponseCache)
+        self.response_cache = response_cache
+
+        # Metrics of the last streamed execution
+        self.last_stream_metrics = None
+
+        # Rate limits and retries, shared by every agent unless one is given (see adoptagentai.core.scheduler)
+        self.scheduler = scheduler if scheduler is not None else get_default_scheduler()
+
+        # Sinks receiving a CallRecord per model call (see adoptagentai.core.instrumentation)
+        self.metrics_sinks = list(metrics_sinks) if metrics_sinks else []
+
+        # Logging is configured by the application, not by the library
         self.logger = logging.getLogger(__name__)
-        logging.basicConfig(level=logging.INFO)
 
-        self.logger.info(f"Agent '{name}' initialized with model: {model_name}")
+        for tool in tools or []:
+            if isinstance(tool, Tool):
+                self.register_tool(tool.name, tool.function, tool.description, tool.parameters, tool.timeout, tool.strict)
+            else:
+                self.register_tool(tool.__name__, tool)
+
+        self.logger.info("Agent '%s' initialized with model: %s", name, model_name)
         
     
     def add_tool(self, tool_name: str, tool_credentials: dict) -> None:
         """Add a tool to the agent with its credentials."""
         if tool_name in self.tool_list:
-            self.logger.warning(f"Tool '{tool_name}' already exists. Updating credentials.")
+            self.logger.warning("Tool '%s' already exists. Updating credentials.", tool_name)
             self.tool_credentials[tool_name] = tool_credentials
         else:
             self.tool_list.append(tool_name)
             self.tool_credentials[tool_name] = tool_credentials
-            self.logger.info(f"Tool '{tool_name}' added to the agent.")
+            self.logger.info("Tool '%s' added to the agent.", tool_name)
         
     
-    def add_memory(self, data: str, category: str = None) -> dict:
+    def register_tool(self, name: str, function, description: str = None, parameters: dict = None, timeout: float = None, strict: bool = False) -> Tool:
+        """Let the model call a function, described by its docstring and signature unless given."""
+        tool = self.tools[name] = Tool(name, function, description, parameters, timeout, strict)
+        if name not in self.tool_list:
+            self.tool_list.append(name)
+        self.logger.info("Tool '%s' registered on the agent.", name)
+        return tool
+
+
+    def add_memory(self, data: str, category: str = None) -> MemoryEntry:
         """Add data with metadata to the agent's memory."""
-        memory_entry = {
-            'data': data,
-            'category': category,
-            'timestamp': datetime.now()
-        }
-        self.memory.append(memory_entry)
-        self.logger.info(f"Memory updated with: {data[:50]}{'...' if len(data) > 50 else ''}, Category: {category}")
+        memory_entry = self.memory.add(data, category)
+        if self.memory_index is not None:
+            self.memory_index.add(memory_entry.id, data)
+        self.logger.info("Memory updated with: %.50s%s, Category: %s", data, "..." if len(data) > 50 else "", category)
         return memory_entry
 
     
@@ -60,30 +115,51 @@ class Agent:
         return self.tool_list
     
     
-    def retrieve_memory(self, category: str = None):
-        """Retrieve the agent's memory, optionally filtered by category."""
-        if category:
-            return [entry for entry in self.memory if entry['category'] == category]
-        return self.memory
+    def retrieve_memory(self, category: str = None, since=None, until=None, limit: int = None) -> list:
+        """Retrieve the agent's memory as dicts, optionally filtered by category, time range (datetime or timedelta) and latest count."""
+        return [entry.to_dict() for entry in self.memory.retrieve(category or None, since, until, limit)]
     
     
+    def search_memory(self, query: str, k: int = 5) -> list:
+        """Retrieve the k memory entries most similar to the query, best first."""
+        if self.memory_index is None:
+            self.logger.warning("No memory index configured for similarity search.")
+            return []
+        return [entry for entry, _ in self._memory_hits(query, k)]
+
+
+    def _memory_hits(self, query: str, k: int) -> list:
+        """Return (entry, score) pairs of the index hits, skipping keys the memory holds no loaded entry for."""
+        hits = []
+        for key, score in self.memory_index.search(query, k):
+            entry = self.memory.get(key)
+            if entry is not None:
+                hits.append((entry, score))
+        return hits
+
+
     def remove_tool(self, tool_name: str) -> None:
         """Remove a tool from the agent."""
         if tool_name in self.tool_list:
             self.tool_list.remove(tool_name)
-            del self.tool_credentials[tool_name]
-            self.logger.info(f"Tool '{tool_name}' removed from the agent.")
+            self.tool_credentials.pop(tool_name, None)
+            self.tools.pop(tool_name, None)
+            self.logger.info("Tool '%s' removed from the agent.", tool_name)
         else:
-            self.logger.warning(f"Tool '{tool_name}' not found in the agent.")
+            self.logger.warning("Tool '%s' not found in the agent.", tool_name)
             
             
     def clear_memory(self, category: str = None):
         """Clear agent's memory, optionally filtered by category."""
         if category:
-            self.memory = [entry for entry in self.memory if entry['category'] != category]
-            self.logger.info(f"Memory entries with category '{category}' cleared.")
+            removed = self.memory.clear(category)
+            if self.memory_index is not None:
+                self.memory_index.remove(removed)
+            self.logger.info("Memory entries with category '%s' cleared.", category)
         else:
-            self.memory = []
+            self.memory.clear()
+            if self.memory_index is not None:
+                self.memory_index.clear()
             self.logger.info("All memory entries cleared.")
 
 
@@ -91,25 +167,489 @@ class Agent:
         """Update the agent's model configuration."""
         self.model_name = model_name.lower() if model_name else None
         self.model_account_name = model_account_name
-        self.model_credentials = get_api_credentials(self.model_name, self.model_account_name)
-        self.logger.info(f"Agent model updated to: {model_name}")
+        self.model_credentials = self._load_credentials(self.model_account_name) if model_account_name or self.account_pool is None else None
+        self._resolve_pool_credentials()
+        self._resolve_strategies()
+        self.logger.info("Agent model updated to: %s", model_name)
         
     
-    def run_agent(self, prompt: str) -> str:
+    def run_agent(self, prompt: str, memory_top_k: int = None, priority: int = 0) -> str:
         """Execute the agent by generating a response from the configured model."""
-        print(f"model name {self.model_name}, model account name {self.model_account_name}, model credentials {self.model_credentials}") # TEST
-        if not self.model_name or not self.model_account_name or not self.model_credentials:
+        error = self._configuration_error(self.strategy)
+        if error:
+            return error
+
+        start = dispatched = time.perf_counter()
+        try:
+            prompt = self._prepare_prompt(prompt, memory_top_k)
+            options = self._strategy_options()
+            rounds = 0
+            while True:
+                dispatched = time.perf_counter()
+                response = self._call_model(self.strategy, prompt, options, priority=priority)
+                if self.metrics_sinks:
+                    self._record_call(self.strategy, start, dispatched, response=response)
+                calls = function_calls(response) if self.tools else []
+                if not calls:
+                    break
+                # Past the limit the calls are left unexecuted, since the model would never see their results
+                if rounds >= self.max_tool_rounds:
+                    self.logger.warning("Model '%s' still calls tools after %s rounds, returning its last response.", self.model_name, self.max_tool_rounds)
+                    break
+                prompt = tool_turn_input(prompt, response, self.tool_executor.execute(calls, self.tools))
+                rounds += 1
+                start = time.perf_counter()
+            self.logger.info("Model '%s' executed successfully.", self.model_name)
+            return response
+
+        except Exception as e:
+            if self.metrics_sinks:
+                self._record_call(self.strategy, start, dispatched, error=e)
+            self.logger.error("Error executing model: %s", e)
+            return "Error executing model."
+
+
+    async def arun_agent(self, prompt: str, memory_top_k: int = None, priority: int = 0) -> str:
+        """Execute the agent asynchronously, without blocking the event loop on the model call."""
+        error = self._configuration_error(self.async_strategy)
+        if error:
+            return error
+
+        start = dispatched = time.perf_counter()
+        try:
+            prompt = self._prepare_prompt(prompt, memory_top_k)
+            options = self._strategy_options()
+            rounds = 0
+            while True:
+                dispatched = time.perf_counter()
+                response = await self._acall_model(self.async_strategy, prompt, options, priority=priority)
+                if self.metrics_sinks:
+                    self._record_call(self.async_strategy, start, dispatched, response=response)
+                calls = function_calls(response) if self.tools else []
+                if not calls:
+                    break
+                # Past the limit the calls are left unexecuted, since the model would never see their results
+                if rounds >= self.max_tool_rounds:
+                    self.logger.warning("Model '%s' still calls tools after %s rounds, returning its last response.", self.model_name, self.max_tool_rounds)
+                    break
+                prompt = tool_turn_input(prompt, response, await self.tool_executor.aexecute(calls, self.tools))
+                rounds += 1
+                start = time.perf_counter()
+            self.logger.info("Model '%s' executed successfully.", self.model_name)
+            return response
+
+        except Exception as e:
+            if self.metrics_sinks:
+                self._record_call(self.async_strategy, start, dispatched, error=e)
+            self.logger.error("Error executing model: %s", e)
+            return "Error executing model."
+
+
+    def run_agent_stream(self, prompt: str, memory_top_k: int = None):
+        """Execute the agent and yield the response text deltas as the model generates them."""
+        error = self._configuration_error(self.strategy)
+        if error:
+            yield error
+            return
+
+        call_start = start = time.perf_counter()
+        first_token = completed = None
+        try:
+            prompt = self._prepare_prompt(prompt, memory_top_k)
+            start = time.perf_counter()
+            stream = self._call_model(self.strategy, prompt, dict(self.model_options, stream=True))
+            # Closing the stream when the consumer stops early releases its connection and account right away
+            with contextlib.closing(stream):
+                for event in stream:
+                    if event.type == "response.output_text.delta":
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        completed = event
+            self._record_stream_metrics(start, first_token)
+            if self.metrics_sinks:
+                self._record_call(self.strategy, call_start, start, response=completed, first_token=first_token, streamed=True)
+
+        except Exception as e:
+            if self.metrics_sinks:
+                self._record_call(self.strategy, call_start, start, error=e, first_token=first_token, streamed=True)
+            self.logger.error("Error executing model: %s", e)
+            yield "Error executing model."
+
+
+    async def arun_agent_stream(self, prompt: str, memory_top_k: int = None):
+        """Execute the agent asynchronously and yield the response text deltas as they arrive."""
+        error = self._configuration_error(self.async_strategy)
+        if error:
+            yield error
+            return
+
+        call_start = start = time.perf_counter()
+        first_token = completed = None
+        try:
+            prompt = self._prepare_prompt(prompt, memory_top_k)
+            start = time.perf_counter()
+            stream = await self._acall_model(self.async_strategy, prompt, dict(self.model_options, stream=True))
+            async with contextlib.aclosing(stream):
+                async for event in stream:
+                    if event.type == "response.output_text.delta":
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        completed = event
+            self._record_stream_metrics(start, first_token)
+            if self.metrics_sinks:
+                self._record_call(self.async_strategy, call_start, start, response=completed, first_token=first_token, streamed=True)
+
+        except Exception as e:
+            if self.metrics_sinks:
+                self._record_call(self.async_strategy, call_start, start, error=e, first_token=first_token, streamed=True)
+            self.logger.error("Error executing model: %s", e)
+            yield "Error executing model."
+
+
+    def _resolve_strategies(self) -> None:
+        """Look up the strategies for the configured model once, so each call is a plain function call."""
+        self.strategy = modelStrategies.resolve_strategy(self.model_name) if self.model_name else None
+        self.async_strategy = modelStrategies.resolve_strategy(self.model_name, asynchronous=True) if self.model_name else None
+
+
+    def _load_credentials(self, account_name: str) -> dict:
+        """Load an account's credentials for the configured model, stored under the registered model serving it."""
+        return get_api_credentials(modelStrategies.resolve_model(self.model_name) or self.model_name, account_name)
+
+
+    def _resolve_pool_credentials(self) -> None:
+        """Load the credentials of every account of the pool for the configured model."""
+        self.account_credentials = {}
+        if self.account_pool is not None and self.model_name:
+            self.account_credentials = {account: self._load_credentials(account) for account in self.account_pool.accounts}
+
+
+    def _configuration_error(self, strategy) -> str:
+        """Return the error message if the agent cannot execute with this strategy, or None."""
+        if self.account_pool is not None:
+            configured = self.model_name and all(self.account_credentials.values())
+        else:
+            configured = self.model_name and self.model_account_name and self.model_credentials
+        if not configured:
             self.logger.error("No model configured for execution.")
             return "Error: No model configured."
+        if strategy is None:
+            self.logger.error("No strategy registered for model '%s'.", self.model_name)
+            return "Error: No strategy registered for model."
+        return None
+
 
+    def _prepare_prompt(self, prompt: str, memory_top_k: int = None) -> str:
+        """Add the memory entries most relevant to the prompt, fitted to the token budget when an assembler is set."""
+        memory = []
+        if memory_top_k:
+            if self.memory_index is None:
+                self.logger.warning("No memory index configured for similarity search.")
+            else:
+                memory = [(entry.data, score) for entry, score in self._memory_hits(prompt, memory_top_k)]
+
+        if self.prompt_assembler is not None:
+            instructions = modelStrategies.resolve_instructions(self.model_name)
+            return self.prompt_assembler.assemble(self.model_name, prompt, memory, instructions)
+
+        if not memory:
+            return prompt
+        context = "\n".join(f"- {data}" for data, _ in memory)
+        return f"Relevant memory:\n{context}\n\n{prompt}"
+
+
+    def _cache_key(self, prompt, options: dict) -> str:
+        """Return the response cache key of a call, or None when there is no cache or the call can't be cached."""
+        if self.response_cache is None:
+            return None
+        return modelStrategies.response_cache_key(self.response_cache, self.model_name, prompt, options)
+
+
+    def _call_model(self, strategy, prompt: str, options: dict, priority: int = 0):
+        """Serve a call from the response cache, before it takes a rate limit slot, or dispatch it."""
+        cache_key = self._cache_key(prompt, options)
+        if cache_key is not None:
+            response = self.response_cache.get(cache_key)
+            if response is not None:
+                return response
+        response = self._dispatch(strategy, prompt, options, priority)
+        if cache_key is not None:
+            self.response_cache.set(cache_key, response)
+        return response
+
+
+    async def _acall_model(self, strategy, prompt: str, options: dict, priority: int = 0):
+        """Async version of _call_model."""
+        cache_key = self._cache_key(prompt, options)
+        if cache_key is not None:
+            response = self.response_cache.get(cache_key)
+            if response is not None:
+                return response
+        response = await self._adispatch(strategy, prompt, options, priority)
+        if cache_key is not None:
+            self.response_cache.set(cache_key, response)
+        return response
+
+
+    def _dispatch(self, strategy, prompt: str, options: dict, priority: int = 0):
+        """Call a strategy through the scheduler, failing over across the account pool when there is one."""
+        if self.account_pool is None:
+            tokens = self._estimated_tokens(prompt, self.model_account_name)
+            response = self.scheduler.call(
+                self.model_name, self.model_account_name, strategy, (self.model_name, prompt, self.model_credentials),
+                options, tokens=tokens, priority=priority,
+            )
+            return self._finish_stream(response, self.model_account_name, tokens) if options.get('stream') else response
+
+        tried = []
+        while True:
+            account = self.account_pool.acquire(self.scheduler, self.model_name, tried)
+            # Other accounts are tried right away; the last one gets the scheduler's backoff and retries
+            last = len(tried) + 1 >= len(self.account_pool)
+            try:
+                tokens = self._estimated_tokens(prompt, account)
+                response = self.scheduler.call(
+                    self.model_name, account, strategy, (self.model_name, prompt, self.account_credentials[account]),
+                    options, tokens=tokens, priority=priority,
+                    max_retries=None if last else 0,
+                )
+            except Exception as e:
+                self.account_pool.release(account, e)
+                if last or not self.account_pool.should_failover(e):
+                    raise
+                self.logger.warning("Account '%s' failed for model '%s', failing over: %s", account, self.model_name, e)
+                tried.append(account)
+                continue
+            if options.get('stream'):
+                # The account stays in use until the stream is consumed
+                return self._finish_stream(response, account, tokens)
+            self.account_pool.release(account)
+            return response
+
+
+    async def _adispatch(self, strategy, prompt: str, options: dict, priority: int = 0):
+        """Async version of _dispatch."""
+        if self.account_pool is None:
+            tokens = self._estimated_tokens(prompt, self.model_account_name)
+            response = await self.scheduler.acall(
+                self.model_name, self.model_account_name, strategy, (self.model_name, prompt, self.model_credentials),
+                options, tokens=tokens, priority=priority,
+            )
+            return self._afinish_stream(response, self.model_account_name, tokens) if options.get('stream') else response
+
+        tried = []
+        while True:
+            account = self.account_pool.acquire(self.scheduler, self.model_name, tried)
+            last = len(tried) + 1 >= len(self.account_pool)
+            try:
+                tokens = self._estimated_tokens(prompt, account)
+                response = await self.scheduler.acall(
+                    self.model_name, account, strategy, (self.model_name, prompt, self.account_credentials[account]),
+                    options, tokens=tokens, priority=priority,
+                    max_retries=None if last else 0,
+                )
+            except Exception as e:
+                self.account_pool.release(account, e)
+                if last or not self.account_pool.should_failover(e):
+                    raise
+                self.logger.warning("Account '%s' failed for model '%s', failing over: %s", account, self.model_name, e)
+                tried.append(account)
+                continue
+            if options.get('stream'):
+                return self._afinish_stream(response, account, tokens)
+            self.account_pool.release(account)
+            return response
+
+
+    def _finish_stream(self, stream, account: str, tokens: int):
+        """
+        Yield the events of a streamed response, then settle it: correct the tokens reserved for it with the
+        usage of its final event, release its pool account with the error it failed with, if any, and close it.
+        """
+        completed = error = None
         try:
-            for key, strategy in self.strategies.items():
-                if key in self.model_name:
-                    response = strategy(self.model_name, prompt, self.model_credentials)
-                    self.logger.info(f"Model '{self.model_name}' executed successfully.")
-                    return response
+            for event in stream:
+                if getattr(event, 'type', None) == "response.completed":
+                    completed = event
+                yield event
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if completed is not None:
+                self.scheduler.settle_usage(self.model_name, account, tokens, completed)
+            if self.account_pool is not None:
+                self.account_pool.release(account, error)
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
 
+
+    async def _afinish_stream(self, stream, account: str, tokens: int):
+        """Async version of _finish_stream."""
+        completed = error = None
+        try:
+            async for event in stream:
+                if getattr(event, 'type', None) == "response.completed":
+                    completed = event
+                yield event
         except Exception as e:
-            self.logger.error(f"Error executing model: {e}")
-            return "Error executing model."
-    
\ No newline at end of file
+            error = e
+            raise
+        finally:
+            if completed is not None:
+                self.scheduler.settle_usage(self.model_name, account, tokens, completed)
+            if self.account_pool is not None:
+                self.account_pool.release(account, error)
+            # AsyncStream.close() and async generators' aclose() are both coroutines
+            close = getattr(stream, 'aclose', None) or getattr(stream, 'close', None)
+            if close is not None:
+                await close()
+
+
+    def _estimated_tokens(self, prompt: str, account_name: str) -> int:
+        """Estimate the tokens a call will use when the scheduler limits tokens per minute, else 0."""
+        if not self.scheduler.tracks_tokens(self.model_name, account_name):
+            return 0
+        from adoptagentai.core.prompting import count_tokens
+
+        instructions = modelStrategies.resolve_instructions(self.model_name)
+        # Tool turns send a list of input items
+        text = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+        return count_tokens(text, self.model_name) + count_tokens(instructions, self.model_name) + ESTIMATED_OUTPUT_TOKENS
+
+
+    def _strategy_options(self) -> dict:
+        """Build the optional keyword arguments passed to every strategy call."""
+        options = dict(self.model_options)
+        if self.tools:
+            options['tools'] = [tool.schema() for tool in self.tools.values()]
+            options['tool_choice'] = self.tool_choice
+            options['parallel_tool_calls'] = self.parallel_tool_calls
+        return options
+
+
+    def _record_stream_metrics(self, start: float, first_token: float) -> None:
+        """Store the time-to-first-token and total latency of a finished stream."""
+        self.last_stream_metrics = {
+            'time_to_first_token': first_token,
+            'total_latency': time.perf_counter() - start,
+        }
+        self.logger.info("Model '%s' streamed successfully.", self.model_name)
+
+
+    def add_metrics_sink(self, sink) -> None:
+        """Send a CallRecord for every following model call to a sink with a record(call_record) method."""
+        self.metrics_sinks.append(sink)
+
+
+    def remove_metrics_sink(self, sink) -> None:
+        """Stop sending call records to a sink."""
+        if sink in self.metrics_sinks:
+            self.metrics_sinks.remove(sink)
+
+
+    def _record_call(self, strategy, start: float, dispatched: float, response=None, error: Exception = None, first_token: float = None, streamed: bool = False) -> None:
+        """Build the CallRecord of a finished call and hand it to every sink; a failing sink never fails the call."""
+        end = time.perf_counter()
+        account = self.model_account_name
+        scheduled = dispatched_at.get()
+        if scheduled is not None and dispatched < scheduled <= end:
+            dispatched = scheduled
+            account = dispatched_account.get()
+        queued = enqueued_at.get()
+        if queued is not None and queued < start:
+            start = queued
+        input_tokens, output_tokens, cached_tokens = response_usage(response) if response is not None else (None, None, None)
+        record = CallRecord(
+            agent=self.name,
+            model=self.model_name,
+            account=account,
+            strategy=getattr(strategy, "__name__", type(strategy).__name__),
+            started_at=time.time() - (end - start),
+            queue_time=dispatched - start,
+            network_time=end - dispatched,
+            total_latency=end - start,
+            time_to_first_token=first_token,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_tokens=cached_tokens,
+            error=type(error).__name__ if error is not None else None,
+            streamed=streamed,
+        )
+        for sink in self.metrics_sinks:
+            try:
+                sink.record(record)
+            except Exception as e:
+                self.logger.warning("Metrics sink %r failed: %s", sink, e)
+
+
+    def iter_batch(self, prompts, max_concurrency: int = 8):
+        """Run many prompts concurrently, yielding (index, response) pairs as they finish."""
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = {}
+            for index, prompt in enumerate(prompts):
+                # Keep a bounded window of submitted prompts so huge iterables are consumed lazily
+                if len(pending) >= max_concurrency * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), self._batch_result(future)
+                if self.metrics_sinks:
+                    pending[executor.submit(self._run_enqueued, prompt, time.perf_counter())] = index
+                else:
+                    pending[executor.submit(self.run_agent, prompt)] = index
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), self._batch_result(future)
+
+
+    def run_batch(self, prompts, max_concurrency: int = 8) -> list:
+        """Run many prompts concurrently and return the responses in input order."""
+        results = {}
+        for index, response in self.iter_batch(prompts, max_concurrency):
+            results[index] = response
+        return [results[index] for index in range(len(results))]
+
+
+    async def arun_batch(self, prompts, max_concurrency: int = 8) -> list:
+        """Run many prompts concurrently on the event loop and return the responses in input order."""
+        import asyncio
+
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(prompt):
+            # Each gathered coroutine runs in its own task and context, so the wait for the semaphore counts as queue time
+            enqueued_at.set(time.perf_counter())
+            async with semaphore:
+                return await self.arun_agent(prompt)
+
+        return await asyncio.gather(*(run_one(prompt) for prompt in prompts), return_exceptions=True)
+
+
+    def _run_enqueued(self, prompt: str, submitted: float):
+        """Run a batch prompt on a worker thread, counting the time it waited for the worker as queue time."""
+        token = enqueued_at.set(submitted)
+        try:
+            return self.run_agent(prompt)
+        finally:
+            enqueued_at.reset(token)
+
+
+    @staticmethod
+    def _batch_result(future):
+        """Return a batch item's response, or the exception it raised so the batch keeps going."""
+        try:
+            return future.result()
+        except Exception as e:
+            return e
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCacheTier:
+    """Bounded in-memory LRU tier with a per-entry time to live."""
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return the cached value for a key, or None if it is missing or expired."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        """Store a value, evicting the least recently used entries past max_entries."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """Local on-disk tier stored in an SQLite file, surviving process restarts."""
+    def __init__(self, path: str, ttl: float = None):
+        self.path = path
+        self.ttl = ttl
+        self.evictions = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._connection.commit()
+
+    def get(self, key: str):
+        """Return the cached value for a key, or None if it is missing or expired."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self._connection.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._connection.commit()
+                self.evictions += 1
+                return None
+        return pickle.loads(value)
+
+    def set(self, key: str, value) -> None:
+        """Store a value, replacing any previous entry for the key."""
+        expires_at = time.time() + self.ttl if self.ttl else None
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            self._connection.commit()
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._connection.execute("DELETE FROM response_cache")
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+class ResponseCache:
+    """
+    Opt-in response cache for Agent model calls (see Agent's response_cache).
+
+    Lookups go to a bounded in-memory LRU first, then to an optional SQLite file.
+    Only deterministic calls (temperature 0) are cached unless allow_nondeterministic
+    is set; the others are counted as bypassed. The counters are updated under a lock,
+    so one cache can serve concurrent calls. The disk tier stores pickled responses,
+    so only point it at a trusted path.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, disk_path: str = None, allow_nondeterministic: bool = False):
+        self.memory_tier = MemoryCacheTier(max_entries, ttl)
+        self.disk_tier = SQLiteCacheTier(disk_path, ttl) if disk_path else None
+        self.allow_nondeterministic = allow_nondeterministic
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.disk_hits = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, instructions: str, prompt, **params) -> str:
+        """Build the cache key covering the model, instructions, prompt and sampling parameters."""
+        payload = json.dumps(
+            {'model': model_name, 'instructions': instructions, 'prompt': prompt, 'params': params},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def accepts(self, temperature: float) -> bool:
+        """Return True if a call with this temperature may be served from the cache."""
+        return self.allow_nondeterministic or not temperature
+
+    def bypass(self) -> None:
+        """Count a call that could not be served from the cache, e.g. a streamed or non-deterministic one."""
+        with self._lock:
+            self.bypassed += 1
+
+    def get(self, key: str):
+        """Return the cached response for a key, or None on a miss."""
+        value = self.memory_tier.get(key)
+        from_disk = False
+        if value is None and self.disk_tier is not None:
+            value = self.disk_tier.get(key)
+            if value is not None:
+                from_disk = True
+                self.memory_tier.set(key, value)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += from_disk
+        return value
+
+    def set(self, key: str, value) -> None:
+        """Store a response in every tier."""
+        self.memory_tier.set(key, value)
+        if self.disk_tier is not None:
+            self.disk_tier.set(key, value)
+
+    def clear(self) -> None:
+        """Remove every cached response from every tier."""
+        self.memory_tier.clear()
+        if self.disk_tier is not None:
+            self.disk_tier.clear()
+
+    def stats(self) -> dict:
+        """Return the hit, miss, bypass and eviction counters."""
+        evictions = self.memory_tier.evictions
+        if self.disk_tier is not None:
+            evictions += self.disk_tier.evictions
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'disk_hits': self.disk_hits,
+                'evictions': evictions,
+                'size': len(self.memory_tier),
+            }
@@ -0,0 +1,170 @@
+import threading
+import weakref
+
+
+CLIENT_SETTINGS = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 30.0,
+    "timeout": 600.0,
+    "connect_timeout": 5.0,
+    # Retries are handled by the rate limit scheduler (see adoptagentai.core.scheduler), which
+    # paces them across every agent of the account instead of retrying each call on its own
+    "max_retries": 0,
+}
+
+_clients = {}
+# Async clients keep their connections on the event loop they run on, so each loop gets its own
+_loop_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def configure_clients(**settings) -> dict:
+    """
+    Updates the connection pool settings used for newly built OpenAI clients.
+
+    Clients that were already built keep their settings; call close_clients() first
+    to rebuild them with the new values.
+
+    Args:
+        **settings: Any of the keys of CLIENT_SETTINGS.
+
+    Returns:
+        dict: The settings now in effect.
+
+    Raises:
+        ValueError: If an unknown setting is given.
+    """
+    unknown = set(settings) - set(CLIENT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown client settings: {', '.join(sorted(unknown))}")
+
+    with _clients_lock:
+        CLIENT_SETTINGS.update(settings)
+        return dict(CLIENT_SETTINGS)
+
+
+def _client_key(credentials: dict, account_name: str, asynchronous: bool) -> tuple:
+    """Builds the registry key identifying one client per credentials and account."""
+    return (
+        credentials.get("api_key"),
+        credentials.get("base_url"),
+        credentials.get("organization"),
+        account_name.upper() if account_name else None,
+        asynchronous,
+    )
+
+
+def _build_client(credentials: dict, asynchronous: bool):
+    """Builds an OpenAI client with a keep-alive connection pool sized by CLIENT_SETTINGS."""
+    # Imported here so that importing adoptagentai doesn't pay for the openai SDK until a client is needed
+    import httpx
+    import openai
+
+    limits = httpx.Limits(
+        max_connections=CLIENT_SETTINGS["max_connections"],
+        max_keepalive_connections=CLIENT_SETTINGS["max_keepalive_connections"],
+        keepalive_expiry=CLIENT_SETTINGS["keepalive_expiry"],
+    )
+    timeout = httpx.Timeout(CLIENT_SETTINGS["timeout"], connect=CLIENT_SETTINGS["connect_timeout"])
+
+    if asynchronous:
+        client_class, http_client = openai.AsyncOpenAI, openai.DefaultAsyncHttpxClient(limits=limits, timeout=timeout)
+    else:
+        client_class, http_client = openai.OpenAI, openai.DefaultHttpxClient(limits=limits, timeout=timeout)
+
+    return client_class(
+        api_key=credentials.get("api_key"),
+        base_url=credentials.get("base_url"),
+        organization=credentials.get("organization"),
+        timeout=timeout,
+        max_retries=CLIENT_SETTINGS["max_retries"],
+        http_client=http_client,
+    )
+
+
+def _registry(asynchronous: bool) -> dict:
+    """Returns the clients shared in this context: the sync ones, or the async ones of the running loop (None outside a loop)."""
+    if not asynchronous:
+        return _clients
+    import asyncio
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    registry = _loop_clients.get(loop)
+    if registry is None:
+        with _clients_lock:
+            registry = _loop_clients.setdefault(loop, {})
+    return registry
+
+
+def get_openai_client(credentials: dict, account_name: str = None, asynchronous: bool = False):
+    """
+    Returns the shared OpenAI client for a set of credentials, building it on first use.
+
+    Clients are shared across agents so concurrent calls on the same account reuse warm
+    connections, and no call ever touches the module-global openai.api_key. Async clients
+    are shared per running event loop, since their connections can't outlive it; outside
+    a running loop a new async client is returned, owned by the caller.
+
+    Args:
+        credentials (dict): Credentials as returned by get_api_credentials, optionally with a "base_url".
+        account_name (str, optional): The account the credentials belong to.
+        asynchronous (bool, optional): Return an AsyncOpenAI client. Defaults to False.
+
+    Returns:
+        openai.OpenAI | openai.AsyncOpenAI: The pooled client.
+    """
+    registry = _registry(asynchronous)
+    if registry is None:
+        return _build_client(credentials, asynchronous)
+
+    key = _client_key(credentials, account_name, asynchronous)
+    client = registry.get(key)
+    if client is None:
+        with _clients_lock:
+            client = registry.get(key)
+            if client is None:
+                client = _build_client(credentials, asynchronous)
+                registry[key] = client
+    return client
+
+
+def close_clients() -> None:
+    """
+    Closes the pooled clients and empties the registry.
+
+    Async clients are closed on their own event loop: right away when the loop is idle,
+    scheduled on it when it is running. Those of closed loops are only dropped, as their
+    connections can't be closed from another loop.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        loops = list(_loop_clients.items())
+        _loop_clients.clear()
+
+    for client in clients:
+        client.close()
+    for loop, registry in loops:
+        if loop.is_closed():
+            continue
+        for client in registry.values():
+            if loop.is_running():
+                import asyncio
+
+                asyncio.run_coroutine_threadsafe(client.close(), loop)
+            else:
+                loop.run_until_complete(client.close())
+
+
+async def aclose_clients() -> None:
+    """Closes the async clients of the running event loop and removes them from the registry."""
+    import asyncio
+
+    with _clients_lock:
+        registry = _loop_clients.pop(asyncio.get_running_loop(), {})
+    for client in registry.values():
+        await client.close()
@@ -0,0 +1,152 @@
+import re
+import zlib
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _require_numpy():
+    """Raise a helpful error when the optional numpy dependency is missing."""
+    if np is None:
+        raise ImportError("Vector memory retrieval requires numpy: pip install 'adoptagentai[vector]'")
+
+
+@lru_cache(maxsize=65536)
+def _hash_token(token: str, dim: int) -> tuple:
+    """Map a token to a stable (dimension, sign) pair, independent of PYTHONHASHSEED."""
+    digest = zlib.crc32(token.encode("utf-8"))
+    return digest % dim, 1.0 if digest & 0x80000000 else -1.0
+
+
+class HashingEmbedder:
+    """Offline bag-of-words embedder that hashes tokens into a fixed number of dimensions."""
+    def __init__(self, dim: int = 128):
+        _require_numpy()
+        self.dim = dim
+
+    def embed(self, texts) -> "np.ndarray":
+        """Return one L2-normalized float32 row per text."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN_PATTERN.findall(text.lower()):
+                column, sign = _hash_token(token, self.dim)
+                vectors[row, column] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class VectorIndex:
+    """
+    Cosine similarity index over memory entries.
+
+    Embeddings live in one contiguous float32 matrix that grows by doubling, so a
+    search is a single matrix product followed by a partial sort. The matrix is
+    stored one row per dimension: sparse queries, such as those of the hashing
+    embedder, only read the rows of their non-zero dimensions. Any embedder with a
+    `dim` attribute and an `embed(texts)` method returning an (n, dim) array works.
+    """
+    def __init__(self, embedder=None, initial_capacity: int = 1024):
+        _require_numpy()
+        self.embedder = embedder if embedder is not None else HashingEmbedder()
+        self.dim = self.embedder.dim
+        self._matrix = np.zeros((self.dim, initial_capacity), dtype=np.float32)
+        self._keys = np.zeros(initial_capacity, dtype=np.int64)
+        self._positions = {}
+        self._size = 0
+
+    def add(self, key: int, text: str) -> None:
+        """Index one text under an integer key, replacing any previous vector for the key."""
+        self.add_many([key], [text])
+
+    def add_many(self, keys, texts) -> None:
+        """Embed and index many texts in one batch."""
+        keys = list(keys)
+        if not keys:
+            return
+        vectors = self._normalize(np.asarray(self.embedder.embed(list(texts)), dtype=np.float32))
+
+        for key, vector in zip(keys, vectors):
+            position = self._positions.get(key)
+            if position is None:
+                if self._size == self._matrix.shape[1]:
+                    self._grow()
+                position = self._size
+                self._positions[key] = position
+                self._keys[position] = key
+                self._size += 1
+            self._matrix[:, position] = vector
+
+    def remove(self, keys) -> None:
+        """Drop the vectors of the given keys, moving the last row into each freed slot."""
+        for key in keys:
+            position = self._positions.pop(key, None)
+            if position is None:
+                continue
+            last = self._size - 1
+            if position != last:
+                moved_key = int(self._keys[last])
+                self._matrix[:, position] = self._matrix[:, last]
+                self._keys[position] = moved_key
+                self._positions[moved_key] = position
+            self._size = last
+
+    def clear(self) -> None:
+        """Drop every vector."""
+        self._positions = {}
+        self._size = 0
+
+    def search(self, query: str, k: int = 5) -> list:
+        """Return up to k (key, score) pairs most similar to the query, best first."""
+        return self.search_many([query], k)[0]
+
+    def search_many(self, queries, k: int = 5) -> list:
+        """Run a batch of queries with one matrix product and return a list of results per query."""
+        queries = list(queries)
+        if not self._size or k <= 0:
+            return [[] for _ in queries]
+
+        query_vectors = self._normalize(np.asarray(self.embedder.embed(queries), dtype=np.float32))
+        active = np.flatnonzero(query_vectors.any(axis=0))
+        if len(active) * 2 < self.dim:
+            scores = query_vectors[:, active] @ self._matrix[active, :self._size]
+        else:
+            scores = query_vectors @ self._matrix[:, :self._size]
+        k = min(k, self._size)
+
+        if k < self._size:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self._size), (len(queries), self._size))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        keys = self._keys[top]
+        return [
+            [(int(key), float(score)) for key, score in zip(row_keys, row_scores)]
+            for row_keys, row_scores in zip(keys, top_scores)
+        ]
+
+    def _grow(self) -> None:
+        capacity = max(1, self._matrix.shape[1] * 2)
+        matrix = np.zeros((self.dim, capacity), dtype=np.float32)
+        matrix[:, :self._size] = self._matrix[:, :self._size]
+        keys = np.zeros(capacity, dtype=np.int64)
+        keys[:self._size] = self._keys[:self._size]
+        self._matrix, self._keys = matrix, keys
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def __len__(self):
+        return self._size
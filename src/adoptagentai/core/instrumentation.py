@@ -0,0 +1,228 @@
+import bisect
+import threading
+from contextvars import ContextVar
+
+
+# Set by the batch runners to the time a prompt was submitted, so the wait for a worker counts as queue time
+enqueued_at = ContextVar("adoptagentai_enqueued_at", default=None)
+# Set by the scheduler when it lets a call through, so throttling waits and retries count as queue time
+dispatched_at = ContextVar("adoptagentai_dispatched_at", default=None)
+dispatched_account = ContextVar("adoptagentai_dispatched_account", default=None)
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LATENCY_METRICS = ('queue_time', 'network_time', 'total_latency', 'time_to_first_token')
+TOKEN_METRICS = ('input_tokens', 'output_tokens', 'cached_tokens')
+
+
+class CallRecord:
+    """One model call as seen by the agent: who ran it, how long each phase took and what it consumed."""
+    __slots__ = ('agent', 'model', 'account', 'strategy', 'started_at', 'queue_time', 'network_time',
+                 'total_latency', 'time_to_first_token', 'input_tokens', 'output_tokens', 'cached_tokens',
+                 'error', 'streamed')
+
+    def __init__(self, agent: str, model: str, account: str, strategy: str, started_at: float,
+                 queue_time: float, network_time: float, total_latency: float, time_to_first_token: float = None,
+                 input_tokens: int = None, output_tokens: int = None, cached_tokens: int = None,
+                 error: str = None, streamed: bool = False):
+        self.agent = agent
+        self.model = model
+        self.account = account
+        self.strategy = strategy
+        self.started_at = started_at
+        self.queue_time = queue_time
+        self.network_time = network_time
+        self.total_latency = total_latency
+        self.time_to_first_token = time_to_first_token
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cached_tokens = cached_tokens
+        self.error = error
+        self.streamed = streamed
+
+    def as_dict(self) -> dict:
+        """Return the record as a plain dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"CallRecord(model={self.model!r}, total_latency={self.total_latency:.4f}, error={self.error!r})"
+
+
+def response_usage(response) -> tuple:
+    """
+    Extracts the token usage reported by a Responses API response.
+
+    Args:
+        response: The response, or the final event of a stream.
+
+    Returns:
+        tuple: (input_tokens, output_tokens, cached_tokens), None for any value the response doesn't report.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        usage = getattr(getattr(response, "response", None), "usage", None)
+    details = getattr(usage, "input_tokens_details", None)
+    values = (
+        getattr(usage, "input_tokens", None),
+        getattr(usage, "output_tokens", None),
+        getattr(details, "cached_tokens", None),
+    )
+    return tuple(value if isinstance(value, int) else None for value in values)
+
+
+class _Histogram:
+    """Per-bucket counts of one latency metric with a running sum."""
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.count = 0
+        self.total = 0.0
+
+
+class HistogramSink:
+    """
+    In-memory sink aggregating call records per model.
+
+    Latencies go into fixed buckets (so memory stays constant however many calls
+    are recorded), tokens and errors into counters.
+    """
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._tokens = {}
+        self._calls = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, record: CallRecord) -> None:
+        """Add one call record to the aggregates."""
+        with self._lock:
+            self._calls[record.model] = self._calls.get(record.model, 0) + 1
+            if record.error is not None:
+                key = (record.model, record.error)
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+            for metric in LATENCY_METRICS:
+                value = getattr(record, metric)
+                if value is None:
+                    continue
+                histogram = self._histograms.get((record.model, metric))
+                if histogram is None:
+                    histogram = self._histograms[(record.model, metric)] = _Histogram(len(self.buckets) + 1)
+                histogram.counts[bisect.bisect_left(self.buckets, value)] += 1
+                histogram.count += 1
+                histogram.total += value
+
+            for metric in TOKEN_METRICS:
+                value = getattr(record, metric)
+                if value:
+                    key = (record.model, metric)
+                    self._tokens[key] = self._tokens.get(key, 0) + value
+
+    def quantile(self, q: float, model: str, metric: str = 'total_latency') -> float:
+        """
+        Estimates a latency quantile from the buckets.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+            model (str): The model to look at.
+            metric (str, optional): One of LATENCY_METRICS. Defaults to 'total_latency'.
+
+        Returns:
+            float: The upper bound of the bucket holding the quantile, or None if nothing was recorded.
+        """
+        with self._lock:
+            histogram = self._histograms.get((model, metric))
+            if histogram is None or not histogram.count:
+                return None
+            rank = q * histogram.count
+            seen = 0
+            for index, count in enumerate(histogram.counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        """Return a copy of every aggregate, keyed by model."""
+        with self._lock:
+            snapshot = {}
+            for model, calls in self._calls.items():
+                snapshot[model] = {'calls': calls, 'errors': {}, 'tokens': {}, 'latency': {}}
+            for (model, error), count in self._errors.items():
+                snapshot[model]['errors'][error] = count
+            for (model, metric), count in self._tokens.items():
+                snapshot[model]['tokens'][metric] = count
+            for (model, metric), histogram in self._histograms.items():
+                snapshot[model]['latency'][metric] = {
+                    'buckets': dict(zip(self.buckets + (float("inf"),), histogram.counts)),
+                    'count': histogram.count,
+                    'sum': histogram.total,
+                }
+            return snapshot
+
+    def reset(self) -> None:
+        """Forget every recorded call."""
+        with self._lock:
+            self._histograms.clear()
+            self._tokens.clear()
+            self._calls.clear()
+            self._errors.clear()
+
+
+def _label(value) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class PrometheusSink(HistogramSink):
+    """Histogram sink that can render its aggregates in the Prometheus text exposition format."""
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS, namespace: str = "adoptagentai"):
+        super().__init__(buckets)
+        self.namespace = namespace
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format (version 0.0.4)."""
+        prefix = self.namespace
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_calls_total counter"]
+        for model, stats in snapshot.items():
+            lines.append(f'{prefix}_calls_total{{model="{_label(model)}"}} {stats["calls"]}')
+
+        lines.append(f"# TYPE {prefix}_errors_total counter")
+        for model, stats in snapshot.items():
+            for error, count in stats['errors'].items():
+                lines.append(f'{prefix}_errors_total{{model="{_label(model)}",error="{_label(error)}"}} {count}')
+
+        lines.append(f"# TYPE {prefix}_tokens_total counter")
+        for model, stats in snapshot.items():
+            for metric, count in stats['tokens'].items():
+                kind = metric[:-len("_tokens")]
+                lines.append(f'{prefix}_tokens_total{{model="{_label(model)}",kind="{kind}"}} {count}')
+
+        for metric in LATENCY_METRICS:
+            name = f"{prefix}_{metric}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for model, stats in snapshot.items():
+                histogram = stats['latency'].get(metric)
+                if histogram is None:
+                    continue
+                cumulative = 0
+                for bound, count in histogram['buckets'].items():
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f'{name}_bucket{{model="{_label(model)}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{model="{_label(model)}"}} {histogram["sum"]}')
+                lines.append(f'{name}_count{{model="{_label(model)}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+class CallbackSink:
+    """Sink handing every call record to a callable, e.g. to forward it to a tracing or logging system."""
+    def __init__(self, callback):
+        self.callback = callback
+
+    def record(self, record: CallRecord) -> None:
+        """Pass the record to the callback."""
+        self.callback(record)
@@ -0,0 +1,530 @@
+import atexit
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+
+def _local_time(timestamp: datetime) -> datetime:
+    """Convert a timezone-aware datetime to naive local time, the form every index compares."""
+    if timestamp is not None and timestamp.tzinfo is not None:
+        return timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+
+class MemoryEntry:
+    """
+    Compact memory record that can still be used like the legacy memory dicts.
+
+    Item assignment on an entry held by a MemoryStore goes through the store, so its
+    indexes and backend follow the change. Timezone-aware timestamps are stored as
+    naive local time, so entries of either kind can be compared.
+    """
+    __slots__ = ('id', 'data', 'category', 'timestamp', '_store')
+    _FIELDS = ('data', 'category', 'timestamp')
+
+    def __init__(self, data: str, category: str = None, timestamp: datetime = None, id: int = None):
+        self.id = id
+        self.data = data
+        self.category = category
+        self.timestamp = _local_time(timestamp) if timestamp is not None else datetime.now()
+        self._store = None
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> "MemoryEntry":
+        """Build an entry from a legacy memory dict."""
+        return cls(entry['data'], entry.get('category'), entry.get('timestamp'))
+
+    def to_dict(self) -> dict:
+        """Return the entry as a legacy memory dict."""
+        return {'data': self.data, 'category': self.category, 'timestamp': self.timestamp}
+
+    def keys(self):
+        return self._FIELDS
+
+    def values(self):
+        return [getattr(self, key) for key in self._FIELDS]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self._FIELDS]
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._FIELDS else default
+
+    def __getitem__(self, key: str):
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        if self._store is not None:
+            self._store.update(self, **{key: value})
+        else:
+            setattr(self, key, _local_time(value) if key == 'timestamp' else value)
+
+    def __contains__(self, key) -> bool:
+        return key in self._FIELDS
+
+    def __iter__(self):
+        return iter(self._FIELDS)
+
+    def __len__(self):
+        return len(self._FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, MemoryEntry):
+            return (self.data, self.category, self.timestamp) == (other.data, other.category, other.timestamp)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"MemoryEntry(data={self.data!r}, category={self.category!r}, timestamp={self.timestamp!r})"
+
+
+Mapping.register(MemoryEntry)
+
+
+class _TimeIndex:
+    """Entry ids kept sorted by timestamp, so range and latest-K queries are binary searches."""
+    __slots__ = ('times', 'ids')
+
+    def __init__(self):
+        self.times = []
+        self.ids = []
+
+    def add(self, timestamp: datetime, entry_id: int) -> None:
+        # Entries almost always arrive in time order, which keeps this an append
+        if not self.times or timestamp >= self.times[-1]:
+            self.times.append(timestamp)
+            self.ids.append(entry_id)
+        else:
+            position = bisect_right(self.times, timestamp)
+            self.times.insert(position, timestamp)
+            self.ids.insert(position, entry_id)
+
+    def remove(self, timestamp: datetime, entry_id: int) -> None:
+        low = bisect_left(self.times, timestamp)
+        position = self.ids.index(entry_id, low, bisect_right(self.times, timestamp))
+        del self.times[position]
+        del self.ids[position]
+
+    def between(self, start: datetime = None, end: datetime = None) -> list:
+        low = bisect_left(self.times, start) if start is not None else 0
+        high = bisect_right(self.times, end) if end is not None else len(self.times)
+        return self.ids[low:high]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class MemoryStore:
+    """
+    Agent memory indexed by category and by timestamp.
+
+    Category lookups, category clears and time-range queries use the indexes instead
+    of scanning every entry. The store iterates, indexes, appends and compares like
+    the list of memory dicts it replaces.
+
+    With a backend, new entries are written through to it and existing history is
+    paged in lazily: a category is loaded the first time it is read, and time-range
+    or latest-K queries on unloaded data only fetch the matching rows.
+
+    A reentrant lock guards the indexes, so agents and tools running in several
+    threads can add and retrieve entries at the same time.
+    """
+    def __init__(self, entries=None, backend=None):
+        self._entries = {}
+        self._categories = {}
+        self._timeline = _TimeIndex()
+        # Ids of cleared entries that the timeline still holds until its next rebuild
+        self._stale = set()
+        self._next_id = 0
+        self._backend = backend
+        self._loaded_categories = set()
+        self._fully_loaded = backend is None
+        self._lock = threading.RLock()
+        for entry in entries or []:
+            self.add_entry(entry if isinstance(entry, MemoryEntry) else MemoryEntry.from_dict(entry))
+
+    def add(self, data: str, category: str = None, timestamp: datetime = None) -> MemoryEntry:
+        """Create, index and return a new entry."""
+        return self.add_entry(MemoryEntry(data, category, timestamp))
+
+    def add_entry(self, entry: MemoryEntry) -> MemoryEntry:
+        """Index an existing entry, assigning it an id if it has none."""
+        with self._lock:
+            if entry.id is None and self._backend is not None:
+                entry.id = self._backend.append(entry)
+            return self._index(entry)
+
+    def append(self, entry) -> None:
+        """Add an entry or a legacy memory dict, like list.append."""
+        self.add_entry(entry if isinstance(entry, MemoryEntry) else MemoryEntry.from_dict(entry))
+
+    def update(self, entry: MemoryEntry, **fields) -> MemoryEntry:
+        """Change the data, category or timestamp of an entry, keeping the indexes and the backend in sync."""
+        if 'timestamp' in fields:
+            fields['timestamp'] = _local_time(fields['timestamp'])
+        with self._lock:
+            indexed = self._entries.get(entry.id) is entry
+            if indexed:
+                self._timeline.remove(entry.timestamp, entry.id)
+                category_index = self._categories[entry.category]
+                category_index.remove(entry.timestamp, entry.id)
+                if not len(category_index):
+                    del self._categories[entry.category]
+            for name, value in fields.items():
+                setattr(entry, name, value)
+            if indexed:
+                self._index(entry)
+                if self._backend is not None:
+                    self._backend.update(entry)
+            return entry
+
+    def _index(self, entry: MemoryEntry) -> MemoryEntry:
+        """Add an entry to the in-memory indexes."""
+        if entry.id is None:
+            entry.id = self._next_id
+        self._next_id = max(self._next_id, entry.id + 1)
+
+        if entry.id in self._stale:
+            # A backend reused the id of a cleared entry, whose stale timeline slot must go first
+            self._rebuild_timeline()
+        entry._store = self
+        self._entries[entry.id] = entry
+        self._timeline.add(entry.timestamp, entry.id)
+        category_index = self._categories.get(entry.category)
+        if category_index is None:
+            category_index = self._categories[entry.category] = _TimeIndex()
+        category_index.add(entry.timestamp, entry.id)
+        return entry
+
+    def retrieve(self, category: str = None, since=None, until: datetime = None, limit: int = None) -> list:
+        """
+        Return entries, optionally filtered by category and time range.
+
+        Args:
+            category (str, optional): Only return entries of this category.
+            since (datetime | timedelta, optional): Oldest timestamp to return, or how far back to look.
+            until (datetime, optional): Newest timestamp to return.
+            limit (int, optional): Only return the latest `limit` matching entries.
+
+        Returns:
+            list: Matching entries, oldest first.
+        """
+        if isinstance(since, timedelta):
+            since = datetime.now() - since
+        since, until = _local_time(since), _local_time(until)
+
+        with self._lock:
+            return self._retrieve(category, since, until, limit)
+
+    def _retrieve(self, category: str, since: datetime, until: datetime, limit: int) -> list:
+        """Run a query under the store lock."""
+        paged = self._page_in(category, since, until, limit)
+        if paged is not None:
+            return paged
+
+        if category is not None:
+            index = self._categories.get(category)
+            if index is None:
+                return []
+            ids = index.between(since, until)
+            if limit is not None:
+                ids = ids[-limit:] if limit > 0 else []
+            return [self._entries[entry_id] for entry_id in ids]
+
+        # The timeline may still hold ids of cleared entries, which are skipped here
+        ids = self._timeline.between(since, until)
+        if limit is None:
+            return [self._entries[entry_id] for entry_id in ids if entry_id in self._entries]
+
+        latest = []
+        for entry_id in reversed(ids):
+            if len(latest) >= limit:
+                break
+            entry = self._entries.get(entry_id)
+            if entry is not None:
+                latest.append(entry)
+        latest.reverse()
+        return latest
+
+    def get(self, entry_id: int) -> MemoryEntry:
+        """Return the loaded entry with this id, or None."""
+        return self._entries.get(entry_id)
+
+    def clear(self, category: str = None) -> list:
+        """Remove all entries, or only those of one category, and return the removed ids."""
+        with self._lock:
+            return self._clear(category)
+
+    def _clear(self, category: str) -> list:
+        """Clear entries under the store lock."""
+        if self._backend is not None:
+            self._backend.delete(category)
+            if category is None:
+                self._fully_loaded = True
+            else:
+                self._loaded_categories.add(category)
+
+        if category is None:
+            removed = list(self._entries)
+            self._entries = {}
+            self._categories = {}
+            self._timeline = _TimeIndex()
+            self._stale = set()
+            return removed
+
+        index = self._categories.pop(category, None)
+        if index is None:
+            return []
+        for entry_id in index.ids:
+            del self._entries[entry_id]
+
+        self._stale.update(index.ids)
+        if len(self._stale) > len(self._entries):
+            self._rebuild_timeline()
+        return list(index.ids)
+
+    def categories(self) -> list:
+        """Return the categories currently holding entries."""
+        with self._lock:
+            self._load_all()
+            return list(self._categories)
+
+    def _page_in(self, category: str, since: datetime, until: datetime, limit: int):
+        """Fetch not yet loaded entries matching a query from the backend, or return None if all are in memory."""
+        if self._fully_loaded or category in self._loaded_categories:
+            return None
+
+        entries = []
+        for entry in self._backend.load(category, since, until, limit):
+            loaded = self._entries.get(entry.id)
+            entries.append(loaded if loaded is not None else self._index(entry))
+
+        if since is None and until is None and limit is None:
+            if category is None:
+                self._fully_loaded = True
+            else:
+                self._loaded_categories.add(category)
+        return entries
+
+    def _load_all(self) -> None:
+        """Page the whole backend history into memory."""
+        if not self._fully_loaded:
+            self._page_in(None, None, None, None)
+
+    def _rebuild_timeline(self) -> None:
+        """Drop the ids of cleared entries from the timeline."""
+        timeline = _TimeIndex()
+        for timestamp, entry_id in zip(self._timeline.times, self._timeline.ids):
+            if entry_id in self._entries:
+                timeline.times.append(timestamp)
+                timeline.ids.append(entry_id)
+        self._timeline = timeline
+        self._stale = set()
+
+    def __len__(self):
+        with self._lock:
+            if not self._fully_loaded:
+                return self._backend.count()
+            return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.retrieve())
+
+    def __getitem__(self, index):
+        with self._lock:
+            self._load_all()
+            if self._stale:
+                self._rebuild_timeline()
+            ids = self._timeline.ids[index]
+            if isinstance(index, slice):
+                return [self._entries[entry_id] for entry_id in ids]
+            return self._entries[ids]
+
+    def __eq__(self, other):
+        if isinstance(other, (MemoryStore, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"MemoryStore({len(self)} entries, categories={self.categories()!r})"
+
+
+def _to_micros(timestamp: datetime) -> int:
+    """Convert a datetime to integer microseconds since the epoch, without float rounding."""
+    return int(timestamp.replace(microsecond=0).timestamp()) * 1_000_000 + timestamp.microsecond
+
+
+def _from_micros(micros: int) -> datetime:
+    """Convert integer microseconds since the epoch back to a local datetime."""
+    seconds, microsecond = divmod(micros, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=microsecond)
+
+
+class SQLiteMemoryBackend:
+    """
+    Durable memory backend stored in an SQLite file.
+
+    Entries are written as they are added, but only committed (and synced to disk)
+    every `sync_every` entries or at most `sync_interval` seconds after the first
+    pending one, so high-rate writers don't pay one disk sync per entry. A timer
+    commits what an idle writer left pending. Call flush() or close() to commit pending
+    writes right away; pending writes are also flushed at interpreter exit.
+    """
+    def __init__(self, path: str, sync_every: int = 100, sync_interval: float = 1.0, page_size: int = 1000):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.page_size = page_size
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._timer = None
+        self._lock = threading.Lock()
+
+        import sqlite3
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        # AUTOINCREMENT keeps SQLite from handing out the ids of deleted rows again
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS memory (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL, category TEXT, timestamp INTEGER NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS memory_timestamp ON memory (timestamp)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS memory_category_timestamp ON memory (category, timestamp)")
+        self._connection.commit()
+        atexit.register(self.flush)
+
+    def append(self, entry: MemoryEntry) -> int:
+        """Write an entry and return its id, committing once a batch is due."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO memory (data, category, timestamp) VALUES (?, ?, ?)",
+                (entry.data, entry.category, _to_micros(entry.timestamp)),
+            )
+            self._written()
+            return cursor.lastrowid
+
+    def update(self, entry: MemoryEntry) -> None:
+        """Rewrite a stored entry, committed with the next batch."""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE memory SET data = ?, category = ?, timestamp = ? WHERE id = ?",
+                (entry.data, entry.category, _to_micros(entry.timestamp), entry.id),
+            )
+            self._written()
+
+    def load(self, category: str = None, since: datetime = None, until: datetime = None, limit: int = None):
+        """
+        Yield stored entries oldest first, fetched page by page.
+
+        Args:
+            category (str, optional): Only load entries of this category.
+            since (datetime, optional): Oldest timestamp to load.
+            until (datetime, optional): Newest timestamp to load.
+            limit (int, optional): Only load the latest `limit` matching entries.
+        """
+        clauses, params = [], []
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_to_micros(since))
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(_to_micros(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        columns = "SELECT id, data, category, timestamp FROM memory"
+        if limit is not None:
+            query = f"SELECT * FROM ({columns}{where} ORDER BY timestamp DESC, id DESC LIMIT ?) ORDER BY timestamp, id"
+            with self._lock:
+                rows = self._connection.execute(query, params + [limit]).fetchall()
+            yield from self._to_entries(rows)
+            return
+
+        # Keyset pagination: each page is its own short query, so no lock is held while the caller iterates
+        page_clause = "(timestamp, id) > (?, ?)"
+        page_where = f"{where} AND {page_clause}" if where else f" WHERE {page_clause}"
+        last = (-2 ** 63, -1)
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    f"{columns}{page_where} ORDER BY timestamp, id LIMIT ?",
+                    params + [last[0], last[1], self.page_size],
+                ).fetchall()
+            yield from self._to_entries(rows)
+            if len(rows) < self.page_size:
+                return
+            last = (rows[-1][3], rows[-1][0])
+
+    @staticmethod
+    def _to_entries(rows):
+        for entry_id, data, category, timestamp in rows:
+            yield MemoryEntry(data, category, _from_micros(timestamp), entry_id)
+
+    def delete(self, category: str = None) -> None:
+        """Delete all entries, or only those of one category."""
+        with self._lock:
+            if category is None:
+                self._connection.execute("DELETE FROM memory")
+            else:
+                self._connection.execute("DELETE FROM memory WHERE category = ?", (category,))
+            self._commit()
+
+    def count(self) -> int:
+        """Return the number of stored entries."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def flush(self) -> None:
+        """Commit pending writes to disk."""
+        with self._lock:
+            if self._pending:
+                self._commit()
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        self.flush()
+        atexit.unregister(self.flush)
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._connection.close()
+
+    def _written(self) -> None:
+        """Count a pending write, committing once a batch is due or else making sure the timer will."""
+        self._pending += 1
+        if self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self._commit()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.sync_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self) -> None:
+        """Commit the writes still pending when the sync interval has passed."""
+        with self._lock:
+            self._timer = None
+            if self._pending:
+                self._commit()
+
+    def _commit(self) -> None:
+        self._connection.commit()
+        self._pending = 0
+        self._last_sync = time.monotonic()
@@ -1,16 +1,125 @@
-import openai
+from adoptagentai.core.clients import get_openai_client
+from adoptagentai.utils.api_keys import register_api
+
+
+GPT_4O_INSTRUCTIONS = "You are a helpful assistant that provides information about the topic."
+GPT_4O_MINI_INSTRUCTIONS = "You are a helpful assistant that provides concise and accurate information."
+
+GPT_4O_TEMPERATURE = 0.7
+GPT_4O_MINI_TEMPERATURE = 0.5
+
+STRATEGY_ENTRY_POINT_GROUP = "adoptagentai.strategies"
+
+_STRATEGIES = {}
+_entry_points_loaded = False
+
+
+def register_strategy(model_name, asynchronous=False, requirements=None, instructions=None, temperature=None):
+    """
+    Decorator registering a strategy for a model name.
+
+    The instructions and temperature the strategy sends by default are recorded so that
+    callers can build its response cache keys without calling it.
+
+    The strategy serves the exact model name and any dated or suffixed variant of it
+    ("gpt-4o" also serves "gpt-4o-2024-08-06"), unless a longer registered name matches.
+    Third-party packages can register strategies from a module listed under the
+    "adoptagentai.strategies" entry point group; it is imported on the first lookup.
+    """
+    def decorator(strategy):
+        entry = _STRATEGIES.setdefault(model_name.lower(), {})
+        entry["async" if asynchronous else "sync"] = strategy
+        if instructions is not None:
+            entry["instructions"] = instructions
+        if temperature is not None:
+            entry["temperature"] = temperature
+        if requirements is not None:
+            register_api(model_name, requirements)
+        return strategy
+    return decorator
+
+
+def _load_entry_points():
+    """ Import the strategy modules advertised by installed packages, once. """
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=STRATEGY_ENTRY_POINT_GROUP):
+        entry_point.load()
+
+
+def resolve_model(model_name):
+    """ Return the registered model name serving a model: an exact match, else the longest registered prefix, or None. """
+    _load_entry_points()
+    model_name = model_name.lower()
+    if model_name in _STRATEGIES:
+        return model_name
+    matches = [name for name in _STRATEGIES if model_name.startswith(f"{name}-")]
+    return max(matches, key=len) if matches else None
+
+
+def _resolve_entry(model_name):
+    """ Return the registry entry for a model, or None. """
+    name = resolve_model(model_name)
+    return _STRATEGIES[name] if name is not None else None
+
+
+def resolve_strategy(model_name, asynchronous=False):
+    """ Return the strategy serving a model, or None if no strategy is registered for it. """
+    entry = _resolve_entry(model_name)
+    return entry.get("async" if asynchronous else "sync") if entry else None
+
+
+def resolve_instructions(model_name):
+    """ Return the instructions the strategy serving a model sends, or an empty string. """
+    entry = _resolve_entry(model_name)
+    return entry.get("instructions", "") if entry else ""
+
+
+def response_cache_key(cache, model_name, prompt, options):
+    """
+    Return the response cache key of a call to the strategy serving a model, or None if it must not be cached.
+
+    Agent looks responses up with this key before a call takes a rate limit slot; strategies
+    themselves never read or write the cache.
+    """
+    if cache is None:
+        return None
+    entry = _resolve_entry(model_name) or {}
+    temperature = options.get("temperature", entry.get("temperature"))
+    # Calls with tools may run side effects on every response, so they are never served from the cache
+    if options.get("stream") or options.get("tools") or not cache.accepts(temperature):
+        cache.bypass()
+        return None
+    params = {name: options[name] for name in ("top_p", "max_output_tokens") if options.get(name) is not None}
+    return cache.make_key(model_name, entry.get("instructions", ""), prompt, temperature=temperature, **params)
+
+def _sampling_options(top_p, max_output_tokens):
+    """ Return the optional sampling parameters of a Responses API call, only sent when set. """
+    options = {"top_p": top_p, "max_output_tokens": max_output_tokens}
+    return {name: value for name, value in options.items() if value is not None}
+
+def _tool_options(tools, tool_choice, parallel_tool_calls):
+    """ Return the tool parameters of a Responses API call, only sent when the call has tools. """
+    if not tools:
+        return {}
+    return {"tools": tools, "tool_choice": tool_choice, "parallel_tool_calls": parallel_tool_calls}
 
 def gpt_4o_base_strategy(model_name,
                          prompt,
                          credentials,
-                         instructions="You are a helpful assistant that provides information about the topic.",
-                         temperature=0.7,
+                         instructions=GPT_4O_INSTRUCTIONS,
+                         temperature=GPT_4O_TEMPERATURE,
                          max_completion_tokens=None,
                          n=1, 
                          stop=None,
                          presence_penalty=0,
                          frequency_penalty=0,
-                         top_p=1.0,
+                         top_p=None,
+                         max_output_tokens=None,
                          logprobs=None,
                          user=None,
                          reasoning_effort="medium",
@@ -21,53 +130,104 @@ def gpt_4o_base_strategy(model_name,
                          stream=False,
                          store=False,
                          logit_bias=None, 
-                         parallel_tool_calls=True):
+                         parallel_tool_calls=True,
+                         tools=None):
     """ GPT-4 OpenAI base strategy. """
-    openai.api_key = credentials.get("api_key")
-    response = openai.responses.create(
+    client = get_openai_client(credentials)
+    response = client.responses.create(
         model=model_name,
         instructions=instructions,
         input=prompt,
         temperature=temperature,
+        stream=stream,
+        **_tool_options(tools, tool_choice, parallel_tool_calls),
+        **_sampling_options(top_p, max_output_tokens),
         # max_completion_tokens=max_completion_tokens,
         # n=n,
         # stop=stop,
         # presence_penalty=presence_penalty,
         # frequency_penalty=frequency_penalty,
-        # top_p=top_p,
         # logprobs=logprobs,
         # user=user,
         # reasoning_effort=reasoning_effort,
         # response_format=response_format,
-        # tool_choice=tool_choice,
         # service_tier=service_tier,
         # seed=seed,
-        # stream=stream,
         # store=store,
         # logit_bias=logit_bias,
-        # parallel_tool_calls=parallel_tool_calls
     )
     return response
 
+@register_strategy("gpt-4o", requirements=["api_key"], instructions=GPT_4O_INSTRUCTIONS, temperature=GPT_4O_TEMPERATURE)
 def gpt_4o_strategy(model_name, prompt, credentials, **kwargs):
     """ GPT-4 OpenAI strategy. """
     return gpt_4o_base_strategy(
         model_name=model_name,
         prompt=prompt,
         credentials=credentials,
-        instructions="You are a helpful assistant that provides information about the topic.",
+        instructions=GPT_4O_INSTRUCTIONS,
         **kwargs
     )
 
+@register_strategy("gpt-4o-mini", requirements=["api_key"], instructions=GPT_4O_MINI_INSTRUCTIONS, temperature=GPT_4O_MINI_TEMPERATURE)
 def gpt_4o_mini_strategy(model_name, prompt, credentials, **kwargs):
     """ GPT-4 mini OpenAI strategy. """
+    kwargs.setdefault("temperature", GPT_4O_MINI_TEMPERATURE)
     return gpt_4o_base_strategy(
         model_name=model_name,
         prompt=prompt,
         credentials=credentials,
-        instructions="You are a helpful assistant that provides concise and accurate information.",
-        temperature=0.5,
+        instructions=GPT_4O_MINI_INSTRUCTIONS,
         max_completion_tokens=500,
         **kwargs
     )
 
+
+async def gpt_4o_base_strategy_async(model_name,
+                                     prompt,
+                                     credentials,
+                                     instructions=GPT_4O_INSTRUCTIONS,
+                                     temperature=GPT_4O_TEMPERATURE,
+                                     top_p=None,
+                                     max_output_tokens=None,
+                                     stream=False,
+                                     tools=None,
+                                     tool_choice="auto",
+                                     parallel_tool_calls=True,
+                                     **kwargs):
+    """ GPT-4 OpenAI base strategy, async version backed by a shared client. """
+    client = get_openai_client(credentials, asynchronous=True)
+    response = await client.responses.create(
+        model=model_name,
+        instructions=instructions,
+        input=prompt,
+        temperature=temperature,
+        stream=stream,
+        **_tool_options(tools, tool_choice, parallel_tool_calls),
+        **_sampling_options(top_p, max_output_tokens),
+    )
+    return response
+
+@register_strategy("gpt-4o", asynchronous=True)
+async def gpt_4o_strategy_async(model_name, prompt, credentials, **kwargs):
+    """ GPT-4 OpenAI strategy, async version. """
+    return await gpt_4o_base_strategy_async(
+        model_name=model_name,
+        prompt=prompt,
+        credentials=credentials,
+        instructions=GPT_4O_INSTRUCTIONS,
+        **kwargs
+    )
+
+@register_strategy("gpt-4o-mini", asynchronous=True)
+async def gpt_4o_mini_strategy_async(model_name, prompt, credentials, **kwargs):
+    """ GPT-4 mini OpenAI strategy, async version. """
+    kwargs.setdefault("temperature", GPT_4O_MINI_TEMPERATURE)
+    return await gpt_4o_base_strategy_async(
+        model_name=model_name,
+        prompt=prompt,
+        credentials=credentials,
+        instructions=GPT_4O_MINI_INSTRUCTIONS,
+        max_completion_tokens=500,
+        **kwargs
+    )
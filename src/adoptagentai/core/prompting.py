@@ -0,0 +1,205 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is an optional dependency
+    tiktoken = None
+
+
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+
+DEFAULT_CONTEXT_WINDOW = 8192
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+_MEMORY_HEADER = "Relevant memory:\n"
+
+
+def _estimate(word: str) -> int:
+    """Estimate the tokens of one word or punctuation mark when tiktoken is not installed."""
+    return max(1, math.ceil(len(word) / 5))
+
+
+@lru_cache(maxsize=None)
+def _encoding(model_name: str):
+    """Return the tiktoken encoding for a model, falling back to the GPT-4o one."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model_name: str = "gpt-4o") -> int:
+    """
+    Counts the tokens of a text locally.
+
+    Uses tiktoken when it is installed, otherwise an estimate of one token per word or
+    punctuation mark and per five characters of long words.
+
+    Args:
+        text (str): The text to count.
+        model_name (str, optional): The model whose tokenizer to use. Defaults to "gpt-4o".
+
+    Returns:
+        int: The number of tokens.
+    """
+    if tiktoken is not None:
+        return len(_encoding(model_name).encode(text))
+    return sum(_estimate(word) for word in _WORD_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: str = "gpt-4o") -> str:
+    """
+    Cuts a text down to at most max_tokens tokens.
+
+    Args:
+        text (str): The text to cut.
+        max_tokens (int): The number of tokens to keep.
+        model_name (str, optional): The model whose tokenizer to use. Defaults to "gpt-4o".
+
+    Returns:
+        str: The truncated text.
+    """
+    if max_tokens <= 0:
+        return ""
+    if tiktoken is not None:
+        encoding = _encoding(model_name)
+        return encoding.decode(encoding.encode(text)[:max_tokens])
+
+    kept = 0
+    for match in _WORD_PATTERN.finditer(text):
+        kept += _estimate(match.group())
+        if kept > max_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def context_window(model_name: str) -> int:
+    """
+    Returns the context window of a model, matching dated variants by their base name.
+
+    Args:
+        model_name (str): The name of the model.
+
+    Returns:
+        int: The number of tokens the model accepts.
+    """
+    model_name = model_name.lower()
+    if model_name in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[model_name]
+    matches = [name for name in MODEL_CONTEXT_WINDOWS if model_name.startswith(name)]
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+
+class PromptAssembler:
+    """
+    Builds prompts that fit a per-model token budget.
+
+    The budget is the model's context window (or max_input_tokens) minus the tokens
+    reserved for the answer. Instructions and the prompt are always kept; memory
+    entries are added by decreasing priority, the first one that doesn't fit is
+    trimmed and the remaining ones are dropped.
+
+    The token counts of memory entries, which are injected again and again, are kept
+    for the last memory_cache_size entries; prompts are counted on every call.
+    """
+    def __init__(self, max_input_tokens: int = None, reserved_output_tokens: int = 1024, max_memory_tokens: int = None, min_trimmed_tokens: int = 16, memory_cache_size: int = 4096):
+        self.max_input_tokens = max_input_tokens
+        self.reserved_output_tokens = reserved_output_tokens
+        self.max_memory_tokens = max_memory_tokens
+        self.min_trimmed_tokens = min_trimmed_tokens
+        self.memory_cache_size = memory_cache_size
+        self.last_usage = None
+        self._memory_tokens = OrderedDict()
+        self._memory_tokens_lock = threading.Lock()
+
+    def budget(self, model_name: str) -> int:
+        """Return the number of input tokens available for a model."""
+        window = context_window(model_name) - self.reserved_output_tokens
+        if self.max_input_tokens is not None:
+            window = min(window, self.max_input_tokens)
+        return window
+
+    def _memory_line_tokens(self, text: str, model_name: str) -> int:
+        """Return the tokens of a memory line, counted once per entry text."""
+        # The key references the entry's own text, so caching it doesn't copy memory
+        key = (model_name, text)
+        with self._memory_tokens_lock:
+            tokens = self._memory_tokens.get(key)
+            if tokens is not None:
+                self._memory_tokens.move_to_end(key)
+                return tokens
+        tokens = count_tokens(f"- {text}", model_name)
+        with self._memory_tokens_lock:
+            self._memory_tokens[key] = tokens
+            while len(self._memory_tokens) > self.memory_cache_size:
+                self._memory_tokens.popitem(last=False)
+        return tokens
+
+    def assemble(self, model_name: str, prompt: str, memory=(), instructions: str = "") -> str:
+        """
+        Returns the prompt with as much memory as fits the budget.
+
+        Args:
+            model_name (str): The model the prompt is for.
+            prompt (str): The user prompt.
+            memory (iterable, optional): (text, priority) pairs; higher priorities are kept first.
+            instructions (str, optional): The instructions sent along with the prompt.
+
+        Returns:
+            str: The assembled prompt.
+
+        Raises:
+            ValueError: If the instructions and prompt alone exceed the budget.
+        """
+        budget = self.budget(model_name)
+        instructions_tokens = count_tokens(instructions, model_name) if instructions else 0
+        prompt_tokens = count_tokens(prompt, model_name)
+        if instructions_tokens + prompt_tokens > budget:
+            raise ValueError(
+                f"Prompt needs {instructions_tokens + prompt_tokens} tokens, over the budget of {budget} for {model_name}."
+            )
+
+        available = budget - instructions_tokens - prompt_tokens - count_tokens(_MEMORY_HEADER, model_name) - 2
+        if self.max_memory_tokens is not None:
+            available = min(available, self.max_memory_tokens)
+
+        kept, memory_tokens, trimmed, dropped = [], 0, 0, 0
+        full = False
+        for text, _ in sorted(memory, key=lambda item: item[1], reverse=True):
+            line = f"- {text}"
+            tokens = self._memory_line_tokens(text, model_name) + 1
+            if not full and memory_tokens + tokens <= available:
+                kept.append(line)
+                memory_tokens += tokens
+                continue
+            if not full:
+                full = True
+                remaining = available - memory_tokens - 1
+                if remaining >= self.min_trimmed_tokens:
+                    line = truncate_to_tokens(line, remaining, model_name)
+                    kept.append(line)
+                    memory_tokens += count_tokens(line, model_name) + 1
+                    trimmed += 1
+                    continue
+            dropped += 1
+
+        self.last_usage = {
+            'budget': budget,
+            'instructions_tokens': instructions_tokens,
+            'prompt_tokens': prompt_tokens,
+            'memory_tokens': memory_tokens,
+            'memory_kept': len(kept),
+            'memory_trimmed': trimmed,
+            'memory_dropped': dropped,
+        }
+        if not kept:
+            return prompt
+        context = "\n".join(kept)
+        return f"{_MEMORY_HEADER}{context}\n\n{prompt}"
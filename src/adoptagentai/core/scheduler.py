@@ -0,0 +1,401 @@
+import heapq
+import itertools
+import random
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from adoptagentai.core.instrumentation import dispatched_at, dispatched_account, response_usage
+
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Continuously refilling token bucket.
+
+    The bucket holds at most `capacity` tokens and refills at rate_per_minute. It can
+    go into debt when a call turns out to use more tokens than were reserved for it.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Return the seconds until `amount` tokens are available (amounts over the capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def consume(self, amount: float, now: float) -> None:
+        """Take tokens out of the bucket; negative amounts give tokens back."""
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class _AccountLimiter:
+    """Rate limit state of one (model, account) pair: buckets, waiting calls, cooldown and retry budget."""
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float, retry_budget: float):
+        self.requests = TokenBucket(requests_per_minute, max(1.0, requests_per_minute * burst_seconds / 60)) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, max(1.0, tokens_per_minute * burst_seconds / 60)) if tokens_per_minute else None
+        self.waiting = []
+        self.cooldown_until = 0.0
+        self.retry_balance = retry_budget
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'budget_exhausted': 0}
+
+
+def retry_after(error: Exception) -> float:
+    """
+    Reads the delay a provider asked for in an error response.
+
+    Args:
+        error (Exception): The error raised by the provider SDK.
+
+    Returns:
+        float: The delay in seconds from the retry-after-ms or Retry-After header, or None.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def status_code(error: Exception) -> int:
+    """Return the HTTP status of a provider error, or None."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Return True for throttling, transient server errors and connection failures."""
+    if status_code(error) in RETRYABLE_STATUS_CODES:
+        return True
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(error, openai.APIConnectionError)
+
+
+class RateLimitScheduler:
+    """
+    Admission control and retries for model calls, shared by every agent of a process.
+
+    Each (model, account) pair gets token buckets for requests and tokens per minute,
+    a priority queue of waiting calls (higher priority first, then arrival order) and
+    a retry budget. Throttled calls back off with jittered exponential delays, at
+    least as long as the provider's Retry-After, and pause the whole account so the
+    other waiting calls don't pile more 429s on top. Retries of failures draw from a
+    budget of at most max_retry_budget that refills by retry_budget_ratio per call, so
+    a sustained outage can't turn every call into max_retries calls. Throttled calls
+    that were told how long to wait are paced, not failing, and don't draw from it.
+    """
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None, max_retries: int = 6,
+                 base_delay: float = 0.5, max_delay: float = 60.0, burst_seconds: float = 10.0,
+                 retry_budget_ratio: float = 0.2, max_retry_budget: float = 10, poll_interval: float = 0.01):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.burst_seconds = burst_seconds
+        self.retry_budget_ratio = retry_budget_ratio
+        self.max_retry_budget = max_retry_budget
+        self.poll_interval = poll_interval
+        self._limits = {}
+        self._accounts = {}
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+
+    @staticmethod
+    def _key(model_name: str, account_name: str) -> tuple:
+        return (model_name.lower() if model_name else None, account_name.upper() if account_name else None)
+
+    def set_limits(self, model_name: str, account_name: str, requests_per_minute: float = None, tokens_per_minute: float = None) -> None:
+        """
+        Sets the limits of one model and account, replacing the scheduler-wide defaults for it.
+
+        Args:
+            model_name (str): The model the limits apply to.
+            account_name (str): The account the limits apply to.
+            requests_per_minute (float, optional): Requests allowed per minute. None means unlimited.
+            tokens_per_minute (float, optional): Input and output tokens allowed per minute. None means unlimited.
+        """
+        key = self._key(model_name, account_name)
+        with self._condition:
+            self._limits[key] = (requests_per_minute, tokens_per_minute)
+            self._accounts.pop(key, None)
+
+    def _limiter(self, key: tuple) -> _AccountLimiter:
+        limiter = self._accounts.get(key)
+        if limiter is None:
+            requests_per_minute, tokens_per_minute = self._limits.get(key, (self.requests_per_minute, self.tokens_per_minute))
+            limiter = _AccountLimiter(requests_per_minute, tokens_per_minute, self.burst_seconds, self.max_retry_budget)
+            self._accounts[key] = limiter
+        return limiter
+
+    def tracks_tokens(self, model_name: str, account_name: str) -> bool:
+        """Return True if calls of this model and account are limited by tokens, so callers should estimate them."""
+        key = self._key(model_name, account_name)
+        with self._condition:
+            return self._limiter(key).tokens is not None
+
+    def stats(self) -> dict:
+        """Return the request, retry and throttling counters of every (model, account) pair."""
+        with self._condition:
+            return {key: dict(limiter.stats) for key, limiter in self._accounts.items()}
+
+    def _reserve(self, limiter: _AccountLimiter, ticket: tuple, tokens: int) -> float:
+        """Take a slot for the ticket if it is first in line; return 0 when taken, else the seconds to wait (None if unknown)."""
+        if limiter.waiting[0] is not ticket:
+            return None
+        now = time.monotonic()
+        wait = limiter.cooldown_until - now
+        if limiter.requests is not None:
+            wait = max(wait, limiter.requests.wait_time(1, now))
+        if limiter.tokens is not None and tokens:
+            wait = max(wait, limiter.tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+
+        if limiter.requests is not None:
+            limiter.requests.consume(1, now)
+        if limiter.tokens is not None and tokens:
+            limiter.tokens.consume(tokens, now)
+        heapq.heappop(limiter.waiting)
+        limiter.stats['requests'] += 1
+        self._condition.notify_all()
+        return 0
+
+    def _enqueue(self, limiter: _AccountLimiter, priority: int) -> tuple:
+        ticket = (-priority, next(self._sequence))
+        heapq.heappush(limiter.waiting, ticket)
+        return ticket
+
+    def _abandon(self, limiter: _AccountLimiter, ticket: tuple) -> None:
+        """Remove a ticket whose caller gave up waiting, letting the next one in line through."""
+        if ticket in limiter.waiting:
+            limiter.waiting.remove(ticket)
+            heapq.heapify(limiter.waiting)
+            self._condition.notify_all()
+
+    def acquire(self, model_name: str, account_name: str, tokens: int = 0, priority: int = 0) -> None:
+        """Block until a call of this model and account may be sent."""
+        with self._condition:
+            limiter = self._limiter(self._key(model_name, account_name))
+            ticket = self._enqueue(limiter, priority)
+            try:
+                while True:
+                    wait = self._reserve(limiter, ticket, tokens)
+                    if wait == 0:
+                        break
+                    self._condition.wait(wait)
+            except BaseException:
+                self._abandon(limiter, ticket)
+                raise
+        dispatched_at.set(time.perf_counter())
+        dispatched_account.set(account_name)
+
+    async def aacquire(self, model_name: str, account_name: str, tokens: int = 0, priority: int = 0) -> None:
+        """Wait, without blocking the event loop, until a call of this model and account may be sent."""
+        import asyncio
+
+        with self._condition:
+            limiter = self._limiter(self._key(model_name, account_name))
+            ticket = self._enqueue(limiter, priority)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._reserve(limiter, ticket, tokens)
+                if wait == 0:
+                    break
+                await asyncio.sleep(self.poll_interval if wait is None else wait)
+        except BaseException:
+            with self._condition:
+                self._abandon(limiter, ticket)
+            raise
+        dispatched_at.set(time.perf_counter())
+        dispatched_account.set(account_name)
+
+    def _retry_delay(self, model_name: str, account_name: str, error: Exception, attempt: int, max_retries: int) -> float:
+        """Return how long to wait before retrying a failed call, or None if it must not be retried."""
+        if not is_retryable(error):
+            return None
+        with self._condition:
+            limiter = self._limiter(self._key(model_name, account_name))
+            backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            requested = retry_after(error)
+            if status_code(error) == 429:
+                # The account is paused even when this call gives up, so other calls don't hit the limit again
+                limiter.stats['throttled'] += 1
+                cooldown = min(self.max_delay, requested) if requested is not None else backoff
+                limiter.cooldown_until = max(limiter.cooldown_until, time.monotonic() + cooldown)
+
+            if attempt >= max_retries:
+                return None
+            if status_code(error) != 429 or requested is None:
+                if limiter.retry_balance < 1:
+                    limiter.stats['budget_exhausted'] += 1
+                    return None
+                limiter.retry_balance -= 1
+            limiter.stats['retries'] += 1
+
+            if requested is not None:
+                # Small jitter on top of the provider's delay so the waiting calls don't all come back at once
+                return min(self.max_delay, requested) + random.uniform(0, max(0.05, requested * 0.1))
+            return backoff
+
+    def cooldown(self, model_name: str, account_name: str) -> float:
+        """Return the seconds a throttled model and account remain paused, 0 if it isn't."""
+        key = self._key(model_name, account_name)
+        with self._condition:
+            limiter = self._accounts.get(key)
+            return max(0.0, limiter.cooldown_until - time.monotonic()) if limiter is not None else 0.0
+
+    def headroom(self, model_name: str, account_name: str) -> float:
+        """Return the share of the request budget a model and account have left: 1 when unlimited, 0 while paused."""
+        key = self._key(model_name, account_name)
+        with self._condition:
+            limiter = self._limiter(key)
+            now = time.monotonic()
+            if limiter.cooldown_until > now:
+                return 0.0
+            shares = [1.0]
+            for bucket in (limiter.requests, limiter.tokens):
+                if bucket is not None:
+                    bucket.wait_time(0, now)
+                    shares.append(max(0.0, bucket.tokens) / bucket.capacity)
+            return min(shares)
+
+    def _settle(self, model_name: str, account_name: str, tokens: int, response, attempt: int) -> None:
+        """Refill the retry budget and correct the token bucket with the usage the response reports."""
+        with self._condition:
+            limiter = self._limiter(self._key(model_name, account_name))
+            if not attempt:
+                limiter.retry_balance = min(self.max_retry_budget, limiter.retry_balance + self.retry_budget_ratio)
+            self._settle_tokens(limiter, tokens, response)
+
+    def settle_usage(self, model_name: str, account_name: str, tokens: int, response) -> None:
+        """
+        Corrects the tokens reserved for a call with the usage its response reports.
+
+        call() settles plain responses itself; a streamed response only reports its usage
+        in its final 'response.completed' event, which the consumer passes here.
+
+        Args:
+            model_name (str): The model that was called.
+            account_name (str): The account the call was billed to.
+            tokens (int): The tokens reserved for the call.
+            response: The response, or the final event of a stream.
+        """
+        with self._condition:
+            self._settle_tokens(self._limiter(self._key(model_name, account_name)), tokens, response)
+
+    @staticmethod
+    def _settle_tokens(limiter: _AccountLimiter, tokens: int, response) -> None:
+        if limiter.tokens is not None:
+            input_tokens, output_tokens, _ = response_usage(response)
+            if input_tokens is not None and output_tokens is not None:
+                limiter.tokens.consume(input_tokens + output_tokens - tokens, time.monotonic())
+
+    def call(self, model_name: str, account_name: str, function, args: tuple = (), kwargs: dict = None, tokens: int = 0, priority: int = 0, max_retries: int = None):
+        """
+        Calls function(*args, **kwargs) once a slot is free, retrying throttled and transient failures.
+
+        Args:
+            model_name (str): The model being called.
+            account_name (str): The account the call is billed to.
+            function (callable): The strategy to call.
+            args (tuple, optional): Its positional arguments.
+            kwargs (dict, optional): Its keyword arguments.
+            tokens (int, optional): The estimated tokens of the call, reserved in the tokens-per-minute bucket.
+            priority (int, optional): Calls with a higher priority are sent first. Defaults to 0.
+            max_retries (int, optional): Overrides the scheduler's max_retries for this call.
+
+        Returns:
+            The function's return value.
+
+        Raises:
+            Exception: The last error, once it is not retryable or the retries or retry budget are exhausted.
+        """
+        kwargs = kwargs or {}
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            self.acquire(model_name, account_name, tokens, priority)
+            try:
+                response = function(*args, **kwargs)
+            except Exception as error:
+                delay = self._retry_delay(model_name, account_name, error, attempt, max_retries)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._settle(model_name, account_name, tokens, response, attempt)
+            return response
+
+    async def acall(self, model_name: str, account_name: str, function, args: tuple = (), kwargs: dict = None, tokens: int = 0, priority: int = 0, max_retries: int = None):
+        """Async version of call() for coroutine strategies."""
+        import asyncio
+
+        kwargs = kwargs or {}
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            await self.aacquire(model_name, account_name, tokens, priority)
+            try:
+                response = await function(*args, **kwargs)
+            except Exception as error:
+                delay = self._retry_delay(model_name, account_name, error, attempt, max_retries)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._settle(model_name, account_name, tokens, response, attempt)
+            return response
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> RateLimitScheduler:
+    """Return the scheduler shared by agents that aren't given one, creating it on first use."""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                _default_scheduler = RateLimitScheduler()
+    return _default_scheduler
+
+
+def set_default_scheduler(scheduler: RateLimitScheduler) -> None:
+    """Replace the shared scheduler used by agents created afterwards."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        _default_scheduler = scheduler
@@ -0,0 +1,235 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_TOOL_TIMEOUT = 30.0
+DEFAULT_TOOL_WORKERS = 8
+
+# JSON schema types of the annotations a tool's parameters can use
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    tuple: "array",
+    dict: "object",
+}
+
+
+def function_parameters(function) -> dict:
+    """
+    Builds the JSON schema of a callable's parameters from its signature.
+
+    Annotated str, int, float, bool, list and dict parameters get their JSON type, others
+    accept any value. Parameters without a default are required.
+
+    Args:
+        function (callable): The tool callable.
+
+    Returns:
+        dict: The "object" schema of the parameters.
+    """
+    properties = {}
+    required = []
+    for name, parameter in inspect.signature(function).parameters.items():
+        if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+            continue
+        annotation = getattr(parameter.annotation, "__origin__", parameter.annotation)
+        properties[name] = {"type": _JSON_TYPES[annotation]} if annotation in _JSON_TYPES else {}
+        if parameter.default is parameter.empty:
+            required.append(name)
+    return {"type": "object", "properties": properties, "required": required}
+
+
+class Tool:
+    """A callable the model can call, with the schema sent to the model and a timeout."""
+    __slots__ = ('name', 'function', 'description', 'parameters', 'timeout', 'strict')
+
+    def __init__(self, name: str, function, description: str = None, parameters: dict = None, timeout: float = None, strict: bool = False):
+        self.name = name
+        self.function = function
+        self.description = description if description is not None else inspect.getdoc(function) or ""
+        self.parameters = parameters if parameters is not None else function_parameters(function)
+        self.timeout = timeout
+        self.strict = strict
+
+    def schema(self) -> dict:
+        """Return the function tool definition of the Responses API."""
+        return {
+            "type": "function",
+            "name": self.name,
+            "description": self.description,
+            "parameters": self.parameters,
+            "strict": self.strict,
+        }
+
+    def __repr__(self):
+        return f"Tool(name={self.name!r}, timeout={self.timeout!r})"
+
+
+def function_calls(response) -> list:
+    """Return the function calls a Responses API response asks for, in order."""
+    return [item for item in getattr(response, "output", None) or [] if getattr(item, "type", None) == "function_call"]
+
+
+def tool_turn_input(prompt, response, outputs: list) -> list:
+    """
+    Builds the input of the model turn following tool calls.
+
+    Args:
+        prompt (str or list): The input of the turn that asked for the calls.
+        response: That turn's response.
+        outputs (list): The function_call_output items answering the calls.
+
+    Returns:
+        list: The previous input, the response's output items and the call outputs.
+    """
+    items = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else list(prompt)
+    for item in response.output:
+        items.append(item.model_dump(exclude_none=True) if hasattr(item, "model_dump") else item)
+    return items + outputs
+
+
+def _call_output(call, output) -> dict:
+    """Wrap a tool result in the function_call_output item sent back to the model."""
+    if not isinstance(output, str):
+        output = json.dumps(output, default=str)
+    return {"type": "function_call_output", "call_id": call.call_id, "output": output}
+
+
+def _error_output(call, message: str) -> dict:
+    """Report a failed call to the model, so it can react instead of the run failing."""
+    return _call_output(call, {"error": message})
+
+
+class ToolExecutor:
+    """
+    Runs the function calls of one model turn concurrently.
+
+    Calls run on a thread pool shared by the turns of an agent, or on the event loop
+    for coroutine functions in aexecute(), each bounded by its tool's timeout (or the
+    executor's). A timed out thread can't be stopped: it keeps its worker until it
+    returns, and its result is dropped. Unknown tools, invalid arguments, failures and
+    timeouts become error outputs for the model.
+    """
+    def __init__(self, max_workers: int = DEFAULT_TOOL_WORKERS, timeout: float = DEFAULT_TOOL_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Return the thread pool, started on first use."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="adoptagentai-tool")
+        return self._executor
+
+    def _prepare(self, call, tools: dict) -> tuple:
+        """Return the tool and decoded arguments of a call, raising ValueError when it can't be run."""
+        tool = tools.get(call.name)
+        if tool is None:
+            raise ValueError(f"Unknown tool '{call.name}'.")
+        try:
+            arguments = json.loads(call.arguments or "{}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid arguments for tool '{call.name}': {e}") from e
+        if not isinstance(arguments, dict):
+            raise ValueError(f"Invalid arguments for tool '{call.name}': expected an object.")
+        return tool, arguments
+
+    def _timeout(self, tool: Tool) -> float:
+        return tool.timeout if tool.timeout is not None else self.timeout
+
+    @staticmethod
+    def _invoke(tool: Tool, arguments: dict):
+        """Run a tool on a worker thread, driving coroutine functions to completion there."""
+        result = tool.function(**arguments)
+        if inspect.isawaitable(result):
+            import asyncio
+
+            async def wait_result():
+                return await result
+            result = asyncio.run(wait_result())
+        return result
+
+    def execute(self, calls: list, tools: dict) -> list:
+        """
+        Runs function calls concurrently on the thread pool.
+
+        Args:
+            calls (list): The function_call items of a response.
+            tools (dict): The registered tools, keyed by name.
+
+        Returns:
+            list: The function_call_output items, in the order of the calls.
+        """
+        outputs = [None] * len(calls)
+        submitted = []
+        for position, call in enumerate(calls):
+            try:
+                tool, arguments = self._prepare(call, tools)
+            except ValueError as e:
+                outputs[position] = _error_output(call, str(e))
+                continue
+            submitted.append((position, call, tool, self._pool().submit(self._invoke, tool, arguments), time.monotonic()))
+
+        for position, call, tool, future, started in submitted:
+            timeout = self._timeout(tool)
+            try:
+                remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+                outputs[position] = _call_output(call, future.result(timeout=remaining))
+            except Exception as e:
+                if future.done():
+                    outputs[position] = _error_output(call, f"{type(e).__name__}: {e}")
+                else:
+                    future.cancel()
+                    outputs[position] = _error_output(call, f"Tool '{call.name}' timed out after {timeout} seconds.")
+        return outputs
+
+    async def aexecute(self, calls: list, tools: dict) -> list:
+        """
+        Runs function calls concurrently on the event loop.
+
+        Coroutine functions are awaited directly, other callables run on the thread pool.
+
+        Args:
+            calls (list): The function_call items of a response.
+            tools (dict): The registered tools, keyed by name.
+
+        Returns:
+            list: The function_call_output items, in the order of the calls.
+        """
+        import asyncio
+
+        async def run(call):
+            try:
+                tool, arguments = self._prepare(call, tools)
+            except ValueError as e:
+                return _error_output(call, str(e))
+            timeout = self._timeout(tool)
+            if inspect.iscoroutinefunction(tool.function):
+                pending = tool.function(**arguments)
+            else:
+                pending = asyncio.get_running_loop().run_in_executor(self._pool(), functools.partial(self._invoke, tool, arguments))
+            try:
+                return _call_output(call, await asyncio.wait_for(pending, timeout))
+            except asyncio.TimeoutError:
+                return _error_output(call, f"Tool '{call.name}' timed out after {timeout} seconds.")
+            except Exception as e:
+                return _error_output(call, f"{type(e).__name__}: {e}")
+
+        return list(await asyncio.gather(*(run(call) for call in calls)))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the thread pool; it is started again if more calls come."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
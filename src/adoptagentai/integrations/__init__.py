@@ -1,11 +1,32 @@
-from adoptagentai.integrations.google import GoogleUtilsTool, GoogleSheetsTool, GoogleDriveTool, GoogleGmailTool, GoogleCalendarTool
+import importlib
+
+# The Google client libraries are only imported when a Google tool is first used
+_LAZY_IMPORTS = {
+    'GoogleUtilsTool': 'adoptagentai.integrations.google',
+    'GoogleSheetsTool': 'adoptagentai.integrations.google',
+    'GoogleDriveTool': 'adoptagentai.integrations.google',
+    'GoogleGmailTool': 'adoptagentai.integrations.google',
+    'GoogleCalendarTool': 'adoptagentai.integrations.google',
+    'GoogleServiceFactory': 'adoptagentai.integrations.google',
+    'get_service_factory': 'adoptagentai.integrations.google',
+}
 
 __all__ = [
     'GoogleUtilsTool',
     'GoogleSheetsTool',
     'GoogleDriveTool',
     'GoogleGmailTool',
-    'GoogleCalendarTool'
+    'GoogleCalendarTool',
+    'GoogleServiceFactory',
+    'get_service_factory'
 ]
 
-__version__ = '0.1.0'
\ No newline at end of file
+__version__ = '0.1.0'
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
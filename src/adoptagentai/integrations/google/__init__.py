@@ -0,0 +1,30 @@
+import importlib
+
+# services.py pulls in google-api-python-client, so it is only imported on first access
+_LAZY_IMPORTS = {
+    'GoogleUtilsTool': 'adoptagentai.integrations.google.services',
+    'GoogleSheetsTool': 'adoptagentai.integrations.google.services',
+    'GoogleDriveTool': 'adoptagentai.integrations.google.services',
+    'GoogleGmailTool': 'adoptagentai.integrations.google.services',
+    'GoogleCalendarTool': 'adoptagentai.integrations.google.services',
+    'GoogleServiceFactory': 'adoptagentai.integrations.google.services',
+    'get_service_factory': 'adoptagentai.integrations.google.services',
+}
+
+__all__ = [
+    'GoogleUtilsTool',
+    'GoogleSheetsTool',
+    'GoogleDriveTool',
+    'GoogleGmailTool',
+    'GoogleCalendarTool',
+    'GoogleServiceFactory',
+    'get_service_factory'
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,27 +1,531 @@
+import bisect
+import contextlib
+import json
+import math
 import os.path
+import random
+import re
+import threading
+import time
+from array import array
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from urllib.parse import quote
+import httplib2
+from google.auth.credentials import Credentials as BaseCredentials
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload
+from adoptagentai.core.scheduler import TokenBucket, is_retryable, status_code
+from adoptagentai.utils.api_keys import get_api_credentials
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+
+# Sheets recommends request bodies of at most 2 MB; URLs beyond ~8k characters get rejected
+SHEETS_MAX_REQUEST_BYTES = 2_000_000
+SHEETS_MAX_URL_LENGTH = 8000
+SHEETS_MAX_RANGES_PER_REQUEST = 100
+
+_A1_CELL_PATTERN = re.compile(r"^([A-Za-z]{1,3})(\d+)(?::[A-Za-z]{0,3}\d*)?$")
+
+
+def _split_a1_range(range_name: str) -> tuple:
+    """Split an A1 range into (sheet prefix, start column, start row), or None if it has no start cell (e.g. a named range)."""
+    sheet, _, cells = range_name.rpartition("!")
+    match = _A1_CELL_PATTERN.match(cells)
+    if not match:
+        return None
+    return (f"{sheet}!" if sheet else ""), match.group(1).upper(), int(match.group(2))
+
+
+_A1_BOUNDS_PATTERN = re.compile(r"^([A-Za-z]{1,3})(\d*)(?::([A-Za-z]{1,3})(\d*))?$")
+
+# array module typecodes and fill values for missing cells of the columnar page types
+_COLUMN_TYPES = {
+    'float': ('d', math.nan),
+    'int': ('q', 0),
+    'bool': ('b', False),
+    'str': (None, ""),
+}
+
+
+def _column_letters(number: int) -> str:
+    """Convert a 1-based column number to its A1 letters."""
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _column_number(letters: str) -> int:
+    """Convert A1 column letters to the 1-based column number."""
+    number = 0
+    for letter in letters.upper():
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+def _parse_sheet_range(range_name: str) -> tuple:
+    """Split a range into (sheet prefix, sheet title, start column, start row, end column, end row); missing bounds are None."""
+    sheet, separator, cells = range_name.rpartition("!")
+    match = _A1_BOUNDS_PATTERN.match(cells)
+    if not separator and not match:
+        # A bare sheet name covers the whole sheet
+        sheet, cells, match = range_name, "", None
+    elif separator and not match:
+        raise ValueError(f"Unsupported range '{range_name}', expected A1 notation such as 'Sheet1!A1:D'.")
+
+    prefix = f"{sheet}!" if sheet else ""
+    title = sheet[1:-1].replace("''", "'") if sheet.startswith("'") and sheet.endswith("'") else sheet
+    if match is None:
+        return prefix, title, "A", 1, None, None
+    start_column, start_row, end_column, end_row = match.groups()
+    return (prefix, title, start_column.upper(), int(start_row) if start_row else 1,
+            end_column.upper() if end_column else None, int(end_row) if end_row else None)
+
+
+def _infer_column_type(values) -> str:
+    """Pick the columnar type of a column from its (unformatted) cell values."""
+    present = [value for value in values if value != "" and value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return 'bool'
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return 'float'
+    return 'str'
+
+
+def _to_columns(rows: list, names: list, types: dict) -> dict:
+    """Transpose a page of rows into one typed array per column (NumPy arrays when available, else array/list)."""
+    columns = {}
+    for index, name in enumerate(names):
+        typecode, missing = _COLUMN_TYPES[types[name]]
+        convert = {'float': float, 'int': int, 'bool': bool, 'str': str}[types[name]]
+        values = []
+        for row in rows:
+            value = row[index] if index < len(row) else ""
+            if value == "" or value is None:
+                values.append(missing)
+                continue
+            try:
+                values.append(convert(value))
+            except (TypeError, ValueError):
+                # Cells that don't fit the column type, such as a "N/A" in a numeric column, count as missing
+                values.append(missing)
+
+        if typecode is None:
+            columns[name] = np.array(values, dtype=object) if np is not None else values
+        elif np is not None:
+            columns[name] = np.array(values, dtype={'d': np.float64, 'q': np.int64, 'b': np.bool_}[typecode])
+        else:
+            columns[name] = array(typecode, values)
+    return columns
+
+
+def _chunk_value_range(range_name: str, values: list, max_bytes: int) -> list:
+    """Split the rows of one write into consecutive {range, values} entries of at most max_bytes each."""
+    anchor = _split_a1_range(range_name)
+    if anchor is None or not values:
+        return [{'range': range_name, 'values': values}]
+
+    sheet, column, row = anchor
+    chunks, rows, size, offset = [], [], 0, 0
+    for values_row in values:
+        row_size = len(json.dumps(values_row, separators=(",", ":"), default=str)) + 1
+        if rows and size + row_size > max_bytes:
+            chunks.append({'range': f"{sheet}{column}{row + offset}", 'values': rows})
+            offset += len(rows)
+            rows, size = [], 0
+        rows.append(values_row)
+        size += row_size
+    chunks.append({'range': f"{sheet}{column}{row + offset}" if offset else range_name, 'values': rows})
+    return chunks
+
+
+def _pack(items: list, sizes: list, max_size: int, max_count: int) -> list:
+    """Group items in order into batches of at most max_count items and max_size total size."""
+    batches, batch, total = [], [], 0
+    for item, size in zip(items, sizes):
+        if batch and (total + size > max_size or len(batch) >= max_count):
+            batches.append(batch)
+            batch, total = [], 0
+        batch.append(item)
+        total += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+DRIVE_CHUNK_SIZE = 8 * 1024 * 1024
+# Resumable upload chunks must be a multiple of 256 KiB, except the last one
+DRIVE_CHUNK_ALIGNMENT = 256 * 1024
+DRIVE_FILE_FIELDS = "id, name, mimeType, size"
+
+
+def _align_chunk_size(chunk_size: int) -> int:
+    """Round an upload chunk size down to a multiple of 256 KiB, keeping at least one."""
+    return max(DRIVE_CHUNK_ALIGNMENT, chunk_size - chunk_size % DRIVE_CHUNK_ALIGNMENT)
+
+
+def _range_writer(destination):
+    """
+    Returns a thread-safe function writing bytes at an offset of the destination.
+
+    Args:
+        destination: A writable buffer (bytearray, mmap.mmap), written in place, or a seekable binary file object.
+
+    Returns:
+        callable: write(offset, data).
+    """
+    try:
+        view = memoryview(destination)
+    except TypeError:
+        view = None
+    if view is not None and not view.readonly:
+        # Disjoint slices of a buffer can be filled concurrently
+        def write(offset, data):
+            view[offset:offset + len(data)] = data
+        return write
+
+    lock = threading.Lock()
+
+    def write(offset, data):
+        with lock:
+            destination.seek(offset)
+            destination.write(data)
+    return write
+
+
+class _Throttle:
+    """Caps the bytes per second moved by any number of threads, with a one second burst."""
+    def __init__(self, bytes_per_second: float = None):
+        self._bucket = TokenBucket(bytes_per_second * 60, capacity=bytes_per_second) if bytes_per_second else None
+        self._lock = threading.Lock()
+
+    def wait(self, size: int) -> None:
+        """Block until size bytes may be moved."""
+        if self._bucket is None:
+            return
+        # Waiting under the lock queues the threads, which all share the same budget anyway
+        with self._lock:
+            delay = self._bucket.wait_time(size, time.monotonic())
+            if delay:
+                time.sleep(delay)
+            self._bucket.consume(size, time.monotonic())
+
+
+# Gmail rate limits batches of more than 50 requests
+GMAIL_BATCH_SIZE = 50
+GMAIL_LIST_PAGE_SIZE = 500
+GMAIL_RETRY_DELAY = 1.0
+GMAIL_METADATA_HEADERS = ('From', 'To', 'Cc', 'Subject', 'Date')
+GMAIL_MESSAGE_FIELDS = "id,threadId,labelIds,snippet,historyId,internalDate,sizeEstimate,payload/headers"
+GMAIL_HISTORY_FIELDS = ("history(messagesAdded/message/id,messagesDeleted/message/id,"
+                        "labelsAdded(message/id,labelIds),labelsRemoved(message/id,labelIds)),historyId,nextPageToken")
+
+
+def _gmail_retryable(error: Exception) -> bool:
+    """Return True for transient errors, including the 403 Gmail answers when a rate limit is exceeded."""
+    if is_retryable(error):
+        return True
+    return status_code(error) == 403 and b'ateLimitExceeded' in (getattr(error, 'content', None) or b'')
+
+
+CALENDAR_PAGE_SIZE = 2500
+CALENDAR_REFRESH_INTERVAL = 60
+CALENDAR_EVENT_FIELDS = "items(id,status,summary,start,end,transparency,updated),nextPageToken,nextSyncToken"
+
+
+def _event_bounds(event: dict, time_zone) -> tuple:
+    """Return the (start, end) timestamps of a Calendar event, all-day events spanning whole days in time_zone."""
+    bounds = []
+    for key in ('start', 'end'):
+        value = event[key]
+        if 'dateTime' in value:
+            # fromisoformat only accepts the 'Z' suffix from Python 3.11
+            moment = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        else:
+            moment = datetime.fromisoformat(value['date']).replace(tzinfo=time_zone)
+        bounds.append(moment.timestamp())
+    return tuple(bounds)
+
+
+class _IntervalIndex:
+    """
+    Static interval tree over (start, end, item) triples.
+
+    Intervals are sorted by start and a segment tree keeps the latest end of every
+    range of them, so finding the k intervals overlapping a window costs O(log n + k).
+    """
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self._starts = [interval[0] for interval in intervals]
+        self._ends = [interval[1] for interval in intervals]
+        self._items = [interval[2] for interval in intervals]
+        self._size = 1
+        while self._size < len(intervals):
+            self._size *= 2
+        self._max_end = [-math.inf] * (2 * self._size)
+        self._max_end[self._size:self._size + len(intervals)] = self._ends
+        for node in range(self._size - 1, 0, -1):
+            self._max_end[node] = max(self._max_end[2 * node], self._max_end[2 * node + 1])
+
+    def __len__(self):
+        return len(self._items)
+
+    def overlapping(self, start: float, end: float) -> list:
+        """Return the (start, end, item) of the intervals overlapping [start, end), ordered by start."""
+        # Only intervals starting before the window ends can overlap it, and among them only those ending after it starts
+        limit = bisect.bisect_left(self._starts, end)
+        matches = []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or self._max_end[node] <= start:
+                continue
+            if node >= self._size:
+                index = node - self._size
+                matches.append((self._starts[index], self._ends[index], self._items[index]))
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+        return matches
+
+
+GOOGLE_SETTINGS = {
+    "token_dir": os.path.join(os.path.expanduser("~"), ".cache", "adoptagentai", "google"),
+    "discovery_cache_dir": os.path.join(os.path.expanduser("~"), ".cache", "adoptagentai", "discovery"),
+    "timeout": 60,
+}
+
+# One consent covers every Google tool of an account
+GOOGLE_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/gmail.modify",
+    "https://www.googleapis.com/auth/calendar",
+]
+
+_GOOGLE_AUTH_URI = "https://accounts.google.com/o/oauth2/auth"
+_GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+_DISCOVERY_URLS = (
+    "https://{api}.googleapis.com/$discovery/rest?version={version}",
+    "https://www.googleapis.com/discovery/v1/apis/{api}/{version}/rest",
+)
+
+
+class GoogleServiceFactory:
+    """
+    Builds Google API service objects once and shares them across tools.
+
+    Discovery documents are parsed once per process and looked up in a local cache
+    directory, then in the documents bundled with google-api-python-client, and only
+    then fetched (and cached) from the network. Credentials are resolved once per
+    account and refreshed when expired. Services are cached per account, API and
+    thread: each thread gets its own HTTP transport, since httplib2 isn't thread-safe.
+    """
+    def __init__(self, discovery_cache_dir: str = None, token_dir: str = None, timeout: float = None, scopes: list = None, client_options: dict = None):
+        self.discovery_cache_dir = discovery_cache_dir or GOOGLE_SETTINGS["discovery_cache_dir"]
+        self.token_dir = token_dir or GOOGLE_SETTINGS["token_dir"]
+        self.timeout = timeout if timeout is not None else GOOGLE_SETTINGS["timeout"]
+        self.scopes = list(scopes or GOOGLE_SCOPES)
+        self.client_options = client_options or {}
+        self._documents = {}
+        self._credentials = {}
+        self._account_locks = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def discovery_document(self, api: str, version: str) -> dict:
+        """Return the parsed discovery document of an API, loading it only once per process."""
+        key = (api, version)
+        document = self._documents.get(key)
+        if document is None:
+            with self._lock:
+                document = self._documents.get(key)
+                if document is None:
+                    document = self._documents[key] = json.loads(self._load_discovery_document(api, version))
+        return document
+
+    def _load_discovery_document(self, api: str, version: str) -> str:
+        """Read a discovery document from the cache directory, the bundled documents or, once, the network."""
+        path = os.path.join(self.discovery_cache_dir, f"{api}.{version}.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                return file.read()
+
+        content = get_static_doc(api, version)
+        if content is not None:
+            return content
+
+        http = httplib2.Http(timeout=self.timeout)
+        for url in _DISCOVERY_URLS:
+            response, content = http.request(url.format(api=api, version=version))
+            if response.status < 400:
+                content = content.decode("utf-8")
+                os.makedirs(self.discovery_cache_dir, exist_ok=True)
+                temporary_path = f"{path}.tmp"
+                with open(temporary_path, "w", encoding="utf-8") as file:
+                    file.write(content)
+                os.replace(temporary_path, path)
+                return content
+        raise ValueError(f"No discovery document found for {api} {version}.")
+
+    def credentials(self, account_name: str = "default"):
+        """
+        Return the google-auth credentials of an account, running the OAuth consent flow only when needed.
+
+        The client_id and client_secret come from get_api_credentials("google", account_name).
+        A refresh_token stored along with them (GOOGLE_<ACCOUNT>_REFRESH_TOKEN) is used
+        directly, for headless use; otherwise the authorized user token is kept in token_dir.
+        """
+        account_name = (account_name or "default").lower()
+        credentials = self._credentials.get(account_name)
+        if credentials is not None and credentials.valid:
+            return credentials
+        with self._lock:
+            account_lock = self._account_locks.setdefault(account_name, threading.Lock())
+        # Authorizing can wait on the user's consent, so it only holds this account's lock
+        with account_lock:
+            credentials = self._credentials.get(account_name)
+            if credentials is None or not credentials.valid:
+                credentials = self._credentials[account_name] = self._authorize(account_name, credentials)
+            return credentials
+
+    def _authorize(self, account_name: str, credentials=None):
+        """Load, refresh or obtain the credentials of an account and store its token."""
+        client = get_api_credentials("google", account_name)
+        path = os.path.join(self.token_dir, f"{account_name}_token.json")
+        if credentials is None and client.get("refresh_token"):
+            credentials = Credentials(None, refresh_token=client["refresh_token"], client_id=client.get("client_id"),
+                                      client_secret=client.get("client_secret"), token_uri=_GOOGLE_TOKEN_URI, scopes=self.scopes)
+        if credentials is None and os.path.exists(path):
+            credentials = Credentials.from_authorized_user_file(path, self.scopes)
+
+        if credentials is not None and credentials.refresh_token and not credentials.valid:
+            credentials.refresh(Request())
+        if credentials is None or not credentials.valid:
+            client_config = {"installed": {
+                "client_id": client.get("client_id"),
+                "client_secret": client.get("client_secret"),
+                "auth_uri": _GOOGLE_AUTH_URI,
+                "token_uri": _GOOGLE_TOKEN_URI,
+            }}
+            credentials = InstalledAppFlow.from_client_config(client_config, self.scopes).run_local_server(port=0)
+
+        os.makedirs(self.token_dir, exist_ok=True)
+        with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as file:
+            file.write(credentials.to_json())
+        return credentials
+
+    def service(self, api: str, version: str, account_name: str = "default", credentials=None):
+        """
+        Return the service object of an API for an account, built once per thread.
+
+        Args:
+            api (str): The API name, e.g. 'sheets'.
+            version (str): The API version, e.g. 'v4'.
+            account_name (str, optional): The Google account. Defaults to "default".
+            credentials (optional): google-auth credentials to use instead of the account's.
+
+        Returns:
+            googleapiclient.discovery.Resource: The service.
+        """
+        services = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        key = (api, version, (account_name or "default").lower(), id(credentials) if credentials is not None else None)
+        service = services.get(key)
+        if service is None:
+            if credentials is None:
+                credentials = self.credentials(account_name)
+            transport = httplib2.Http(timeout=self.timeout)
+            # Resumable uploads answer 308 Resume Incomplete, which httplib2 would otherwise follow as a redirect
+            transport.redirect_codes = transport.redirect_codes - {308}
+            http = AuthorizedHttp(credentials, http=transport)
+            service = services[key] = build_from_document(
+                self.discovery_document(api, version), http=http, client_options=self.client_options.get(api))
+        return service
+
+    def clear(self) -> None:
+        """Forget the cached credentials and the services of the current thread."""
+        with self._lock:
+            self._credentials.clear()
+        self._local.services = {}
+
+
+_service_factory = None
+_service_factory_lock = threading.Lock()
+
+
+def get_service_factory() -> GoogleServiceFactory:
+    """Return the service factory shared by Google tools that aren't given one."""
+    global _service_factory
+    if _service_factory is None:
+        with _service_factory_lock:
+            if _service_factory is None:
+                _service_factory = GoogleServiceFactory()
+    return _service_factory
 
 
 class GoogleUtilsTool:
     """Base class for Google service tools."""
-    def __init__(self, tool_account_name: str = None):
-        self.tool_account_name = tool_account_name
+    def __init__(self, tool_account_name: str = None, service_factory: GoogleServiceFactory = None):
+        self.tool_account_name = tool_account_name or "default"
         self.tool_credentials = get_api_credentials("google", self.tool_account_name)
+        self.service_factory = service_factory or get_service_factory()
+
+    def _service(self, api: str, version: str):
+        """Return the shared service of an API for this tool's account and the current thread."""
+        # tool_credentials may already hold google-auth credentials, which are then used as is
+        credentials = self.tool_credentials if isinstance(self.tool_credentials, BaseCredentials) else None
+        return self.service_factory.service(api, version, self.tool_account_name, credentials)
+
+    def _run_parallel(self, function, batches, max_workers):
+        """
+        Run function over every batch with at most max_workers in flight, returning results in order.
+
+        The first failure is raised as soon as it happens: batches not started yet are cancelled
+        instead of run, so a failed range of a large download doesn't fetch all the others first.
+        """
+        if max_workers <= 1 or len(batches) <= 1:
+            return [function(batch) for batch in batches]
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(batches)))
+        try:
+            futures = [executor.submit(function, batch) for batch in batches]
+            wait(futures, return_when=FIRST_EXCEPTION)
+            for future in futures:
+                if future.done() and future.exception() is not None:
+                    raise future.exception()
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
 
 class GoogleSheetsTool(GoogleUtilsTool):
     """Tool for Google Sheets integration."""
-    def __init__(self, tool_account_name: str = None):
-        super().__init__(tool_account_name)
-        self.sheets_service = self._build_sheets_service()
-    
+    def __init__(self, tool_account_name: str = None, service_factory: GoogleServiceFactory = None):
+        super().__init__(tool_account_name, service_factory)
+
+    @property
+    def sheets_service(self):
+        """The Google Sheets service of the current thread, built on first use."""
+        return self._build_sheets_service()
+
     def _build_sheets_service(self):
         """Build and return the Google Sheets service."""
-        return build('sheets', 'v4', credentials=self.tool_credentials)
+        return self._service('sheets', 'v4')
     
     def read_spreadsheet(self, spreadsheet_id, range_name):
         """Read data from a Google Sheets spreadsheet."""
@@ -51,20 +555,751 @@ class GoogleSheetsTool(GoogleUtilsTool):
             print(f"An error occurred: {err}")
             return None
 
+    def batch_read_spreadsheet(self, spreadsheet_id, ranges, max_workers=4, **options):
+        """
+        Read many ranges of a spreadsheet with values().batchGet.
+
+        Ranges are sent together, split into as few requests as the URL length allows,
+        and those requests run in parallel.
+
+        Args:
+            spreadsheet_id (str): The spreadsheet to read.
+            ranges (list): The A1 ranges to read.
+            max_workers (int, optional): The maximum number of requests in flight. Defaults to 4.
+            **options: Extra batchGet parameters, e.g. valueRenderOption or majorDimension.
+
+        Returns:
+            dict: The values of each requested range (empty list for empty ranges), or None on error.
+        """
+        ranges = list(ranges)
+        sizes = [len(quote(range_name, safe="")) + len("&ranges=") for range_name in ranges]
+        batches = _pack(ranges, sizes, SHEETS_MAX_URL_LENGTH, SHEETS_MAX_RANGES_PER_REQUEST)
+
+        def read(batch):
+            service = self.sheets_service
+            return service.spreadsheets().values().batchGet(
+                spreadsheetId=spreadsheet_id, ranges=batch, **options).execute()
+
+        try:
+            results = self._run_parallel(read, batches, max_workers)
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+        values = {}
+        for batch, result in zip(batches, results):
+            for range_name, value_range in zip(batch, result.get('valueRanges', [])):
+                values[range_name] = value_range.get('values', [])
+        return values
+
+    def batch_update_spreadsheet(self, spreadsheet_id, data, value_input_option='USER_ENTERED', max_request_bytes=SHEETS_MAX_REQUEST_BYTES, max_workers=4):
+        """
+        Write many ranges of a spreadsheet with values().batchUpdate.
+
+        Ranges are grouped into requests of at most max_request_bytes; a range too large
+        for one request is split into row chunks, each written at its own start row.
+        Requests run in parallel, so chunks of one range may land in any order.
+
+        Args:
+            spreadsheet_id (str): The spreadsheet to update.
+            data (dict | list): The values to write, as {range: values} or (range, values) pairs.
+            value_input_option (str, optional): How input is interpreted. Defaults to 'USER_ENTERED'.
+            max_request_bytes (int, optional): The maximum size of the values of one request. Defaults to 2 MB.
+            max_workers (int, optional): The maximum number of requests in flight. Defaults to 4.
+
+        Returns:
+            dict: The summed totalUpdated* counters and every per-range response, or None on error.
+        """
+        items = data.items() if isinstance(data, dict) else data
+        entries = []
+        for range_name, values in items:
+            entries.extend(_chunk_value_range(range_name, values, max_request_bytes))
+        sizes = [len(json.dumps(entry, separators=(",", ":"), default=str)) for entry in entries]
+        batches = _pack(entries, sizes, max_request_bytes, len(entries) or 1)
+
+        def write(batch):
+            service = self.sheets_service
+            body = {'valueInputOption': value_input_option, 'data': batch}
+            return service.spreadsheets().values().batchUpdate(
+                spreadsheetId=spreadsheet_id, body=body).execute()
+
+        try:
+            results = self._run_parallel(write, batches, max_workers)
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+        summary = {'spreadsheetId': spreadsheet_id, 'totalUpdatedCells': 0, 'totalUpdatedRows': 0,
+                   'totalUpdatedColumns': 0, 'requests': len(batches), 'responses': []}
+        for result in results:
+            summary['totalUpdatedCells'] += result.get('totalUpdatedCells', 0)
+            summary['totalUpdatedRows'] += result.get('totalUpdatedRows', 0)
+            summary['totalUpdatedColumns'] = max(summary['totalUpdatedColumns'], result.get('totalUpdatedColumns', 0))
+            summary['responses'].extend(result.get('responses', []))
+        return summary
 
-class GoogleDriveTool:
+    def iter_spreadsheet(self, spreadsheet_id, range_name, page_rows=5000, columnar=False, header=False, dtypes=None, value_render_option='UNFORMATTED_VALUE', prefetch=True):
+        """
+        Read a large sheet in windows of page_rows rows, yielding one page at a time.
+
+        Only one page (two with prefetch) is held in memory at once. Reading stops at
+        the end of the sheet's grid, at the end row of the range, or at the first
+        window that is entirely empty.
+
+        Args:
+            spreadsheet_id (str): The spreadsheet to read.
+            range_name (str): A sheet name or an A1 range such as 'Sheet1!A1:D' (open ended ranges read to the end).
+            page_rows (int, optional): The number of rows per request and page. Defaults to 5000.
+            columnar (bool, optional): Yield {column: array} pages instead of lists of rows. Defaults to False.
+            header (bool, optional): Use the first row as column names and don't yield it. Defaults to False.
+            dtypes (dict, optional): Columnar types ('float', 'int', 'bool' or 'str') by column; others are inferred from the first page.
+            value_render_option (str, optional): How values are rendered. Defaults to 'UNFORMATTED_VALUE' so numbers stay numbers.
+            prefetch (bool, optional): Fetch the next page while the current one is processed. Defaults to True.
+
+        Yields:
+            list | dict: A list of rows, or with columnar=True a dict of NumPy arrays (array.array or lists without NumPy).
+        """
+        if page_rows < 1:
+            raise ValueError("page_rows must be at least 1.")
+        prefix, title, start_column, start_row, end_column, end_row = _parse_sheet_range(range_name)
+        row_count, column_count = self._grid_size(spreadsheet_id, title)
+        end_row = min(end_row, row_count) if end_row else row_count
+        end_column = end_column or _column_letters(column_count)
+        width = _column_number(end_column) - _column_number(start_column) + 1
+
+        def fetch(first_row):
+            last_row = min(first_row + page_rows - 1, end_row)
+            service = self.sheets_service
+            result = service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id, range=f"{prefix}{start_column}{first_row}:{end_column}{last_row}",
+                valueRenderOption=value_render_option).execute()
+            return result.get('values', [])
+
+        names, types = None, None
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            first_row = start_row
+            pending = executor.submit(fetch, first_row) if executor else None
+            while first_row <= end_row:
+                rows = pending.result() if executor else fetch(first_row)
+                next_row = first_row + page_rows
+                if executor and next_row <= end_row and rows:
+                    pending = executor.submit(fetch, next_row)
+                if not rows:
+                    return
+                first_row = next_row
+
+                if header and names is None:
+                    names = [str(name) for name in rows[0]] + [str(index) for index in range(len(rows[0]), width)]
+                    rows = rows[1:]
+                    if not rows:
+                        continue
+                if not columnar:
+                    yield rows
+                    continue
+
+                if names is None:
+                    names = [str(index) for index in range(width)]
+                if types is None:
+                    types = {name: (dtypes or {}).get(name) or _infer_column_type([row[index] if index < len(row) else "" for row in rows])
+                             for index, name in enumerate(names)}
+                yield _to_columns(rows, names, types)
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _grid_size(self, spreadsheet_id, title):
+        """Return the (row count, column count) of a sheet's grid, the first sheet when title is empty."""
+        result = self.sheets_service.spreadsheets().get(
+            spreadsheetId=spreadsheet_id,
+            fields='sheets(properties(title,gridProperties(rowCount,columnCount)))').execute()
+        for sheet in result.get('sheets', []):
+            properties = sheet.get('properties', {})
+            if not title or properties.get('title') == title:
+                grid = properties.get('gridProperties', {})
+                return grid.get('rowCount', 1000), grid.get('columnCount', 26)
+        raise ValueError(f"Sheet '{title}' not found in spreadsheet {spreadsheet_id}.")
+
+
+class GoogleDriveTool(GoogleUtilsTool):
     """Tool for Google Drive integration."""
-    def __init__(self):
-        pass
-    
+    def __init__(self, tool_account_name: str = None, service_factory: GoogleServiceFactory = None):
+        super().__init__(tool_account_name, service_factory)
+
+    @property
+    def drive_service(self):
+        """The Drive service of this tool's account for the current thread."""
+        return self._service('drive', 'v3')
+
+    def upload_file(self, source, name=None, mime_type='application/octet-stream', parent_id=None, file_id=None,
+                    chunk_size=DRIVE_CHUNK_SIZE, max_bytes_per_second=None, session=None, progress=None, num_retries=3):
+        """
+        Uploads a file to Google Drive with a resumable upload, sending it chunk by chunk.
+
+        Only one chunk is read at a time, so files of any size can be sent from disk
+        or from a memory-mapped file without loading them in memory.
+
+        Args:
+            source (str or file object): A path, or a seekable binary file object such as an open file, io.BytesIO or mmap.mmap.
+            name (str, optional): The name of the new file. Defaults to the base name of a path source.
+            mime_type (str, optional): The content type. Defaults to 'application/octet-stream'.
+            parent_id (str, optional): The folder to create the file in.
+            file_id (str, optional): An existing file whose content is replaced instead of creating a new file.
+            chunk_size (int, optional): The bytes sent per request, rounded down to a multiple of 256 KiB. Defaults to 8 MiB.
+            max_bytes_per_second (float, optional): A cap on the upload throughput.
+            session (dict, optional): Filled with the 'resumable_uri' and 'progress' of the upload; passing the
+                dict of an interrupted upload again (it can be saved as JSON) resumes it where the server left off.
+            progress (callable, optional): Called with (bytes sent, total bytes) after each chunk.
+            num_retries (int, optional): How many times each request is retried on transient errors. Defaults to 3.
+
+        Returns:
+            dict: The id, name, mimeType and size of the file, or None if an error occurred.
+        """
+        session = session if session is not None else {}
+        try:
+            with contextlib.ExitStack() as stack:
+                if isinstance(source, (str, os.PathLike)):
+                    name = name or os.path.basename(source)
+                    source = stack.enter_context(open(source, 'rb'))
+                media = MediaIoBaseUpload(source, mimetype=mime_type, chunksize=_align_chunk_size(chunk_size), resumable=True)
+                if file_id:
+                    request = self.drive_service.files().update(fileId=file_id, media_body=media, fields=DRIVE_FILE_FIELDS)
+                else:
+                    metadata = {'name': name}
+                    if parent_id:
+                        metadata['parents'] = [parent_id]
+                    request = self.drive_service.files().create(body=metadata, media_body=media, fields=DRIVE_FILE_FIELDS)
+
+                response = None
+                if session.get('resumable_uri'):
+                    request.resumable_uri = session['resumable_uri']
+                    response = self._resume_upload(request, media.size())
+                throttle = _Throttle(max_bytes_per_second)
+                while response is None:
+                    throttle.wait(min(media.chunksize(), media.size() - request.resumable_progress))
+                    _, response = request.next_chunk(num_retries=num_retries)
+                    session['resumable_uri'] = request.resumable_uri
+                    session['progress'] = request.resumable_progress if response is None else media.size()
+                    if progress is not None:
+                        progress(session['progress'], media.size())
+                return response
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+    def _resume_upload(self, request, size):
+        """Ask the server how much of an interrupted upload it has, returning the file metadata if it is complete."""
+        response, content = request.http.request(
+            request.resumable_uri, 'PUT', headers={'Content-Range': f'bytes */{size}', 'Content-Length': '0'})
+        if response.status in (200, 201):
+            return request.postproc(response, content)
+        if response.status == 308:
+            # The range header is missing when nothing was received yet
+            received = response.get('range')
+            request.resumable_progress = int(received.split('-')[1]) + 1 if received else 0
+            return None
+        if response.status in (404, 410):
+            # The session expired, so the upload starts over
+            request.resumable_uri = None
+            request.resumable_progress = 0
+            return None
+        raise HttpError(response, content, uri=request.resumable_uri)
+
+    def download_file(self, file_id, destination, chunk_size=DRIVE_CHUNK_SIZE, max_workers=4, max_bytes_per_second=None,
+                      progress=None, num_retries=3):
+        """
+        Downloads a file from Google Drive, fetching byte ranges in parallel.
+
+        Each worker fetches one chunk_size range at a time and writes it straight to its
+        offset in the destination, so at most max_workers chunks are held in memory.
+
+        Args:
+            file_id (str): The ID of the file.
+            destination (str, file object or buffer): A path, a seekable binary file object, or a writable
+                buffer at least as large as the file, such as a bytearray or mmap.mmap.
+            chunk_size (int, optional): The bytes fetched per request. Defaults to 8 MiB.
+            max_workers (int, optional): How many ranges are fetched at once. Defaults to 4.
+            max_bytes_per_second (float, optional): A cap on the download throughput, shared by all workers.
+            progress (callable, optional): Called with (bytes received, total bytes) after each range.
+            num_retries (int, optional): How many times each request is retried on transient errors. Defaults to 3.
+
+        Returns:
+            int: The size of the file in bytes, or None if an error occurred, including when the file
+                is a Google Workspace document (those must be exported) or a range came back short.
+        """
+        try:
+            metadata = self.drive_service.files().get(fileId=file_id, fields='size').execute(num_retries=num_retries)
+            if 'size' not in metadata:
+                raise ValueError(f"File {file_id} has no binary content, Google Workspace documents must be exported.")
+            size = int(metadata['size'])
+            ranges = [(start, min(start + chunk_size, size) - 1) for start in range(0, size, chunk_size)]
+            throttle = _Throttle(max_bytes_per_second)
+            received = [0]
+            progress_lock = threading.Lock()
+
+            with contextlib.ExitStack() as stack:
+                if isinstance(destination, (str, os.PathLike)):
+                    destination = stack.enter_context(open(destination, 'wb'))
+                    destination.truncate(size)
+                write = _range_writer(destination)
+
+                def fetch(byte_range):
+                    start, end = byte_range
+                    throttle.wait(end - start + 1)
+                    request = self.drive_service.files().get_media(fileId=file_id)
+                    request.headers['Range'] = f'bytes={start}-{end}'
+                    content = request.execute(num_retries=num_retries)
+                    if len(content) != end - start + 1:
+                        raise ValueError(f"Expected {end - start + 1} bytes at offset {start} of file {file_id}, got {len(content)}.")
+                    write(start, content)
+                    if progress is not None:
+                        with progress_lock:
+                            received[0] += len(content)
+                            progress(received[0], size)
+
+                self._run_parallel(fetch, ranges, max_workers)
+            return size
+        except (HttpError, ValueError) as err:
+            print(f"An error occurred: {err}")
+            return None
+
+
+class GoogleGmailTool(GoogleUtilsTool):
+    """
+    Tool for Google Gmail integration.
+
+    Message metadata is kept in a local cache (optionally saved to cache_path) along with
+    the mailbox historyId, so sync() only fetches what changed since the last call.
+    """
+    def __init__(self, tool_account_name: str = None, service_factory: GoogleServiceFactory = None, cache_path: str = None):
+        super().__init__(tool_account_name, service_factory)
+        self.cache_path = cache_path
+        self.messages = {}
+        self.history_id = None
+        self._cache_lock = threading.Lock()
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                cache = json.load(file)
+            self.messages = cache.get('messages', {})
+            self.history_id = cache.get('history_id')
+
+    @property
+    def gmail_service(self):
+        """The Gmail service of this tool's account for the current thread."""
+        return self._service('gmail', 'v1')
+
+    def list_message_ids(self, query=None, label_ids=None, max_results=None):
+        """
+        Lists the IDs of the messages matching a search, following every page.
+
+        Args:
+            query (str, optional): A Gmail search query, e.g. 'from:alice is:unread'.
+            label_ids (list, optional): Only list messages with all these labels.
+            max_results (int, optional): Stop after this many IDs.
+
+        Returns:
+            list: The message IDs, newest first, or None if an error occurred.
+        """
+        try:
+            return self._list_message_ids(query, label_ids, max_results)
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+    def _list_message_ids(self, query=None, label_ids=None, max_results=None):
+        """Page through messages.list, asking only for the IDs."""
+        message_ids = []
+        page_token = None
+        while max_results is None or len(message_ids) < max_results:
+            page_size = GMAIL_LIST_PAGE_SIZE if max_results is None else min(GMAIL_LIST_PAGE_SIZE, max_results - len(message_ids))
+            result = self.gmail_service.users().messages().list(
+                userId='me', q=query, labelIds=label_ids, maxResults=page_size, pageToken=page_token,
+                fields='messages/id,nextPageToken').execute()
+            message_ids.extend(message['id'] for message in result.get('messages', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+        return message_ids
+
+    def get_messages(self, message_ids, format='metadata', metadata_headers=GMAIL_METADATA_HEADERS, fields=GMAIL_MESSAGE_FIELDS,
+                     batch_size=GMAIL_BATCH_SIZE, num_retries=3, use_cache=True):
+        """
+        Fetches messages through the batch endpoint, up to batch_size per round trip.
+
+        Metadata in the default field mask and headers is served from the cache when possible
+        and cached once fetched; other masks always go to the API. Messages
+        deleted in the meantime are left out; throttled requests are retried in a later batch.
+
+        Args:
+            message_ids (list): The message IDs.
+            format (str, optional): 'metadata', 'minimal', 'full' or 'raw'. Defaults to 'metadata'.
+            metadata_headers (tuple, optional): The headers returned in 'metadata' format.
+            fields (str, optional): The field mask of each message, None for every field.
+            batch_size (int, optional): Requests per batch, at most 100. Defaults to 50.
+            num_retries (int, optional): How many times throttled requests are retried. Defaults to 3.
+            use_cache (bool, optional): Whether to use the metadata cache. Defaults to True.
+
+        Returns:
+            dict: The messages keyed by ID, in the order of message_ids, or None if an error occurred.
+        """
+        try:
+            message_ids = list(dict.fromkeys(message_ids))
+            # The cache holds messages in the default mask only; narrower or wider masks bypass it.
+            use_cache = (use_cache and format == 'metadata' and fields == GMAIL_MESSAGE_FIELDS
+                         and tuple(metadata_headers) == GMAIL_METADATA_HEADERS)
+            found = {message_id: self.messages[message_id] for message_id in message_ids if use_cache and message_id in self.messages}
+            params = {'format': format, 'fields': fields}
+            if format == 'metadata':
+                params['metadataHeaders'] = list(metadata_headers)
+            fetched = self._batch_get([message_id for message_id in message_ids if message_id not in found],
+                                      batch_size, num_retries, params)
+            if use_cache and fetched:
+                with self._cache_lock:
+                    self.messages.update(fetched)
+            found.update(fetched)
+            return {message_id: found[message_id] for message_id in message_ids if message_id in found}
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+    def _batch_get(self, message_ids, batch_size, num_retries, params):
+        """Run messages.get for every ID in batches, retrying throttled requests with backoff."""
+        results = {}
+        pending = message_ids
+        for attempt in range(num_retries + 1):
+            retry = []
+            errors = []
+
+            def callback(request_id, response, exception):
+                if exception is None:
+                    results[request_id] = response
+                elif _gmail_retryable(exception):
+                    retry.append((request_id, exception))
+                elif status_code(exception) != 404:
+                    errors.append(exception)
+
+            service = self.gmail_service
+            for start in range(0, len(pending), batch_size):
+                batch = service.new_batch_http_request(callback=callback)
+                for message_id in pending[start:start + batch_size]:
+                    batch.add(service.users().messages().get(userId='me', id=message_id, **params), request_id=message_id)
+                batch.execute()
+            if errors:
+                raise errors[0]
+            if not retry:
+                break
+            if attempt == num_retries:
+                raise retry[0][1]
+            pending = [request_id for request_id, _ in retry]
+            time.sleep(random.uniform(0, GMAIL_RETRY_DELAY * 2 ** attempt))
+        return results
+
+    def sync(self, batch_size=GMAIL_BATCH_SIZE, num_retries=3):
+        """
+        Brings the metadata cache up to date with the mailbox.
+
+        The first call lists the whole mailbox; later calls replay the history since the
+        last historyId, applying label changes and deletions locally and fetching only new
+        messages. When the history has expired, the mailbox is listed again.
+
+        Args:
+            batch_size (int, optional): Requests per batch when fetching messages. Defaults to 50.
+            num_retries (int, optional): How many times throttled requests are retried. Defaults to 3.
+
+        Returns:
+            dict: The 'added', 'deleted' and 'updated' message IDs, whether this was a 'full' sync and the
+                new 'history_id', or None if an error occurred.
+        """
+        try:
+            changes = None
+            if self.history_id is not None:
+                changes = self._history_changes()
+            if changes is None:
+                changes = self._full_sync_changes()
+
+            fetched = self._batch_get([message_id for message_id in changes['added'] if message_id not in changes['deleted']],
+                                      batch_size, num_retries,
+                                      {'format': 'metadata', 'metadataHeaders': list(GMAIL_METADATA_HEADERS), 'fields': GMAIL_MESSAGE_FIELDS})
+            with self._cache_lock:
+                if changes['full']:
+                    self.messages = {}
+                self.messages.update(fetched)
+                for message_id in changes['deleted']:
+                    self.messages.pop(message_id, None)
+                for message_id, (added, removed) in changes['labels'].items():
+                    message = self.messages.get(message_id)
+                    if message is not None:
+                        labels = [label for label in message.get('labelIds', []) if label not in removed]
+                        message['labelIds'] = labels + [label for label in added if label not in labels]
+                self.history_id = changes['history_id']
+            self.save_cache()
+            return {
+                'added': list(fetched),
+                'deleted': sorted(changes['deleted']),
+                'updated': [message_id for message_id in changes['labels'] if message_id in self.messages and message_id not in fetched],
+                'full': changes['full'],
+                'history_id': self.history_id,
+            }
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+    def _full_sync_changes(self):
+        """List the whole mailbox, taking the historyId first so changes made while listing are replayed next time."""
+        history_id = self.gmail_service.users().getProfile(userId='me', fields='historyId').execute()['historyId']
+        return {'added': self._list_message_ids(), 'deleted': set(), 'labels': {}, 'full': True, 'history_id': history_id}
+
+    def _history_changes(self):
+        """Collect the changes since the cached historyId, or None when that history is no longer available."""
+        added, deleted, labels = [], set(), {}
+        history_id = self.history_id
+        page_token = None
+        while True:
+            try:
+                result = self.gmail_service.users().history().list(
+                    userId='me', startHistoryId=self.history_id, pageToken=page_token, fields=GMAIL_HISTORY_FIELDS).execute()
+            except HttpError as err:
+                if status_code(err) == 404:
+                    return None
+                raise
+            for record in result.get('history', []):
+                for entry in record.get('messagesAdded', []):
+                    added.append(entry['message']['id'])
+                for entry in record.get('messagesDeleted', []):
+                    deleted.add(entry['message']['id'])
+                for key, index in (('labelsAdded', 0), ('labelsRemoved', 1)):
+                    for entry in record.get(key, []):
+                        change = labels.setdefault(entry['message']['id'], ([], []))
+                        for label in entry.get('labelIds', []):
+                            # The latest change of a label wins
+                            if label in change[1 - index]:
+                                change[1 - index].remove(label)
+                            change[index].append(label)
+            history_id = result.get('historyId', history_id)
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+        # Messages added since the last sync are fetched with their current labels
+        labels = {message_id: change for message_id, change in labels.items() if message_id not in added}
+        return {'added': list(dict.fromkeys(added)), 'deleted': deleted, 'labels': labels, 'full': False, 'history_id': history_id}
+
+    def save_cache(self):
+        """Write the metadata cache and historyId to cache_path, if set."""
+        if not self.cache_path:
+            return
+        with self._cache_lock:
+            content = json.dumps({'history_id': self.history_id, 'messages': self.messages})
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.cache_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temporary_path, self.cache_path)
+
+
+class GoogleCalendarTool(GoogleUtilsTool):
+    """
+    Tool for Google Calendar integration.
+
+    Events are kept in a local cache (optionally saved to cache_path) refreshed through
+    syncToken incremental syncs at most every refresh_interval seconds, and indexed by
+    time so event, busy and free queries are answered locally.
+    """
+    def __init__(self, tool_account_name: str = None, service_factory: GoogleServiceFactory = None, cache_path: str = None,
+                 refresh_interval: float = CALENDAR_REFRESH_INTERVAL):
+        super().__init__(tool_account_name, service_factory)
+        self.cache_path = cache_path
+        self.refresh_interval = refresh_interval
+        self.calendars = {}
+        self._indexes = {}
+        self._synced_at = {}
+        self._lock = threading.RLock()
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                self.calendars = json.load(file)
+
+    @property
+    def calendar_service(self):
+        """The Calendar service of this tool's account for the current thread."""
+        return self._service('calendar', 'v3')
+
+    def sync(self, calendar_id='primary'):
+        """
+        Brings the event cache of a calendar up to date.
+
+        The first sync lists every event; later ones only fetch the events changed since
+        the last syncToken. When the token has expired, every event is listed again.
+
+        Args:
+            calendar_id (str, optional): The calendar. Defaults to 'primary'.
+
+        Returns:
+            dict: The 'updated' and 'deleted' event IDs and whether this was a 'full' sync, or None if an error occurred.
+        """
+        try:
+            return self._sync(calendar_id)
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+    def _sync(self, calendar_id):
+        with self._lock:
+            calendar = self.calendars.get(calendar_id)
+            full = calendar is None or not calendar.get('sync_token')
+            if not full:
+                try:
+                    items, sync_token = self._list_changes(calendar_id, calendar['sync_token'])
+                except HttpError as err:
+                    # 410 Gone: the sync token expired and the cache has to be rebuilt
+                    if status_code(err) != 410:
+                        raise
+                    full = True
+            if full:
+                time_zone = self.calendar_service.calendars().get(calendarId=calendar_id, fields='timeZone').execute().get('timeZone', 'UTC')
+                items, sync_token = self._list_changes(calendar_id, None)
+                calendar = {'time_zone': time_zone, 'sync_token': None, 'events': {}}
+
+            updated, deleted = [], []
+            for event in items:
+                if event.get('status') == 'cancelled':
+                    if calendar['events'].pop(event['id'], None) is not None:
+                        deleted.append(event['id'])
+                elif 'start' in event and 'end' in event:
+                    calendar['events'][event['id']] = event
+                    updated.append(event['id'])
+            calendar['sync_token'] = sync_token
+            self.calendars[calendar_id] = calendar
+            if full or updated or deleted:
+                self._indexes.pop(calendar_id, None)
+            self._synced_at[calendar_id] = time.monotonic()
+            self.save_cache()
+            return {'updated': updated, 'deleted': deleted, 'full': full}
+
+    def _list_changes(self, calendar_id, sync_token):
+        """Page through events.list, returning the events and the next sync token."""
+        items = []
+        page_token = None
+        while True:
+            params = {'calendarId': calendar_id, 'pageToken': page_token, 'maxResults': CALENDAR_PAGE_SIZE,
+                      'singleEvents': True, 'fields': CALENDAR_EVENT_FIELDS}
+            if sync_token:
+                params['syncToken'] = sync_token
+            result = self.calendar_service.events().list(**params).execute()
+            items.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return items, result.get('nextSyncToken')
+
+    def _index(self, calendar_id, max_age=None):
+        """Return the interval index and time zone of a calendar, syncing first when the cache is too old."""
+        max_age = self.refresh_interval if max_age is None else max_age
+        with self._lock:
+            synced_at = self._synced_at.get(calendar_id)
+            if synced_at is None or time.monotonic() - synced_at > max_age:
+                self._sync(calendar_id)
+            calendar = self.calendars[calendar_id]
+            time_zone = ZoneInfo(calendar['time_zone'])
+            index = self._indexes.get(calendar_id)
+            if index is None:
+                index = self._indexes[calendar_id] = _IntervalIndex(
+                    _event_bounds(event, time_zone) + (event,) for event in calendar['events'].values())
+            return index, time_zone
+
+    def list_events(self, time_min, time_max, calendar_id='primary', max_age=None):
+        """
+        Lists the events overlapping a time window, from the local cache.
+
+        Args:
+            time_min (datetime): The start of the window, naive datetimes being in the calendar's time zone.
+            time_max (datetime): The end of the window.
+            calendar_id (str, optional): The calendar. Defaults to 'primary'.
+            max_age (float, optional): How old the cache may be, in seconds. Defaults to refresh_interval.
+
+        Returns:
+            list: The events, ordered by start, or None if an error occurred.
+        """
+        try:
+            index, time_zone = self._index(calendar_id, max_age)
+            return [event for _, _, event in index.overlapping(*self._window(time_min, time_max, time_zone))]
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+    def busy_intervals(self, time_min, time_max, calendar_id='primary', max_age=None):
+        """
+        Returns the busy periods of a time window, from the local cache.
+
+        Overlapping events are merged and events marked as free (transparent) are ignored.
 
-class GoogleGmailTool:
-    """Tool for Google Gmail integration."""
-    def __init__(self):
-        pass
+        Args:
+            time_min (datetime): The start of the window, naive datetimes being in the calendar's time zone.
+            time_max (datetime): The end of the window.
+            calendar_id (str, optional): The calendar. Defaults to 'primary'.
+            max_age (float, optional): How old the cache may be, in seconds. Defaults to refresh_interval.
+
+        Returns:
+            list: (start, end) datetime pairs in the calendar's time zone, clipped to the window, or None if an error occurred.
+        """
+        try:
+            index, time_zone = self._index(calendar_id, max_age)
+            start, end = self._window(time_min, time_max, time_zone)
+            busy = []
+            for event_start, event_end, event in index.overlapping(start, end):
+                if event.get('transparency') == 'transparent':
+                    continue
+                event_start, event_end = max(event_start, start), min(event_end, end)
+                if busy and event_start <= busy[-1][1]:
+                    busy[-1][1] = max(busy[-1][1], event_end)
+                else:
+                    busy.append([event_start, event_end])
+            return [(datetime.fromtimestamp(low, time_zone), datetime.fromtimestamp(high, time_zone)) for low, high in busy]
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            return None
+
+    def free_intervals(self, time_min, time_max, calendar_id='primary', min_duration=None, max_age=None):
+        """
+        Returns the free periods of a time window, from the local cache.
+
+        Args:
+            time_min (datetime): The start of the window, naive datetimes being in the calendar's time zone.
+            time_max (datetime): The end of the window.
+            calendar_id (str, optional): The calendar. Defaults to 'primary'.
+            min_duration (timedelta, optional): Leave out free periods shorter than this.
+            max_age (float, optional): How old the cache may be, in seconds. Defaults to refresh_interval.
+
+        Returns:
+            list: (start, end) datetime pairs in the calendar's time zone, or None if an error occurred.
+        """
+        busy = self.busy_intervals(time_min, time_max, calendar_id, max_age)
+        if busy is None:
+            return None
+        time_zone = ZoneInfo(self.calendars[calendar_id]['time_zone'])
+        start, end = (datetime.fromtimestamp(moment, time_zone) for moment in self._window(time_min, time_max, time_zone))
+        free = []
+        for busy_start, busy_end in busy + [(end, end)]:
+            if busy_start > start:
+                free.append((start, busy_start))
+            start = max(start, busy_end)
+        min_duration = min_duration or timedelta(0)
+        return [(low, high) for low, high in free if high - low >= min_duration]
 
+    @staticmethod
+    def _window(time_min, time_max, time_zone) -> tuple:
+        """Convert a window's datetimes to timestamps, naive ones being in time_zone."""
+        return tuple((moment if moment.tzinfo else moment.replace(tzinfo=time_zone)).timestamp() for moment in (time_min, time_max))
 
-class GoogleCalendarTool:
-    """Tool for Google Calendar integration."""
-    def __init__(self):
-        pass
+    def save_cache(self):
+        """Write the event cache and sync tokens to cache_path, if set."""
+        if not self.cache_path:
+            return
+        with self._lock:
+            content = json.dumps(self.calendars)
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.cache_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temporary_path, self.cache_path)
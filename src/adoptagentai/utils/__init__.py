@@ -1,4 +1,4 @@
-from adoptagentai.utils.api_keys import list_api_requirements, define_api_credentials, get_api_credentials, remove_api_credentials, list_api_accounts, list_configured_apis
+from adoptagentai.utils.api_keys import list_api_requirements, define_api_credentials, get_api_credentials, remove_api_credentials, list_api_accounts, list_configured_apis, reload_api_credentials, define_api_credentials_bulk, remove_api_credentials_bulk, register_api
 
 __all__ = [
     'list_api_requirements',
@@ -6,5 +6,9 @@ __all__ = [
     'get_api_credentials',
     'remove_api_credentials',
     'list_api_accounts',
-    'list_configured_apis'
+    'list_configured_apis',
+    'reload_api_credentials',
+    'define_api_credentials_bulk',
+    'remove_api_credentials_bulk',
+    'register_api'
 ]
\ No newline at end of file
@@ -1,5 +1,16 @@
+import io
 import os
-from dotenv import set_key, find_dotenv, unset_key, load_dotenv
+import tempfile
+import threading
+from contextlib import contextmanager
+from dotenv import find_dotenv, dotenv_values
+from dotenv.parser import parse_stream
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
 
 
 API_REQUIREMENTS = {
@@ -8,6 +19,197 @@ API_REQUIREMENTS = {
     "google": ["client_id", "client_secret"],
 }
 
+# Credentials an account may define on top of the required ones, e.g. GPT-4O_LOCAL_BASE_URL for a compatible server
+API_OPTIONAL_CREDENTIALS = {
+    "gpt-4o": ["base_url", "organization"],
+    "gpt-4o-mini": ["base_url", "organization"],
+    "google": ["refresh_token"],
+}
+
+
+def _credential_keys(api_name: str) -> list:
+    """Return the required then the optional credential keys of an API."""
+    return API_REQUIREMENTS[api_name] + API_OPTIONAL_CREDENTIALS.get(api_name, [])
+
+
+class _CredentialStore:
+    """
+    Loads the .env file into os.environ once and reloads it only when the file changes.
+
+    Each lookup costs a single stat of the file. Variables already set in the process
+    environment take precedence over the file, as with dotenv.load_dotenv; values that
+    came from the file are updated or removed when the file changes.
+    """
+    def __init__(self, dotenv_path: str = None):
+        self._dotenv_path = dotenv_path
+        self._path = None
+        self._state = None
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self) -> None:
+        """Load the .env file if it was never loaded or changed on disk since."""
+        path = self._path
+        if self._state is not None and self._state == (path, self._mtime(path)):
+            return
+        with self._lock:
+            if self._path is None:
+                self._path = self._dotenv_path or find_dotenv()
+            path = self._path
+            mtime = self._mtime(path)
+            if self._state != (path, mtime):
+                self._load(path)
+                self._state = (path, mtime)
+
+    def reload(self) -> None:
+        """Forget the cached location and contents so the next lookup reloads the file."""
+        with self._lock:
+            self._path = None
+            self._state = None
+
+    def _load(self, path: str) -> None:
+        values = {key: value for key, value in dotenv_values(path).items() if value is not None} if path else {}
+        changed = False
+
+        for key, value in self._loaded.items():
+            if key not in values and os.environ.get(key) == value:
+                del os.environ[key]
+                changed = True
+
+        loaded = {}
+        for key, value in values.items():
+            if key not in os.environ or os.environ[key] == self._loaded.get(key):
+                changed = changed or os.environ.get(key) != value
+                os.environ[key] = value
+                loaded[key] = value
+        self._loaded = loaded
+
+        if changed:
+            _account_registry.invalidate()
+
+    @staticmethod
+    def _mtime(path: str):
+        if not path:
+            return None
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+
+class _AccountRegistry:
+    """
+    Index of the accounts configured in the environment, parsed from API_ACCOUNT_KEY names.
+
+    The index is built once from os.environ. define_api_credentials and
+    remove_api_credentials update it and the environment together, and register_api,
+    reload_api_credentials and a changed .env file invalidate it. Variables added to or
+    removed from os.environ directly are noticed by comparing the variable names with
+    those the index was built from, which costs no parsing.
+    """
+    def __init__(self):
+        self._accounts = None
+        self._names = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse(env_key: str):
+        """Split an environment variable name into (api, ACCOUNT, credential), or return None."""
+        for api_name in API_REQUIREMENTS:
+            prefix = f"{api_name.upper()}_"
+            if not env_key.startswith(prefix):
+                continue
+            for requirement in _credential_keys(api_name):
+                suffix = f"_{requirement.upper()}"
+                if env_key.endswith(suffix) and len(env_key) > len(prefix) + len(suffix):
+                    return api_name, env_key[len(prefix):-len(suffix)], requirement.lower()
+        return None
+
+    def accounts(self, api_name: str) -> list:
+        """Return the accounts configured for an API."""
+        return list(self._index().get(api_name, ()))
+
+    def apis(self) -> list:
+        """Return the APIs with at least one configured account."""
+        return [api_name for api_name, accounts in self._index().items() if accounts]
+
+    def update(self, environ: dict, added=(), removed=()) -> None:
+        """
+        Apply credential changes to os.environ and record the accounts they add or remove.
+
+        environ maps variable names to their new value, or to None to unset them.
+        """
+        with self._lock:
+            current = self._accounts is not None and self._is_current()
+            for key, value in environ.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                    self._names.discard(key)
+                else:
+                    os.environ[key] = value
+                    self._names.add(key)
+            if not current:
+                self._accounts = None
+                return
+            for api_name, account_name in added:
+                self._accounts.setdefault(api_name, {})[account_name.upper()] = None
+            for api_name, account_name in removed:
+                self._accounts.get(api_name, {}).pop(account_name.upper(), None)
+
+    def invalidate(self) -> None:
+        """Rebuild the index on the next lookup."""
+        with self._lock:
+            self._accounts = None
+
+    def _is_current(self) -> bool:
+        return len(self._names) == len(os.environ) and self._names == os.environ.keys()
+
+    def _index(self) -> dict:
+        accounts = self._accounts
+        if accounts is not None and self._is_current():
+            return accounts
+        with self._lock:
+            names = list(os.environ)
+            accounts = {}
+            for env_key in names:
+                parsed = self.parse(env_key)
+                if parsed:
+                    accounts.setdefault(parsed[0], {})[parsed[1]] = None
+            self._accounts, self._names = accounts, set(names)
+            return accounts
+
+
+_credential_store = _CredentialStore()
+_account_registry = _AccountRegistry()
+
+
+def reload_api_credentials() -> None:
+    """
+    Forces the .env file to be located and parsed again on the next credential lookup.
+    
+    The file is already reloaded automatically when its modification time changes; this is
+    for cases such as a changed working directory or a file replaced within the same tick.
+    """
+    _credential_store.reload()
+    _account_registry.invalidate()
+
+
+def register_api(api_name: str, requirements: list, optional: list = ()) -> None:
+    """
+    Adds a supported API, or extends one, and invalidates the account index.
+
+    Args:
+        api_name (str): The name of the API.
+        requirements (list): The required credential keys; kept as is if the API is already registered.
+        optional (list, optional): Credential keys an account may define on top of the required ones.
+    """
+    api_name = api_name.lower()
+    API_REQUIREMENTS.setdefault(api_name, list(requirements))
+    if optional:
+        known = API_OPTIONAL_CREDENTIALS.setdefault(api_name, [])
+        known.extend(key for key in optional if key not in known)
+    _account_registry.invalidate()
+
 
 def list_api_requirements() -> dict:
     """
@@ -21,7 +223,7 @@ def list_api_requirements() -> dict:
 
 def define_api_credentials(api_name: str, account_name: str = "default", **credentials) -> bool:
     """
-    Stores API credentials in the .env file.
+    Stores API credentials in the .env file, with the same locked rewrite as define_api_credentials_bulk.
     
     Args:
         api_name (str): The name of the API.
@@ -34,8 +236,11 @@ def define_api_credentials(api_name: str, account_name: str = "default", **crede
     Raises:
         ValueError: If the API is not supported or required credentials are missing.
     """
-    api_name = api_name.lower()
-    
+    return define_api_credentials_bulk([(api_name, account_name, credentials)])
+
+
+def _validate_credentials(api_name: str, credentials: dict) -> dict:
+    """Check an API is supported and all its required credentials are given, returning them lowercased."""
     if api_name not in API_REQUIREMENTS:
         raise ValueError(f"API {api_name} not supported.")
     
@@ -47,22 +252,159 @@ def define_api_credentials(api_name: str, account_name: str = "default", **crede
     if missing_credentials:
         raise ValueError(f"Missing required credentials for {api_name}: {', '.join(missing_credentials)}")
 
-    dotenv_path = find_dotenv()
-    if not dotenv_path:
-        dotenv_path = '.env'
-        with open(dotenv_path, 'a'):
-            pass
+    return provided_credentials
+
 
-    for key, value in provided_credentials.items():
-        env_key = f"{api_name.upper()}_{account_name.upper()}_{key.upper()}"
-        set_key('.env', env_key, value)
+@contextmanager
+def _dotenv_lock(dotenv_path: str):
+    """Hold an exclusive inter-process lock on a sidecar file next to the .env file."""
+    with open(f"{dotenv_path}.lock", "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _rewrite_dotenv(dotenv_path: str, updates: dict, removals: set) -> int:
+    """
+    Applies many key changes to a .env file in a single locked read-modify-write.
+
+    The file is split into entries with dotenv's own parser, so a quoted value spanning
+    several lines is replaced or removed as a whole; every other entry, comment and
+    blank line is kept as written. The new content is written to a temporary file in
+    the same directory, synced, and renamed over the original, so readers never see a
+    half-written file.
+
+    Returns:
+        int: The number of lines removed.
+    """
+    with _dotenv_lock(dotenv_path):
+        try:
+            with open(dotenv_path, encoding="utf-8") as dotenv_file:
+                content = dotenv_file.read()
+            mode = os.stat(dotenv_path).st_mode & 0o777
+        except FileNotFoundError:
+            content, mode = "", 0o600
+
+        pending = dict(updates)
+        output, removed = [], 0
+        for binding in parse_stream(io.StringIO(content)):
+            key = binding.key
+            if key in removals:
+                removed += 1
+                continue
+            if key in updates:
+                if key in pending:
+                    output.append(_dotenv_line(key, pending.pop(key)) + "\n")
+                continue
+            output.append(binding.original.string)
+        if output and not output[-1].endswith("\n"):
+            output[-1] += "\n"
+        output.extend(_dotenv_line(key, value) + "\n" for key, value in pending.items())
+
+        directory = os.path.dirname(os.path.abspath(dotenv_path))
+        descriptor, temp_path = tempfile.mkstemp(prefix=".env.", dir=directory)
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as temp_file:
+                temp_file.write("".join(output))
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, dotenv_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return removed
+
+
+def _dotenv_line(key: str, value: str) -> str:
+    """Format a .env line the way dotenv.set_key does."""
+    escaped = value.replace("'", "\\'")
+    return f"{key}='{escaped}'"
+
+
+def define_api_credentials_bulk(entries, dotenv_path: str = None) -> bool:
+    """
+    Stores many API credentials in the .env file with one atomic rewrite.
+
+    The credentials are also set in the environment, so they can be read back with
+    get_api_credentials even when dotenv_path is not the .env file that is loaded.
+    
+    Args:
+        entries (iterable): (api_name, account_name, credentials) tuples, credentials being a dict.
+        dotenv_path (str, optional): The .env file to write. Defaults to the one found by dotenv, or ".env".
+        
+    Returns:
+        bool: True if credentials were stored successfully.
+        
+    Raises:
+        ValueError: If an API is not supported or required credentials are missing; nothing is written then.
+    """
+    updates, accounts = {}, []
+    for api_name, account_name, credentials in entries:
+        api_name = api_name.lower()
+        account_name = account_name or "default"
+        for key, value in _validate_credentials(api_name, credentials).items():
+            updates[f"{api_name.upper()}_{account_name.upper()}_{key.upper()}"] = value
+        accounts.append((api_name, account_name))
+
+    _rewrite_dotenv(dotenv_path or find_dotenv() or '.env', updates, set())
+
+    _account_registry.update(updates, added=accounts)
+    _credential_store.reload()
 
     return True
 
 
+def remove_api_credentials_bulk(entries, dotenv_path: str = None) -> bool:
+    """
+    Removes many API credentials from the .env file with one atomic rewrite.
+    
+    Args:
+        entries (iterable): (api_name, account_name) tuples.
+        dotenv_path (str, optional): The .env file to write. Defaults to the one found by dotenv.
+        
+    Returns:
+        bool: True if any credentials were removed, False otherwise.
+        
+    Raises:
+        ValueError: If an API is not supported; nothing is removed then.
+    """
+    removals, accounts = set(), []
+    for api_name, account_name in entries:
+        api_name = api_name.lower()
+        account_name = account_name or "default"
+        if api_name not in API_REQUIREMENTS:
+            raise ValueError(f"API {api_name} not supported.")
+        for req_key in _credential_keys(api_name):
+            removals.add(f"{api_name.upper()}_{account_name.upper()}_{req_key.upper()}")
+        accounts.append((api_name, account_name))
+
+    dotenv_path = dotenv_path or find_dotenv()
+    if not dotenv_path:
+        return False
+
+    removed = _rewrite_dotenv(dotenv_path, {}, removals) > 0 or any(key in os.environ for key in removals)
+
+    _account_registry.update(dict.fromkeys(removals), removed=accounts)
+    _credential_store.reload()
+
+    return removed
+
+
 def get_api_credentials(api_name: str, account_name: str = "default") -> dict:
     """
     Retrieves API credentials from environment variables.
+
+    Optional credentials (API_OPTIONAL_CREDENTIALS) are included when they are set.
     
     Args:
         api_name (str): The name of the API.
@@ -76,7 +418,7 @@ def get_api_credentials(api_name: str, account_name: str = "default") -> dict:
     """
     api_name = api_name.lower()
     
-    load_dotenv()
+    _credential_store.ensure_loaded()
     
     if api_name not in API_REQUIREMENTS:
         raise ValueError(f"API {api_name} not supported.")
@@ -85,7 +427,7 @@ def get_api_credentials(api_name: str, account_name: str = "default") -> dict:
     
     credentials = {}
 
-    for req_key in API_REQUIREMENTS[api_name]:
+    for req_key in _credential_keys(api_name):
         env_key = f"{prefix}_{req_key.upper()}"
         if env_key in os.environ:
             credentials[req_key.lower()] = os.getenv(env_key)
@@ -95,7 +437,7 @@ def get_api_credentials(api_name: str, account_name: str = "default") -> dict:
 
 def remove_api_credentials(api_name: str, account_name: str = "default") -> bool:
     """
-    Removes API credentials from the .env file.
+    Removes API credentials from the .env file, with the same locked rewrite as remove_api_credentials_bulk.
     
     Args:
         api_name (str): The name of the API.
@@ -109,25 +451,29 @@ def remove_api_credentials(api_name: str, account_name: str = "default") -> bool
     """
     api_name = api_name.lower()
     
-    load_dotenv()
+    _credential_store.ensure_loaded()
     
     if api_name not in API_REQUIREMENTS:
         raise ValueError(f"API {api_name} not supported.")
     
-    prefix = f"{api_name.upper()}_{account_name.upper()}"
+    account = account_name.upper()
 
     dotenv_path = find_dotenv()
     if not dotenv_path:
         return False
     
-    removed = False
-    for key in list(os.environ.keys()):
-        if key.startswith(prefix):
-            unset_key(dotenv_path, key)
-            del os.environ[key]
-            removed = True
+    keys = set()
+    for key in os.environ:
+        parsed = _AccountRegistry.parse(key)
+        if parsed and parsed[:2] == (api_name, account):
+            keys.add(key)
+
+    removed = bool(keys)
+    if removed:
+        _rewrite_dotenv(dotenv_path, {}, keys)
     
-    load_dotenv()
+    _account_registry.update(dict.fromkeys(keys), removed=[(api_name, account)])
+    _credential_store.reload()
     
     return removed
 
@@ -150,16 +496,8 @@ def list_api_accounts(api_name: str) -> list:
     if api_name not in API_REQUIREMENTS:
         raise ValueError(f"API {api_name} not supported.")
     
-    prefix = f"{api_name.upper()}_"
-    
-    accounts = set()
-    for key in os.environ:
-        if key.startswith(prefix):
-            parts = key.split('_')
-            if len(parts) > 1:
-                accounts.add(parts[1])
-                
-    return list(accounts)
+    _credential_store.ensure_loaded()
+    return _account_registry.accounts(api_name)
 
 
 def list_configured_apis() -> list:
@@ -169,11 +507,5 @@ def list_configured_apis() -> list:
     Returns:
         list: Names of APIs with configured credentials.
     """
-    configured_apis = set()
-    
-    for key in os.environ:
-        parts = key.split('_')
-        if len(parts) >= 3 and parts[0] in [api.upper() for api in API_REQUIREMENTS]:
-            configured_apis.add(parts[0].lower())
-    
-    return list(configured_apis)
+    _credential_store.ensure_loaded()
+    return _account_registry.apis()
@@ -0,0 +1,602 @@
+import json
+import re
+import threading
+import time
+from contextlib import ExitStack
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pytest
+
+from benchmarks.fake_openai import FakeResponsesServer
+
+
+@pytest.fixture
+def make_fake_openai_server():
+    """Fixture returning a factory of throttling fake OpenAI servers, each on a free local port"""
+    with ExitStack() as servers:
+        def make(limit: int = None, window: float = 1.0, latency: float = 0.0) -> FakeResponsesServer:
+            return servers.enter_context(FakeResponsesServer(latency=latency, limit=limit, window=window))
+
+        yield make
+
+
+@pytest.fixture
+def fake_openai_server(make_fake_openai_server):
+    """Fixture running a throttling fake OpenAI server on a free local port"""
+    return make_fake_openai_server()
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for letter in letters.upper():
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+def _column_letters(number: int) -> str:
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _parse_a1(range_name: str) -> tuple:
+    """Parse 'Sheet!A1:B2' into (sheet, first row, first column, last row, last column), None bounds meaning open"""
+    sheet, _, cells = range_name.rpartition("!")
+    sheet = (sheet or "Sheet1").strip("'")
+    start, _, end = cells.partition(":")
+    start_column, start_row = re.match(r"([A-Za-z]*)(\d*)", start).groups()
+    if end:
+        end_column, end_row = re.match(r"([A-Za-z]*)(\d*)", end).groups()
+    else:
+        end_column, end_row = start_column, start_row
+    return (sheet, int(start_row or 1), _column_number(start_column or "A"),
+            int(end_row) if end_row else None, _column_number(end_column) if end_column else None)
+
+
+class FakeSheetsServer(ThreadingHTTPServer):
+    """Local stand-in for the Sheets API values endpoints, keeping cells in memory"""
+    daemon_threads = True
+
+    def __init__(self, max_body_bytes: int = None):
+        super().__init__(("127.0.0.1", 0), _FakeSheetsHandler)
+        self.max_body_bytes = max_body_bytes
+        self.grid_size = {}
+        self.cells = {}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def write(self, range_name: str, values: list) -> dict:
+        sheet, row, column, _, _ = _parse_a1(range_name)
+        with self._lock:
+            for row_offset, values_row in enumerate(values):
+                for column_offset, value in enumerate(values_row):
+                    self.cells[(sheet, row + row_offset, column + column_offset)] = value
+        width = max((len(values_row) for values_row in values), default=0)
+        return {
+            "updatedRange": f"{sheet}!{_column_letters(column)}{row}:{_column_letters(column + width - 1)}{row + len(values) - 1}",
+            "updatedRows": len(values),
+            "updatedColumns": width,
+            "updatedCells": sum(len(values_row) for values_row in values),
+        }
+
+    def sheets(self) -> list:
+        """Return the sheet properties, with grids as large as grid_size or just large enough for the cells"""
+        with self._lock:
+            titles = sorted({sheet for sheet, _, _ in self.cells} | set(self.grid_size)) or ["Sheet1"]
+            sheets = []
+            for title in titles:
+                rows, columns = self.grid_size.get(title, (0, 0))
+                rows = max([rows] + [r for s, r, _ in self.cells if s == title])
+                columns = max([columns] + [c for s, _, c in self.cells if s == title])
+                sheets.append({"properties": {"title": title, "gridProperties": {"rowCount": rows, "columnCount": columns}}})
+            return sheets
+
+    def read(self, range_name: str) -> dict:
+        sheet, row, column, end_row, end_column = _parse_a1(range_name)
+        with self._lock:
+            used = [(r, c) for (s, r, c) in self.cells if s == sheet]
+            end_row = end_row or max((r for r, _ in used), default=row)
+            end_column = end_column or max((c for _, c in used), default=column)
+            values = [[self.cells.get((sheet, r, c), "") for c in range(column, end_column + 1)] for r in range(row, end_row + 1)]
+        # Like Sheets, trailing empty cells and rows are left out
+        values = [values_row[:max((i + 1 for i, value in enumerate(values_row) if value != ""), default=0)] for values_row in values]
+        while values and not values[-1]:
+            values.pop()
+        value_range = {"range": f"{sheet}!{_column_letters(column)}{row}:{_column_letters(end_column)}{end_row}", "majorDimension": "ROWS"}
+        if values:
+            value_range["values"] = values
+        return value_range
+
+
+class _FakeSheetsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self, method: str):
+        url = urlsplit(self.path)
+        if method == "GET" and re.match(r"^/v4/spreadsheets/[^/]+$", url.path):
+            self.server.requests.append((method, url.path, 0))
+            return self._send(200, {"sheets": self.server.sheets()})
+        match = re.match(r"^/v4/spreadsheets/([^/]+)/values(?::(\w+)|/(.+))$", url.path)
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        self.server.requests.append((method, url.path, length))
+        if match is None:
+            return self._send(404, {"error": {"code": 404, "message": "Not found"}})
+        if self.server.max_body_bytes is not None and length > self.server.max_body_bytes:
+            return self._send(413, {"error": {"code": 413, "message": "Request payload size exceeds the limit"}})
+
+        spreadsheet_id, action, range_name = match.group(1), match.group(2), match.group(3)
+        query = parse_qs(url.query)
+        if self.headers.get("X-HTTP-Method-Override"):
+            # The client library moves the query of long GET URLs into a POST body
+            method = self.headers["X-HTTP-Method-Override"]
+            query.update(parse_qs(raw.decode("utf-8")))
+            raw = b""
+        body = json.loads(raw) if raw else {}
+        if method == "GET" and action == "batchGet":
+            return self._send(200, {"spreadsheetId": spreadsheet_id, "valueRanges": [self.server.read(name) for name in query.get("ranges", [])]})
+        if method == "GET" and range_name:
+            return self._send(200, self.server.read(unquote(range_name)))
+        if method == "PUT" and range_name:
+            return self._send(200, dict(self.server.write(unquote(range_name), body.get("values", [])), spreadsheetId=spreadsheet_id))
+        if method == "POST" and action == "batchUpdate":
+            responses = [dict(self.server.write(entry["range"], entry.get("values", [])), spreadsheetId=spreadsheet_id) for entry in body.get("data", [])]
+            return self._send(200, {
+                "spreadsheetId": spreadsheet_id,
+                "totalUpdatedRows": sum(response["updatedRows"] for response in responses),
+                "totalUpdatedColumns": max((response["updatedColumns"] for response in responses), default=0),
+                "totalUpdatedCells": sum(response["updatedCells"] for response in responses),
+                "totalUpdatedSheets": 1 if responses else 0,
+                "responses": responses,
+            })
+        return self._send(400, {"error": {"code": 400, "message": "Unsupported request"}})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_POST(self):
+        self._route("POST")
+
+
+@pytest.fixture
+def fake_sheets_server():
+    """Fixture running a Sheets API stand-in on a free local port"""
+    server = FakeSheetsServer()
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeDriveServer(ThreadingHTTPServer):
+    """Local stand-in for the Drive API files and resumable upload endpoints, keeping files in memory"""
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _FakeDriveHandler)
+        self.latency = latency
+        self.files = {}
+        self.uploads = {}
+        self.requests = []
+        self.fail_chunks = set()
+        self.chunk_puts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._ids = iter(range(1, 1_000_000))
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def add_file(self, content: bytes, name: str = "file.bin", mime_type: str = "application/octet-stream") -> str:
+        with self._lock:
+            file_id = f"file-{next(self._ids)}"
+            self.files[file_id] = {"name": name, "mimeType": mime_type, "content": bytes(content)}
+        return file_id
+
+    def metadata(self, file_id: str) -> dict:
+        file = self.files[file_id]
+        metadata = {"id": file_id, "name": file["name"], "mimeType": file["mimeType"]}
+        # Like Drive, Google Workspace documents have no binary size
+        if not file["mimeType"].startswith("application/vnd.google-apps."):
+            metadata["size"] = str(len(file["content"]))
+        return metadata
+
+
+class _FakeDriveHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body=None, headers: dict = None):
+        payload = body if isinstance(body, bytes) else json.dumps(body if body is not None else {}).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/octet-stream" if isinstance(body, bytes) else "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _start_upload(self, file_id: str, metadata: dict):
+        server = self.server
+        with server._lock:
+            upload_id = str(next(server._ids))
+            server.uploads[upload_id] = {"file_id": file_id, "metadata": metadata, "data": bytearray(),
+                                         "size": int(self.headers.get("X-Upload-Content-Length", -1))}
+        location = f"{server.url}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+        return self._send(200, {}, {"Location": location})
+
+    def _put_chunk(self, upload_id: str, raw: bytes):
+        server = self.server
+        upload = server.uploads.get(upload_id)
+        if upload is None:
+            return self._send(404, {"error": {"code": 404, "message": "Upload session not found"}})
+        content_range = self.headers.get("Content-Range", "")
+        match = re.match(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)", content_range)
+        if match and match.group(3) != "*":
+            upload["size"] = int(match.group(3))
+        if match and match.group(1) is not None:
+            with server._lock:
+                server.chunk_puts += 1
+                failing = server.chunk_puts in server.fail_chunks
+            if failing:
+                return self._send(503, {"error": {"code": 503, "message": "Backend unavailable"}})
+            if int(match.group(1)) != len(upload["data"]):
+                return self._send(400, {"error": {"code": 400, "message": "Chunk does not start at the received offset"}})
+            upload["data"] += raw
+        if len(upload["data"]) < max(upload["size"], 0):
+            headers = {"Range": f"bytes=0-{len(upload['data']) - 1}"} if upload["data"] else {}
+            return self._send(308, b"", headers)
+
+        with server._lock:
+            file_id = upload["file_id"] or f"file-{next(server._ids)}"
+            file = server.files.setdefault(file_id, {"name": "Untitled", "mimeType": "application/octet-stream"})
+            file.update({key: value for key, value in upload["metadata"].items() if key in ("name", "mimeType")})
+            file["content"] = bytes(upload["data"])
+        return self._send(200, server.metadata(file_id))
+
+    def _download(self, file_id: str):
+        server = self.server
+        content = server.files[file_id]["content"]
+        with server._lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match is None:
+                return self._send(200, content)
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else len(content) - 1, len(content) - 1)
+            return self._send(206, content[start:end + 1], {"Content-Range": f"bytes {start}-{end}/{len(content)}"})
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+
+    def _route(self, method: str):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        self.server.requests.append((method, url.path, self.headers.get("Content-Range") or self.headers.get("Range")))
+
+        upload = re.match(r"^/upload/drive/v3/files(?:/([^/]+))?$", url.path)
+        if upload and "upload_id" in query and method == "PUT":
+            return self._put_chunk(query["upload_id"][0], raw)
+        if upload and method in ("POST", "PATCH"):
+            file_id = upload.group(1)
+            if file_id is not None and file_id not in self.server.files:
+                return self._send(404, {"error": {"code": 404, "message": "File not found"}})
+            return self._start_upload(file_id, json.loads(raw) if raw else {})
+
+        match = re.match(r"^/drive/v3/files/([^/]+)$", url.path)
+        if match and method == "GET":
+            file_id = match.group(1)
+            if file_id not in self.server.files:
+                return self._send(404, {"error": {"code": 404, "message": "File not found"}})
+            if query.get("alt") == ["media"]:
+                return self._download(file_id)
+            return self._send(200, self.server.metadata(file_id))
+        return self._send(400, {"error": {"code": 400, "message": "Unsupported request"}})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PATCH(self):
+        self._route("PATCH")
+
+
+@pytest.fixture
+def fake_drive_server():
+    """Fixture running a Drive API stand-in on a free local port"""
+    server = FakeDriveServer()
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeGmailServer(ThreadingHTTPServer):
+    """Local stand-in for the Gmail messages, history and batch endpoints, keeping a mailbox in memory"""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _FakeGmailHandler)
+        self.messages = {}
+        self.history = []
+        self.history_id = 1000
+        self.min_history_id = 0
+        self.history_page_size = 100
+        self.throttle_ids = {}
+        self.requests = []
+        self.batches = []
+        self._ids = iter(range(1, 1_000_000))
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def _record(self, **change) -> None:
+        self.history_id += 1
+        self.history.append(dict(change, id=str(self.history_id)))
+
+    def add_message(self, subject: str, sender: str = "alice@example.com", labels: list = ("INBOX",)) -> str:
+        with self._lock:
+            message_id = f"m{next(self._ids):04d}"
+            self.messages[message_id] = {
+                "id": message_id, "threadId": f"t{message_id}", "labelIds": list(labels), "snippet": subject.lower(),
+                "historyId": str(self.history_id + 1), "internalDate": str(1_700_000_000_000 + len(self.messages)),
+                "sizeEstimate": 1000 + len(subject), "raw": "UmF3IG1lc3NhZ2U=",
+                "payload": {"mimeType": "text/plain", "body": {"data": "Qm9keQ=="},
+                            "headers": [{"name": "From", "value": sender}, {"name": "Subject", "value": subject},
+                                        {"name": "X-Mailer", "value": "fake"}]},
+            }
+            self._record(messagesAdded=[{"message": {"id": message_id, "threadId": f"t{message_id}", "labelIds": list(labels)}}])
+        return message_id
+
+    def delete_message(self, message_id: str) -> None:
+        with self._lock:
+            del self.messages[message_id]
+            self._record(messagesDeleted=[{"message": {"id": message_id}}])
+
+    def modify_labels(self, message_id: str, add: list = (), remove: list = ()) -> None:
+        with self._lock:
+            message = self.messages[message_id]
+            message["labelIds"] = [label for label in message["labelIds"] if label not in remove] + list(add)
+            if add:
+                self._record(labelsAdded=[{"message": {"id": message_id}, "labelIds": list(add)}])
+            if remove:
+                self._record(labelsRemoved=[{"message": {"id": message_id}, "labelIds": list(remove)}])
+
+    def dispatch(self, method: str, target: str) -> tuple:
+        """Answer one API request, returning (status, body)"""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        self.requests.append((method, url.path, query))
+        path = url.path.replace("/gmail/v1/users/me", "", 1)
+        with self._lock:
+            if path == "/profile":
+                return 200, {"emailAddress": "me@example.com", "historyId": str(self.history_id)}
+            if path == "/messages":
+                ids = sorted(self.messages, reverse=True)
+                start = int(query.get("pageToken", ["0"])[0])
+                size = int(query.get("maxResults", ["100"])[0])
+                body = {"messages": [{"id": message_id, "threadId": f"t{message_id}"} for message_id in ids[start:start + size]]}
+                if start + size < len(ids):
+                    body["nextPageToken"] = str(start + size)
+                return 200, body
+            match = re.match(r"^/messages/([^/]+)$", path)
+            if match:
+                message_id = match.group(1)
+                if self.throttle_ids.get(message_id):
+                    self.throttle_ids[message_id] -= 1
+                    return 429, {"error": {"code": 429, "message": "Too many concurrent requests for user"}}
+                message = self.messages.get(message_id)
+                if message is None:
+                    return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+                message = json.loads(json.dumps(message))
+                if query.get("format", ["full"])[0] == "metadata":
+                    wanted = set(query.get("metadataHeaders", []))
+                    message["payload"] = {"headers": [header for header in message["payload"]["headers"] if header["name"] in wanted]}
+                    del message["raw"]
+                return 200, message
+            if path == "/history":
+                start_history_id = int(query["startHistoryId"][0])
+                if start_history_id < self.min_history_id:
+                    return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+                records = [record for record in self.history if int(record["id"]) > start_history_id]
+                offset = int(query.get("pageToken", ["0"])[0])
+                page = records[offset:offset + self.history_page_size]
+                body = {"historyId": str(self.history_id)}
+                if page:
+                    body["history"] = page
+                if offset + self.history_page_size < len(records):
+                    body["nextPageToken"] = str(offset + self.history_page_size)
+                return 200, body
+        return 400, {"error": {"code": 400, "message": "Unsupported request"}}
+
+
+class _FakeGmailHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _batch(self, raw: bytes):
+        """Split a multipart/mixed batch into its requests and answer them in one multipart response"""
+        message = BytesParser().parsebytes(f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + raw)
+        parts = []
+        for part in message.get_payload():
+            request_line = part.get_payload().split("\n", 1)[0].strip()
+            method, target, _ = request_line.split(" ")
+            status, body = self.server.dispatch(method, target)
+            parts.append((part["Content-ID"], status, body))
+        self.server.batches.append(len(parts))
+
+        lines = []
+        for content_id, status, body in parts:
+            lines += ["--batch_response", "Content-Type: application/http", f"Content-ID: <response-{content_id.strip('<>')}>", "",
+                      f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}", "Content-Type: application/json", "", json.dumps(body)]
+        lines.append("--batch_response--")
+        self._send(200, "\r\n".join(lines).encode("utf-8"), "multipart/mixed; boundary=batch_response")
+
+    def do_GET(self):
+        status, body = self.server.dispatch("GET", self.path)
+        self._send(status, json.dumps(body).encode("utf-8"))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        if urlsplit(self.path).path.startswith("/batch"):
+            return self._batch(raw)
+        self._send(400, json.dumps({"error": {"code": 400, "message": "Unsupported request"}}).encode("utf-8"))
+
+
+@pytest.fixture
+def fake_gmail_server():
+    """Fixture running a Gmail API stand-in on a free local port"""
+    server = FakeGmailServer()
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_google_factory(tmp_path):
+    """Factory fixture building a GoogleServiceFactory whose cached discovery documents point an API to a local stand-in"""
+    pytest.importorskip("googleapiclient")
+    from googleapiclient.discovery_cache import get_static_doc
+    from adoptagentai.integrations.google.services import GoogleServiceFactory
+
+    discovery_cache_dir = tmp_path / "discovery"
+    discovery_cache_dir.mkdir(exist_ok=True)
+
+    def make(api: str, version: str, url: str) -> GoogleServiceFactory:
+        # api_endpoint overrides keep https for upload and batch URLs, so the root URL of the document is changed instead
+        document = json.loads(get_static_doc(api, version))
+        document["rootUrl"] = f"{url}/"
+        (discovery_cache_dir / f"{api}.{version}.json").write_text(json.dumps(document))
+        return GoogleServiceFactory(discovery_cache_dir=str(discovery_cache_dir), token_dir=str(tmp_path / "tokens"))
+
+    return make
+
+
+class FakeCalendarServer(ThreadingHTTPServer):
+    """Local stand-in for the Calendar events endpoints, with sync tokens over an in-memory change log"""
+    daemon_threads = True
+
+    def __init__(self, time_zone: str = "Europe/Paris"):
+        super().__init__(("127.0.0.1", 0), _FakeCalendarHandler)
+        self.time_zone = time_zone
+        self.events = {}
+        self.sequence = 0
+        self.expired_before = 0
+        self.page_size = None
+        self.requests = []
+        self._ids = iter(range(1, 1_000_000))
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def put_event(self, start: str, end: str, summary: str = "Meeting", event_id: str = None, **fields) -> str:
+        """Create or replace an event; start and end are RFC 3339 date-times or YYYY-MM-DD dates"""
+        with self._lock:
+            self.sequence += 1
+            event_id = event_id or f"e{next(self._ids)}"
+            key = "date" if len(start) == 10 else "dateTime"
+            self.events[event_id] = dict(fields, id=event_id, status="confirmed", summary=summary,
+                                         start={key: start}, end={key: end}, _sequence=self.sequence)
+        return event_id
+
+    def cancel_event(self, event_id: str) -> None:
+        with self._lock:
+            self.sequence += 1
+            self.events[event_id] = {"id": event_id, "status": "cancelled", "_sequence": self.sequence}
+
+    def list_events(self, query: dict) -> tuple:
+        with self._lock:
+            sync_token = query.get("syncToken", [None])[0]
+            if sync_token is not None:
+                since = int(sync_token.split("-")[1])
+                if since < self.expired_before:
+                    return 410, {"error": {"code": 410, "message": "Sync token is no longer valid, a full sync is required."}}
+                events = [event for event in self.events.values() if event["_sequence"] > since]
+            else:
+                events = [event for event in self.events.values() if event["status"] != "cancelled"]
+            events = sorted(events, key=lambda event: event["_sequence"])
+            size = self.page_size or int(query.get("maxResults", ["250"])[0])
+            offset = int(query.get("pageToken", ["0"])[0])
+            body = {"items": [{key: value for key, value in event.items() if key != "_sequence"} for event in events[offset:offset + size]]}
+            if offset + size < len(events):
+                body["nextPageToken"] = str(offset + size)
+            else:
+                body["nextSyncToken"] = f"token-{self.sequence}"
+            return 200, body
+
+
+class _FakeCalendarHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        self.server.requests.append((url.path, query))
+        if re.match(r"^/calendar/v3/calendars/[^/]+/events$", url.path):
+            status, body = self.server.list_events(query)
+        elif re.match(r"^/calendar/v3/calendars/[^/]+$", url.path):
+            status, body = 200, {"timeZone": self.server.time_zone}
+        else:
+            status, body = 400, {"error": {"code": 400, "message": "Unsupported request"}}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def fake_calendar_server():
+    """Fixture running a Calendar API stand-in on a free local port"""
+    server = FakeCalendarServer()
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
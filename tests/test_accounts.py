@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from adoptagentai.core.accounts import AccountPool
+from adoptagentai.core.agent import Agent
+from adoptagentai.core.clients import close_clients
+from adoptagentai.core.scheduler import RateLimitScheduler
+
+
+def _error(status, headers=None):
+    """Build an error shaped like an openai.APIStatusError"""
+    error = RuntimeError("status")
+    error.status_code = status
+    error.response = SimpleNamespace(status_code=status, headers=headers or {})
+    return error
+
+
+def test_least_outstanding_spreads_calls():
+    """Test that calls go to the account with the fewest calls in flight"""
+    pool = AccountPool(["a", "b", "c"])
+    picked = [pool.acquire() for _ in range(6)]
+    assert sorted(picked) == ["a", "a", "b", "b", "c", "c"]
+
+    pool.release("a")
+    pool.release("a")
+    assert pool.acquire() == "a"
+    assert pool.stats()["a"]["outstanding"] == 1
+
+
+def test_throttled_account_is_ejected():
+    """Test that a throttled account leaves the rotation for the provider's delay"""
+    pool = AccountPool(["a", "b"])
+    pool.acquire(exclude=["b"])
+    pool.release("a", _error(429, {"retry-after": "30"}))
+    assert 29 < pool.stats()["a"]["ejected_for"] <= 30
+    assert {pool.acquire() for _ in range(4)} == {"b"}
+
+    # With every account ejected, the one coming back first is used
+    pool.eject("b", 60)
+    assert pool.acquire() == "a"
+
+
+def test_failures_eject_with_growing_duration():
+    """Test that consecutive failures eject an account for doubling durations, and success resets it"""
+    pool = AccountPool(["a", "b"], ejection_time=1.0, failure_threshold=2)
+    for _ in range(2):
+        pool.acquire(exclude=["b"])
+        pool.release("a", _error(503))
+    first = pool.stats()["a"]["ejected_for"]
+    assert 0.9 < first <= 1.0
+
+    pool.acquire(exclude=["b"])
+    pool.release("a", _error(503))
+    assert 1.9 < pool.stats()["a"]["ejected_for"] <= 2.0
+
+    # Errors caused by the request itself don't count against the account
+    pool.acquire(exclude=["a"])
+    pool.release("b", _error(400))
+    assert pool.stats()["b"] == {"outstanding": 0, "requests": 1, "failures": 0, "ejected_for": 0.0}
+
+
+def test_rate_budget_prefers_headroom():
+    """Test that 'rate_budget' balancing picks the account with the most budget left"""
+    scheduler = RateLimitScheduler(requests_per_minute=60, burst_seconds=10)
+    for _ in range(5):
+        scheduler.acquire("gpt-4o", "a")
+    pool = AccountPool(["a", "b"], balancing="rate_budget")
+    assert pool.acquire(scheduler, "gpt-4o") == "b"
+
+    with pytest.raises(ValueError):
+        AccountPool(["a"], balancing="random")
+    with pytest.raises(ValueError):
+        AccountPool([])
+
+
+@pytest.fixture
+def pooled_servers(make_fake_openai_server):
+    """Fixture serving account 'busy' from an always throttling server and 'spare' from a healthy one"""
+    servers = {"busy": make_fake_openai_server(limit=0, window=30), "spare": make_fake_openai_server()}
+
+    def credentials(model_name, account_name):
+        return {"api_key": f"key-{account_name}", "base_url": servers[account_name].base_url}
+
+    with patch('adoptagentai.core.agent.get_api_credentials', side_effect=credentials):
+        yield servers
+    close_clients()
+
+
+def test_agent_fails_over_to_healthy_account(pooled_servers):
+    """Test that an agent with an account pool moves throttled calls to another account"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o", account_pool=["busy", "spare"], scheduler=RateLimitScheduler(base_delay=0.01))
+    results = agent.run_batch([f"prompt {i}" for i in range(6)], max_concurrency=3)
+
+    assert [result.output_text for result in results] == ["ok"] * 6
+    assert pooled_servers["spare"].accepted == 6
+    assert 1 <= pooled_servers["busy"].throttled <= 3
+    assert agent.account_pool.stats()["busy"]["ejected_for"] > 0
+
+
+def test_agent_spreads_load_over_accounts(make_fake_openai_server):
+    """Test that calls are spread over every healthy account of the pool"""
+    servers = {"one": make_fake_openai_server(latency=0.02), "two": make_fake_openai_server(latency=0.02)}
+    with patch('adoptagentai.core.agent.get_api_credentials', side_effect=lambda model, account: {"api_key": "key", "base_url": servers[account].base_url}):
+        agent = Agent(name="TestAgent", model_name="gpt-4o", account_pool=AccountPool(["one", "two"]), scheduler=RateLimitScheduler())
+        results = agent.run_batch([f"prompt {i}" for i in range(8)], max_concurrency=4)
+    close_clients()
+
+    assert all(result.output_text == "ok" for result in results)
+    assert servers["one"].accepted >= 2 and servers["two"].accepted >= 2
+    assert servers["one"].accepted + servers["two"].accepted == 8
+
+
+def _stream(*deltas, error=None):
+    """Yield fake stream events for the given text deltas, then fail with error if one is given"""
+    for delta in deltas:
+        yield SimpleNamespace(type="response.output_text.delta", delta=delta)
+    if error is not None:
+        raise error
+    yield SimpleNamespace(type="response.completed")
+
+
+def test_streaming_account_is_released_when_the_stream_ends():
+    """Test that a streamed call keeps its account outstanding until the stream ends, and reports mid-stream failures"""
+    pool = AccountPool(["a", "b"])
+    with patch('adoptagentai.core.agent.get_api_credentials', return_value={"api_key": "key"}):
+        agent = Agent(name="TestAgent", model_name="gpt-4o", account_pool=pool, scheduler=RateLimitScheduler())
+
+    def outstanding():
+        return sum(state["outstanding"] for state in pool.stats().values())
+
+    agent.strategy = lambda *args, **kwargs: _stream("Hel", "lo")
+    chunks = agent.run_agent_stream("Hi")
+    assert next(chunks) == "Hel"
+    assert outstanding() == 1
+    assert list(chunks) == ["lo"]
+    assert outstanding() == 0
+
+    agent.strategy = lambda *args, **kwargs: _stream("Hel", error=_error(503))
+    assert list(agent.run_agent_stream("Hi")) == ["Hel", "Error executing model."]
+    assert outstanding() == 0
+    assert sum(state["failures"] for state in pool.stats().values()) == 1
+    assert max(state["ejected_for"] for state in pool.stats().values()) > 0
+
+    async def astream():
+        for event in _stream("a", "b"):
+            yield event
+
+    async def strategy(*args, **kwargs):
+        return astream()
+
+    async def collect():
+        return [delta async for delta in agent.arun_agent_stream("Hi")]
+
+    agent.async_strategy = strategy
+    assert asyncio.run(collect()) == ["a", "b"]
+    assert outstanding() == 0
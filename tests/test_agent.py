@@ -1,8 +1,14 @@
+import asyncio
+import json
+import logging
+import time
 import pytest
-from unittest.mock import patch, MagicMock
-from datetime import datetime
+from unittest.mock import patch, MagicMock, AsyncMock
+from datetime import datetime, timedelta, timezone
 from adoptagentai.utils.api_keys import get_api_credentials
 from adoptagentai.core.agent import Agent
+import adoptagentai.core.modelStrategies as modelStrategies
+from adoptagentai.core.memory import SQLiteMemoryBackend
 
 
 @pytest.fixture
@@ -65,13 +71,13 @@ def test_add_tool(mock_logger):
     agent.add_tool("search", {"api_key": "search-key"})
     assert "search" in agent.tool_list
     assert agent.tool_credentials["search"] == {"api_key": "search-key"}
-    mock_logger.info.assert_called_with("Tool 'search' added to the agent.")
+    mock_logger.info.assert_called_with("Tool '%s' added to the agent.", "search")
     
     # Update existing tool
     mock_logger.warning.assert_not_called()
     agent.add_tool("search", {"api_key": "new-search-key"})
     assert agent.tool_credentials["search"] == {"api_key": "new-search-key"}
-    mock_logger.warning.assert_called_with("Tool 'search' already exists. Updating credentials.")
+    mock_logger.warning.assert_called_with("Tool '%s' already exists. Updating credentials.", "search")
 
 
 def test_add_memory(mock_logger):
@@ -125,6 +131,12 @@ def test_retrieve_memory():
     assert len(result) == 2
     assert all(entry["category"] == "cat1" for entry in result)
 
+    # Entries come back as plain dicts, and the memory still appends like a list
+    assert type(result[0]) is dict
+    assert json.loads(json.dumps(agent.retrieve_memory(), default=str))[0]["data"] == "test1"
+    agent.memory.append({"data": "test4", "category": "cat1", "timestamp": now})
+    assert [entry["data"] for entry in agent.retrieve_memory("cat1")] == ["test1", "test3", "test4"]
+
 
 def test_remove_tool(mock_logger):
     """Test that remove_tool correctly removes tools"""
@@ -138,11 +150,11 @@ def test_remove_tool(mock_logger):
     agent.remove_tool("search")
     assert "search" not in agent.tool_list
     assert "search" not in agent.tool_credentials
-    mock_logger.info.assert_called_with("Tool 'search' removed from the agent.")
+    mock_logger.info.assert_called_with("Tool '%s' removed from the agent.", "search")
     
     # Try to remove non-existent tool
     agent.remove_tool("nonexistent")
-    mock_logger.warning.assert_called_with("Tool 'nonexistent' not found in the agent.")
+    mock_logger.warning.assert_called_with("Tool '%s' not found in the agent.", "nonexistent")
 
 
 def test_clear_memory(mock_logger):
@@ -158,7 +170,7 @@ def test_clear_memory(mock_logger):
     agent.clear_memory(category="cat1")
     assert len(agent.memory) == 1
     assert agent.memory[0]["category"] == "cat2"
-    mock_logger.info.assert_called_with("Memory entries with category 'cat1' cleared.")
+    mock_logger.info.assert_called_with("Memory entries with category '%s' cleared.", "cat1")
     
     # Clear all memory
     agent.clear_memory()
@@ -178,8 +190,226 @@ def test_update_model(mock_get_credentials, mock_logger):
     assert agent.model_account_name == "prod"
     assert agent.model_credentials == {"api_key": "new-model-key"}
     mock_get_credentials.assert_called_with("gpt-4o", "prod")
-    mock_logger.info.assert_called_with("Agent model updated to: gpt-4o")
+    mock_logger.info.assert_called_with("Agent model updated to: %s", "gpt-4o")
     
     # Test model name gets lowercased
     agent.update_model("gpt-4o-mini")
-    assert agent.model_name == "gpt-4o-mini"
\ No newline at end of file
+    assert agent.model_name == "gpt-4o-mini"
+
+def test_arun_agent(mock_api_credentials, mock_logger):
+    """Test that arun_agent awaits the async strategy matching the model"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+    strategy = AsyncMock(return_value="async response")
+    agent.async_strategy = strategy
+
+    result = asyncio.run(agent.arun_agent("Hello"))
+    assert result == "async response"
+    strategy.assert_awaited_once_with("gpt-4o", "Hello", {"api_key": "test-api-key"})
+
+    # Errors are reported the same way as in run_agent
+    strategy.side_effect = RuntimeError("boom")
+    result = asyncio.run(agent.arun_agent("Hello"))
+    assert result == "Error executing model."
+
+    # No model configured
+    agent = Agent(name="TestAgent")
+    assert asyncio.run(agent.arun_agent("Hello")) == "Error: No model configured."
+
+
+def test_run_batch(mock_api_credentials, mock_logger):
+    """Test that run_batch keeps input order and returns per-item errors in place"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+
+    def fake_run_agent(prompt):
+        if prompt == "bad":
+            raise RuntimeError("boom")
+        return prompt.upper()
+
+    with patch.object(agent, "run_agent", side_effect=fake_run_agent):
+        results = agent.run_batch(iter(["a", "bad", "c", "d"]), max_concurrency=2)
+        assert results[0] == "A"
+        assert isinstance(results[1], RuntimeError)
+        assert results[2:] == ["C", "D"]
+
+        streamed = dict(agent.iter_batch(["x", "y"], max_concurrency=1))
+        assert streamed == {0: "X", 1: "Y"}
+
+    with pytest.raises(ValueError):
+        agent.run_batch(["a"], max_concurrency=0)
+
+
+def test_arun_batch(mock_api_credentials, mock_logger):
+    """Test that arun_batch runs prompts through arun_agent in input order"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+
+    async def fake_arun_agent(prompt):
+        await asyncio.sleep(0.01 if prompt == "a" else 0)
+        return prompt.upper()
+
+    with patch.object(agent, "arun_agent", side_effect=fake_arun_agent):
+        results = asyncio.run(agent.arun_batch(["a", "b", "c"], max_concurrency=2))
+    assert results == ["A", "B", "C"]
+
+
+def _stream_events(*deltas):
+    """Build fake Responses API stream events for the given text deltas"""
+    events = [MagicMock(type="response.created")]
+    events += [MagicMock(type="response.output_text.delta", delta=delta) for delta in deltas]
+    events.append(MagicMock(type="response.completed"))
+    return events
+
+
+def test_run_agent_stream(mock_api_credentials, mock_logger):
+    """Test that run_agent_stream yields text deltas and records latency metrics"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+    strategy = MagicMock(return_value=iter(_stream_events("Hel", "lo")))
+    agent.strategy = strategy
+
+    assert list(agent.run_agent_stream("Hi")) == ["Hel", "lo"]
+    strategy.assert_called_once_with("gpt-4o", "Hi", {"api_key": "test-api-key"}, stream=True)
+    metrics = agent.last_stream_metrics
+    assert 0 <= metrics["time_to_first_token"] <= metrics["total_latency"]
+
+    # Errors are reported in the stream
+    strategy.side_effect = RuntimeError("boom")
+    assert list(agent.run_agent_stream("Hi")) == ["Error executing model."]
+
+
+def test_arun_agent_stream(mock_api_credentials, mock_logger):
+    """Test that arun_agent_stream yields text deltas from the async strategy"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+
+    async def fake_stream():
+        for event in _stream_events("a", "b", "c"):
+            yield event
+
+    agent.async_strategy = AsyncMock(return_value=fake_stream())
+
+    async def collect():
+        return [delta async for delta in agent.arun_agent_stream("Hi")]
+
+    assert asyncio.run(collect()) == ["a", "b", "c"]
+    assert agent.last_stream_metrics["time_to_first_token"] is not None
+
+
+def test_run_agent_cache_hits_skip_the_scheduler(mock_api_credentials, mock_logger):
+    """Test that cached responses are served without taking a rate limit slot"""
+    from adoptagentai.core.cache import ResponseCache
+    from adoptagentai.core.scheduler import RateLimitScheduler
+
+    cache = ResponseCache(allow_nondeterministic=True)
+    scheduler = RateLimitScheduler(requests_per_minute=60, burst_seconds=1)
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", response_cache=cache, scheduler=scheduler)
+    strategy = MagicMock(return_value="response")
+    agent.strategy = strategy
+
+    start = time.perf_counter()
+    assert [agent.run_agent("Hello") for _ in range(4)] == ["response"] * 4
+    assert time.perf_counter() - start < 0.5
+    strategy.assert_called_once_with("gpt-4o", "Hello", {"api_key": "test-api-key"})
+    assert scheduler.stats()[("gpt-4o", "DEFAULT")]["requests"] == 1
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_retrieve_memory_latest():
+    """Test that retrieve_memory supports latest-K and time range queries"""
+    agent = Agent(name="TestAgent")
+    for i in range(5):
+        agent.add_memory(f"entry {i}", "notes")
+
+    latest = agent.retrieve_memory("notes", limit=2)
+    assert [entry["data"] for entry in latest] == ["entry 3", "entry 4"]
+    assert len(agent.retrieve_memory(since=timedelta(minutes=1))) == 5
+
+
+def test_memory_backend_survives_restart(tmp_path):
+    """Test that an agent with a memory backend sees the memory of a previous agent"""
+    path = str(tmp_path / "memory.sqlite")
+    backend = SQLiteMemoryBackend(path)
+    agent = Agent(name="TestAgent", memory_backend=backend)
+    agent.add_memory("remember me", "facts")
+    backend.close()
+
+    agent = Agent(name="TestAgent", memory_backend=SQLiteMemoryBackend(path))
+    assert [entry["data"] for entry in agent.retrieve_memory("facts")] == ["remember me"]
+
+
+def test_search_memory_and_injection(mock_api_credentials, mock_logger):
+    """Test that memory similarity hits are kept in sync and injected into the prompt"""
+    pytest.importorskip("numpy")
+    from adoptagentai.core.embeddings import VectorIndex
+
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default",
+                  memory=[{"data": "the sky is blue", "category": "facts", "timestamp": datetime.now()}],
+                  memory_index=VectorIndex())
+    agent.add_memory("bananas are yellow", "fruit")
+    assert [entry["data"] for entry in agent.search_memory("what color is the sky", k=1)] == ["the sky is blue"]
+
+    strategy = MagicMock(return_value="response")
+    agent.strategy = strategy
+    agent.run_agent("what color is the sky", memory_top_k=1)
+    assert strategy.call_args[0][1] == "Relevant memory:\n- the sky is blue\n\nwhat color is the sky"
+
+    agent.clear_memory("facts")
+    assert [entry["data"] for entry in agent.search_memory("sky", k=5)] == ["bananas are yellow"]
+
+
+def test_search_memory_skips_unknown_keys(mock_api_credentials, mock_logger):
+    """Test that index hits without a loaded memory entry are skipped instead of failing"""
+    pytest.importorskip("numpy")
+    from adoptagentai.core.embeddings import VectorIndex
+
+    index = VectorIndex()
+    index.add(1000, "the sky is blue")
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", memory_index=index)
+    agent.add_memory("the sky is grey today", "facts")
+    assert [entry["data"] for entry in agent.search_memory("sky", k=5)] == ["the sky is grey today"]
+
+    strategy = MagicMock(return_value="response")
+    agent.strategy = strategy
+    assert agent.run_agent("sky", memory_top_k=5) == "response"
+    assert strategy.call_args[0][1] == "Relevant memory:\n- the sky is grey today\n\nsky"
+
+
+def test_run_agent_with_prompt_assembler(mock_api_credentials, mock_logger):
+    """Test that a prompt over the token budget is rejected without calling the model"""
+    from adoptagentai.core.prompting import PromptAssembler
+
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default",
+                  prompt_assembler=PromptAssembler(max_input_tokens=50))
+    strategy = MagicMock(return_value="response")
+    agent.strategy = strategy
+
+    assert agent.run_agent("Hello") == "response"
+    assert agent.run_agent("word " * 100) == "Error executing model."
+    strategy.assert_called_once()
+
+
+def test_strategy_resolved_at_configuration(mock_api_credentials, mock_logger):
+    """Test that the strategy is resolved once per model, routing mini models correctly"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o-mini", model_account_name="default")
+    assert agent.strategy is modelStrategies.gpt_4o_mini_strategy
+
+    agent.update_model("gpt-4o", "default")
+    assert agent.strategy is modelStrategies.gpt_4o_strategy
+    assert agent.async_strategy is modelStrategies.gpt_4o_strategy_async
+
+    agent.model_name = "unknown-model"
+    agent.strategy = None
+    assert agent.run_agent("Hello") == "Error: No strategy registered for model."
+
+
+def test_memory_logging_truncates_data(caplog):
+    """Test that add_memory logs its data lazily, truncated to 50 characters"""
+    agent = Agent(name="TestAgent")
+    with caplog.at_level(logging.INFO, logger="adoptagentai"):
+        agent.add_memory("x" * 60, "notes")
+    assert f"Memory updated with: {'x' * 50}..., Category: notes" in caplog.text
+
+
+def test_agent_memory_accepts_aware_timestamps():
+    """Test that legacy memory with timezone-aware timestamps accepts new entries"""
+    agent = Agent(name="TestAgent", memory=[{"data": "old", "category": "c", "timestamp": datetime.now(timezone.utc)}])
+    agent.add_memory("new", "c")
+    assert [entry["data"] for entry in agent.retrieve_memory("c")] == ["old", "new"]
+    assert [entry["data"] for entry in agent.retrieve_memory(since=timedelta(hours=1))] == ["old", "new"]
@@ -1,6 +1,7 @@
 import os
+import threading
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from adoptagentai.utils.api_keys import (
     list_api_requirements,
     define_api_credentials,
@@ -8,8 +9,17 @@ from adoptagentai.utils.api_keys import (
     remove_api_credentials,
     list_api_accounts,
     list_configured_apis,
-    API_REQUIREMENTS
+    define_api_credentials_bulk,
+    remove_api_credentials_bulk,
+    register_api,
+    API_REQUIREMENTS,
+    API_OPTIONAL_CREDENTIALS,
+    _rewrite_dotenv,
+    _dotenv_lock,
+    _CredentialStore,
+    _AccountRegistry
 )
+from dotenv import dotenv_values
 
 
 @pytest.fixture
@@ -24,14 +34,14 @@ def mock_environ():
 
 
 @pytest.fixture
-def mock_dotenv():
-    """Fixture to mock dotenv functions"""
-    with patch('adoptagentai.utils.api_keys.find_dotenv') as mock_find:
-        with patch('adoptagentai.utils.api_keys.set_key') as mock_set:
-            with patch('adoptagentai.utils.api_keys.unset_key') as mock_unset:
-                with patch('builtins.open', MagicMock()):
-                    mock_find.return_value = ".env"
-                    yield mock_find, mock_set, mock_unset
+def mock_dotenv(tmp_path, monkeypatch):
+    """Fixture pointing dotenv at an empty .env file in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text("")
+    with patch.dict(os.environ):
+        with patch('adoptagentai.utils.api_keys.find_dotenv', return_value=str(dotenv_file)) as mock_find:
+            yield mock_find, dotenv_file
 
 
 def test_list_api_requirements():
@@ -44,12 +54,14 @@ def test_list_api_requirements():
 
 def test_define_api_credentials(mock_dotenv):
     """Test that define_api_credentials correctly sets credentials"""
-    mock_find, mock_set, _ = mock_dotenv
+    _, dotenv_file = mock_dotenv
     
     # Test with valid API and credentials
-    result = define_api_credentials("gpt-4o", "test", api_key="test-key")
+    with patch('adoptagentai.utils.api_keys._dotenv_lock', wraps=_dotenv_lock) as mock_lock:
+        result = define_api_credentials("gpt-4o", "test", api_key="test-key")
     assert result is True
-    mock_set.assert_called_once_with('.env', 'GPT-4O_TEST_API_KEY', 'test-key')
+    assert dotenv_values(dotenv_file) == {"GPT-4O_TEST_API_KEY": "test-key"}
+    mock_lock.assert_called_once_with(str(dotenv_file))
     
     # Test with unsupported API
     with pytest.raises(ValueError) as excinfo:
@@ -64,12 +76,13 @@ def test_define_api_credentials(mock_dotenv):
 
 def test_define_api_credentials_no_dotenv(mock_dotenv):
     """Test define_api_credentials when no .env file exists"""
-    mock_find, mock_set, _ = mock_dotenv
+    mock_find, dotenv_file = mock_dotenv
     mock_find.return_value = ""
+    dotenv_file.unlink()
     
     result = define_api_credentials("gpt-4o", "test", api_key="test-key")
     assert result is True
-    mock_set.assert_called_once_with('.env', 'GPT-4O_TEST_API_KEY', 'test-key')
+    assert dotenv_values(".env") == {"GPT-4O_TEST_API_KEY": "test-key"}
 
 
 def test_get_api_credentials(mock_environ):
@@ -94,12 +107,16 @@ def test_get_api_credentials(mock_environ):
 
 def test_remove_api_credentials(mock_environ, mock_dotenv):
     """Test that remove_api_credentials correctly removes credentials"""
-    _, _, mock_unset = mock_dotenv
+    _, dotenv_file = mock_dotenv
+    dotenv_file.write_text("OTHER=value\nGPT-4O_DEFAULT_API_KEY='test-key'\n")
     
     # Test with valid API and account
-    result = remove_api_credentials("gpt-4o", "default")
+    with patch('adoptagentai.utils.api_keys._dotenv_lock', wraps=_dotenv_lock) as mock_lock:
+        result = remove_api_credentials("gpt-4o", "default")
     assert result is True
-    mock_unset.assert_called_once_with(".env", "GPT-4O_DEFAULT_API_KEY")
+    assert dotenv_values(dotenv_file) == {"OTHER": "value"}
+    assert "GPT-4O_DEFAULT_API_KEY" not in os.environ
+    mock_lock.assert_called_once_with(str(dotenv_file))
     
     # Test with unsupported API
     with pytest.raises(ValueError) as excinfo:
@@ -114,7 +131,7 @@ def test_remove_api_credentials(mock_environ, mock_dotenv):
 
 def test_remove_api_credentials_no_dotenv(mock_environ, mock_dotenv):
     """Test remove_api_credentials when no .env file exists"""
-    mock_find, _, _ = mock_dotenv
+    mock_find, _ = mock_dotenv
     mock_find.return_value = ""
     
     result = remove_api_credentials("gpt-4o", "default")
@@ -163,9 +180,216 @@ def test_case_insensitivity():
         credentials = get_api_credentials("gpt-4o", "default")
         assert credentials == {"api_key": "test-key"}
     
-    with patch('adoptagentai.utils.api_keys.set_key') as mock_set:
+    with patch('adoptagentai.utils.api_keys._rewrite_dotenv') as mock_rewrite, patch.dict(os.environ):
         with patch('adoptagentai.utils.api_keys.find_dotenv', return_value=".env"):
             # Test with uppercase credential key
             result = define_api_credentials("gpt-4o", "test", API_KEY="test-key")
             assert result is True
-            mock_set.assert_called_once_with('.env', 'GPT-4O_TEST_API_KEY', 'test-key')
+            mock_rewrite.assert_called_once_with('.env', {'GPT-4O_TEST_API_KEY': 'test-key'}, set())
+
+
+def test_credential_store_parses_dotenv_once(tmp_path):
+    """Test that the .env file is parsed once and again only after it changes"""
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text("GPT-4O_CACHED_API_KEY=first\n")
+    store = _CredentialStore(str(dotenv_file))
+
+    with patch.dict(os.environ, {}, clear=True):
+        with patch('adoptagentai.utils.api_keys.dotenv_values', wraps=dotenv_values) as mock_values:
+            store.ensure_loaded()
+            store.ensure_loaded()
+            assert mock_values.call_count == 1
+            assert os.environ["GPT-4O_CACHED_API_KEY"] == "first"
+
+            dotenv_file.write_text("GPT-4O_CACHED_API_KEY=second\n")
+            os.utime(dotenv_file, ns=(0, 10 ** 9))
+            store.ensure_loaded()
+            assert mock_values.call_count == 2
+            assert os.environ["GPT-4O_CACHED_API_KEY"] == "second"
+
+            store.reload()
+            store.ensure_loaded()
+            assert mock_values.call_count == 3
+
+
+def test_credential_store_keeps_environment_precedence(tmp_path):
+    """Test that process environment variables win over the file, and removed file keys are unset"""
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text("GPT-4O_ENV_API_KEY=from-file\nGPT-4O_FILE_API_KEY=file-only\n")
+    store = _CredentialStore(str(dotenv_file))
+
+    with patch.dict(os.environ, {"GPT-4O_ENV_API_KEY": "from-env"}, clear=True):
+        store.ensure_loaded()
+        assert os.environ["GPT-4O_ENV_API_KEY"] == "from-env"
+        assert os.environ["GPT-4O_FILE_API_KEY"] == "file-only"
+
+        dotenv_file.write_text("")
+        os.utime(dotenv_file, ns=(0, 10 ** 9))
+        store.ensure_loaded()
+        assert os.environ["GPT-4O_ENV_API_KEY"] == "from-env"
+        assert "GPT-4O_FILE_API_KEY" not in os.environ
+
+
+def test_optional_credentials(tmp_path):
+    """Test that optional credentials are returned when set and removed with the account"""
+    path = str(tmp_path / ".env")
+    with patch.dict(os.environ, {}, clear=True):
+        define_api_credentials_bulk([("google", "work", {"client_id": "id", "client_secret": "secret"})], dotenv_path=path)
+        assert get_api_credentials("google", "work") == {"client_id": "id", "client_secret": "secret"}
+
+        os.environ["GOOGLE_WORK_REFRESH_TOKEN"] = "refresh"
+        assert get_api_credentials("google", "work")["refresh_token"] == "refresh"
+        assert remove_api_credentials_bulk([("google", "work")], dotenv_path=path)
+        assert "GOOGLE_WORK_REFRESH_TOKEN" not in os.environ
+
+        os.environ.update({"GPT-4O_LOCAL_API_KEY": "key", "GPT-4O_LOCAL_BASE_URL": "http://127.0.0.1:8000/v1"})
+        assert get_api_credentials("gpt-4o", "local") == {"api_key": "key", "base_url": "http://127.0.0.1:8000/v1"}
+
+
+def test_account_registry_parsing():
+    """Test that account names with underscores and model names with hyphens are parsed correctly"""
+    assert _AccountRegistry.parse("GPT-4O_MY_TEAM_API_KEY") == ("gpt-4o", "MY_TEAM", "api_key")
+    assert _AccountRegistry.parse("GPT-4O-MINI_DEFAULT_API_KEY") == ("gpt-4o-mini", "DEFAULT", "api_key")
+    assert _AccountRegistry.parse("GOOGLE_WORK_CLIENT_SECRET") == ("google", "WORK", "client_secret")
+    assert _AccountRegistry.parse("GOOGLE_WORK_REFRESH_TOKEN") == ("google", "WORK", "refresh_token")
+    assert _AccountRegistry.parse("GPT-4O_LOCAL_BASE_URL") == ("gpt-4o", "LOCAL", "base_url")
+    assert _AccountRegistry.parse("GPT-4O_API_KEY") is None
+    assert _AccountRegistry.parse("PATH") is None
+
+    with patch.dict(os.environ, {
+        "GPT-4O_MY_TEAM_API_KEY": "key",
+        "GPT-4O-MINI_DEFAULT_API_KEY": "key",
+        "GOOGLE_WORK_CLIENT_ID": "id",
+    }, clear=True):
+        assert list_api_accounts("gpt-4o") == ["MY_TEAM"]
+        assert list_api_accounts("gpt-4o-mini") == ["DEFAULT"]
+        assert sorted(list_configured_apis()) == ["google", "gpt-4o", "gpt-4o-mini"]
+
+
+def test_account_registry_incremental_updates(mock_environ, mock_dotenv):
+    """Test that define and remove update the registry without a rescan"""
+    assert set(list_api_accounts("gpt-4o")) == {"DEFAULT", "TEST", "PROD"}
+
+    with patch.object(_AccountRegistry, "parse", wraps=_AccountRegistry.parse) as mock_parse:
+        define_api_credentials("gpt-4o", "new_team", api_key="key")
+        assert set(list_api_accounts("gpt-4o")) == {"DEFAULT", "TEST", "PROD", "NEW_TEAM"}
+        assert mock_parse.call_count == 0
+
+    remove_api_credentials("gpt-4o", "prod")
+    assert set(list_api_accounts("gpt-4o")) == {"DEFAULT", "TEST", "NEW_TEAM"}
+
+
+def test_explicit_dotenv_path_keeps_environment_and_registry_consistent(tmp_path):
+    """Test that credentials written to another .env file can be read back for every listed account"""
+    path = str(tmp_path / "other.env")
+    with patch.dict(os.environ, {"GPT-4O_OLD_API_KEY": "old"}, clear=True):
+        assert list_api_accounts("gpt-4o") == ["OLD"]
+        define_api_credentials_bulk([("gpt-4o", "team", {"api_key": "key"})], dotenv_path=path)
+        assert sorted(list_api_accounts("gpt-4o")) == ["OLD", "TEAM"]
+        for account in list_api_accounts("gpt-4o"):
+            assert get_api_credentials("gpt-4o", account)["api_key"]
+
+        define_api_credentials_bulk([("gpt-4o", "team", {"api_key": "new"})], dotenv_path=path)
+        assert get_api_credentials("gpt-4o", "team") == {"api_key": "new"}
+
+        # Variables swapped directly in the environment are noticed even though its size is unchanged
+        del os.environ["GPT-4O_OLD_API_KEY"]
+        os.environ["GPT-4O_SWAPPED_API_KEY"] = "swapped"
+        assert sorted(list_api_accounts("gpt-4o")) == ["SWAPPED", "TEAM"]
+
+        assert remove_api_credentials_bulk([("gpt-4o", "team")], dotenv_path=path)
+        assert list_api_accounts("gpt-4o") == ["SWAPPED"]
+
+
+def test_register_api_invalidates_registry():
+    """Test that accounts of a newly registered API already in the environment are listed"""
+    requirements, optional = dict(API_REQUIREMENTS), {key: list(value) for key, value in API_OPTIONAL_CREDENTIALS.items()}
+    try:
+        with patch.dict(os.environ, {"MY-MODEL_TEAM_ENDPOINT": "http://127.0.0.1"}, clear=True):
+            assert list_configured_apis() == []
+            register_api("My-Model", ["api_key"], optional=["endpoint"])
+            assert list_api_accounts("my-model") == ["TEAM"]
+            assert get_api_credentials("my-model", "team") == {"endpoint": "http://127.0.0.1"}
+    finally:
+        API_REQUIREMENTS.clear()
+        API_REQUIREMENTS.update(requirements)
+        API_OPTIONAL_CREDENTIALS.clear()
+        API_OPTIONAL_CREDENTIALS.update(optional)
+
+
+@patch.dict(os.environ)
+def test_define_api_credentials_bulk(tmp_path):
+    """Test that many credentials are written in one rewrite that keeps unrelated lines"""
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text("# comment\nOTHER=value\nGPT-4O_A_API_KEY='old'\n")
+
+    with patch('adoptagentai.utils.api_keys._rewrite_dotenv', wraps=_rewrite_dotenv) as mock_rewrite:
+        result = define_api_credentials_bulk(
+            [("gpt-4o", "a", {"api_key": "new"}), ("GPT-4O", "b", {"API_KEY": "it's"}), ("google", "work", {"client_id": "id", "client_secret": "secret"})],
+            dotenv_path=str(dotenv_file),
+        )
+    assert result is True
+    assert mock_rewrite.call_count == 1
+    assert dotenv_file.read_text().startswith("# comment\nOTHER=value\nGPT-4O_A_API_KEY='new'\n")
+    assert dotenv_values(str(dotenv_file)) == {
+        "OTHER": "value",
+        "GPT-4O_A_API_KEY": "new",
+        "GPT-4O_B_API_KEY": "it's",
+        "GOOGLE_WORK_CLIENT_ID": "id",
+        "GOOGLE_WORK_CLIENT_SECRET": "secret",
+    }
+
+    # Invalid entries are rejected before anything is written
+    with pytest.raises(ValueError):
+        define_api_credentials_bulk([("gpt-4o", "c", {"api_key": "x"}), ("gpt-4o", "d", {})], dotenv_path=str(dotenv_file))
+    assert "GPT-4O_C_API_KEY" not in dotenv_file.read_text()
+
+
+def test_rewrite_keeps_multiline_values(tmp_path):
+    """Test that quoted values spanning several lines are kept, replaced or removed as a whole"""
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text('CERT="line one\nline two"\nGPT-4O_A_API_KEY=old\nNOTE=\'first\nsecond\'\nOTHER=value')
+
+    _rewrite_dotenv(str(dotenv_file), {"GPT-4O_A_API_KEY": "new", "GPT-4O_B_API_KEY": "added"}, {"NOTE"})
+    assert dotenv_values(str(dotenv_file)) == {
+        "CERT": "line one\nline two",
+        "GPT-4O_A_API_KEY": "new",
+        "OTHER": "value",
+        "GPT-4O_B_API_KEY": "added",
+    }
+    assert dotenv_file.read_text().startswith('CERT="line one\nline two"\n')
+
+    _rewrite_dotenv(str(dotenv_file), {"CERT": "single"}, set())
+    assert dotenv_values(str(dotenv_file))["CERT"] == "single"
+    assert "line two" not in dotenv_file.read_text()
+
+
+def test_remove_api_credentials_bulk(tmp_path):
+    """Test that many accounts are removed in one rewrite"""
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text("GPT-4O_A_API_KEY=a\nGPT-4O_AB_API_KEY=ab\nGPT-4O_B_API_KEY=b\nOTHER=value\n")
+
+    with patch.dict(os.environ, {"GPT-4O_A_API_KEY": "a"}, clear=True):
+        assert remove_api_credentials_bulk([("gpt-4o", "a"), ("gpt-4o", "b")], dotenv_path=str(dotenv_file)) is True
+        assert "GPT-4O_A_API_KEY" not in os.environ
+    assert dotenv_file.read_text() == "GPT-4O_AB_API_KEY=ab\nOTHER=value\n"
+
+    assert remove_api_credentials_bulk([("gpt-4o", "a")], dotenv_path=str(dotenv_file)) is False
+
+
+@patch.dict(os.environ)
+def test_bulk_writes_are_safe_concurrently(tmp_path):
+    """Test that concurrent bulk writers don't lose each other's updates"""
+    dotenv_file = tmp_path / ".env"
+
+    def provision(worker):
+        entries = [("gpt-4o", f"w{worker}_{i}", {"api_key": str(i)}) for i in range(20)]
+        define_api_credentials_bulk(entries, dotenv_path=str(dotenv_file))
+
+    threads = [threading.Thread(target=provision, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(dotenv_values(str(dotenv_file))) == 160
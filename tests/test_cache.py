@@ -0,0 +1,119 @@
+import threading
+from unittest.mock import patch
+from adoptagentai.core.cache import ResponseCache, MemoryCacheTier
+from adoptagentai.core.modelStrategies import response_cache_key
+
+
+def test_memory_tier_lru_eviction():
+    """Test that the memory tier evicts the least recently used entry"""
+    tier = MemoryCacheTier(max_entries=2, ttl=None)
+    tier.set("a", 1)
+    tier.set("b", 2)
+    assert tier.get("a") == 1
+    tier.set("c", 3)
+
+    assert tier.get("b") is None
+    assert tier.get("a") == 1
+    assert tier.get("c") == 3
+    assert tier.evictions == 1
+
+
+def test_memory_tier_ttl():
+    """Test that expired entries are dropped on access"""
+    tier = MemoryCacheTier(max_entries=10, ttl=5)
+    with patch('adoptagentai.core.cache.time.monotonic', return_value=100.0):
+        tier.set("a", 1)
+    with patch('adoptagentai.core.cache.time.monotonic', return_value=104.0):
+        assert tier.get("a") == 1
+    with patch('adoptagentai.core.cache.time.monotonic', return_value=106.0):
+        assert tier.get("a") is None
+    assert tier.evictions == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test that the SQLite tier keeps entries across instances"""
+    path = str(tmp_path / "cache" / "responses.sqlite")
+    cache = ResponseCache(disk_path=path, allow_nondeterministic=True)
+    cache.set("key", {"output_text": "cached"})
+    cache.disk_tier.close()
+
+    cache = ResponseCache(disk_path=path)
+    assert cache.get("key") == {"output_text": "cached"}
+    assert cache.get("missing") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "bypassed": 0, "disk_hits": 1, "evictions": 0, "size": 1}
+    cache.disk_tier.close()
+
+
+def test_make_key_covers_call_parameters():
+    """Test that the key changes with model, instructions, prompt and sampling parameters"""
+    key = ResponseCache.make_key("gpt-4o", "Be brief.", "Hello", temperature=0)
+    assert key == ResponseCache.make_key("gpt-4o", "Be brief.", "Hello", temperature=0)
+    assert key != ResponseCache.make_key("gpt-4o-mini", "Be brief.", "Hello", temperature=0)
+    assert key != ResponseCache.make_key("gpt-4o", "Be verbose.", "Hello", temperature=0)
+    assert key != ResponseCache.make_key("gpt-4o", "Be brief.", "Hi", temperature=0)
+    assert key != ResponseCache.make_key("gpt-4o", "Be brief.", "Hello", temperature=0.2)
+
+
+def test_response_cache_key():
+    """Test that deterministic calls get a key, and others only with opt-in"""
+    cache = ResponseCache()
+    key = response_cache_key(cache, "gpt-4o", "Hello", {"temperature": 0})
+    assert key is not None
+    assert key == response_cache_key(cache, "gpt-4o", "Hello", {"temperature": 0})
+    assert key != response_cache_key(cache, "gpt-4o", "Hello", {"temperature": 0, "top_p": 0.5})
+    assert response_cache_key(None, "gpt-4o", "Hello", {"temperature": 0}) is None
+
+    # The strategy's default temperature > 0, streaming and tools bypass the cache
+    assert response_cache_key(cache, "gpt-4o", "Hello", {}) is None
+    assert response_cache_key(cache, "gpt-4o", "Hello", {"temperature": 0, "stream": True}) is None
+    assert response_cache_key(cache, "gpt-4o", "Hello", {"temperature": 0, "tools": [{"type": "function"}]}) is None
+    assert cache.stats()["bypassed"] == 3
+
+    cache.allow_nondeterministic = True
+    assert response_cache_key(cache, "gpt-4o", "Hello", {}) is not None
+
+
+def test_counters_are_thread_safe():
+    """Test that concurrent lookups and bypasses are all counted"""
+    cache = ResponseCache()
+    cache.set("key", "value")
+
+    def work():
+        for _ in range(2000):
+            cache.get("key")
+            cache.get("missing")
+            cache.bypass()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (16000, 16000, 16000)
+
+
+def test_agent_model_options_make_calls_cacheable(fake_openai_server):
+    """Test that sampling options set on the Agent reach the strategy and its cache key"""
+    from adoptagentai.core.agent import Agent
+    from adoptagentai.core.clients import close_clients
+
+    with patch('adoptagentai.core.agent.get_api_credentials', return_value={"api_key": "k", "base_url": fake_openai_server.base_url}):
+        cache = ResponseCache()
+        agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", response_cache=cache)
+        for _ in range(3):
+            agent.run_agent("Hello")
+        assert cache.stats()["bypassed"] == 3
+        assert fake_openai_server.accepted == 3
+
+        cache = ResponseCache()
+        agent = Agent(name="TestAgent", model_name="gpt-4o-mini", model_account_name="default", response_cache=cache,
+                      model_options={"temperature": 0, "max_output_tokens": 64})
+        for _ in range(3):
+            assert agent.run_agent("Hello").output_text == "ok"
+    close_clients()
+
+    assert (cache.hits, cache.misses, cache.bypassed) == (2, 1, 0)
+    assert fake_openai_server.accepted == 4
+    assert fake_openai_server.requests[-1]["temperature"] == 0
+    assert fake_openai_server.requests[-1]["max_output_tokens"] == 64
@@ -0,0 +1,96 @@
+import asyncio
+import openai
+import pytest
+from unittest.mock import patch, MagicMock
+from adoptagentai.core.agent import Agent
+from adoptagentai.core.clients import get_openai_client, configure_clients, close_clients, aclose_clients, CLIENT_SETTINGS
+from adoptagentai.core.scheduler import RateLimitScheduler
+from adoptagentai.core.modelStrategies import gpt_4o_base_strategy
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Fixture to start each test with an empty client registry and default settings"""
+    settings = dict(CLIENT_SETTINGS)
+    close_clients()
+    yield
+    close_clients()
+    CLIENT_SETTINGS.clear()
+    CLIENT_SETTINGS.update(settings)
+
+
+def test_get_openai_client_is_shared_per_credentials():
+    """Test that clients are built once per credentials and account"""
+    client = get_openai_client({"api_key": "key-1"}, "default")
+    assert isinstance(client, openai.OpenAI)
+    assert get_openai_client({"api_key": "key-1"}, "DEFAULT") is client
+    assert get_openai_client({"api_key": "key-2"}, "default") is not client
+    assert get_openai_client({"api_key": "key-1"}, "other") is not client
+
+    async_client = get_openai_client({"api_key": "key-1"}, "default", asynchronous=True)
+    assert isinstance(async_client, openai.AsyncOpenAI)
+    assert async_client is not client
+
+
+def test_async_clients_are_shared_per_event_loop():
+    """Test that async clients are bound to the loop they run on and closed with close_clients"""
+    async def pair():
+        return get_openai_client({"api_key": "key-1"}, asynchronous=True), get_openai_client({"api_key": "key-1"}, asynchronous=True)
+
+    first, same = asyncio.run(pair())
+    assert first is same
+    second, _ = asyncio.run(pair())
+    assert second is not first
+
+    loop = asyncio.new_event_loop()
+    try:
+        client, _ = loop.run_until_complete(pair())
+        close_clients()
+        assert client.is_closed()
+
+        client, _ = loop.run_until_complete(pair())
+        loop.run_until_complete(aclose_clients())
+        assert client.is_closed()
+    finally:
+        loop.close()
+
+
+def test_async_agent_calls_across_event_loops(fake_openai_server):
+    """Test that each asyncio.run gets working connections instead of retrying on a closed loop"""
+    scheduler = RateLimitScheduler()
+    with patch('adoptagentai.core.agent.get_api_credentials') as mock_get:
+        mock_get.return_value = {"api_key": "key-1", "base_url": fake_openai_server.base_url}
+        agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", scheduler=scheduler)
+        for _ in range(3):
+            assert asyncio.run(agent.arun_agent("Hello")).output_text == "ok"
+
+    assert fake_openai_server.accepted == 3
+    assert scheduler.stats()[("gpt-4o", "DEFAULT")]["retries"] == 0
+
+
+def test_configure_clients():
+    """Test that pool settings are validated and applied to new clients"""
+    settings = configure_clients(max_connections=7, max_retries=0)
+    assert settings["max_connections"] == 7
+
+    client = get_openai_client({"api_key": "key-1", "base_url": "http://127.0.0.1:1/v1"})
+    assert client.max_retries == 0
+    assert str(client.base_url) == "http://127.0.0.1:1/v1/"
+
+    with pytest.raises(ValueError) as excinfo:
+        configure_clients(pool_size=3)
+    assert "Unknown client settings: pool_size" in str(excinfo.value)
+
+
+def test_strategy_uses_registry_without_global_key():
+    """Test that the base strategy goes through the registry instead of openai.api_key"""
+    fake_client = MagicMock()
+    fake_client.responses.create.return_value = "response"
+    openai.api_key = None
+
+    with patch('adoptagentai.core.modelStrategies.get_openai_client', return_value=fake_client) as mock_get:
+        result = gpt_4o_base_strategy("gpt-4o", "Hello", {"api_key": "key-1"})
+
+    assert result == "response"
+    mock_get.assert_called_once_with({"api_key": "key-1"})
+    assert openai.api_key is None
@@ -0,0 +1,65 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from adoptagentai.core.embeddings import HashingEmbedder, VectorIndex
+
+
+class FixedEmbedder:
+    """Embedder returning preset vectors, to check the index independently of hashing"""
+    dim = 3
+    vectors = {"x": [1, 0, 0], "y": [0, 1, 0], "xy": [1, 1, 0], "z": [0, 0, 2]}
+
+    def embed(self, texts):
+        return np.array([self.vectors[text] for text in texts], dtype=np.float32)
+
+
+def test_hashing_embedder_is_stable_and_normalized():
+    """Test that the hashing embedder is deterministic and returns unit rows"""
+    embedder = HashingEmbedder(dim=64)
+    vectors = embedder.embed(["The cat sat", "the CAT sat", ""])
+    assert vectors.shape == (3, 64)
+    assert vectors.dtype == np.float32
+    assert np.allclose(vectors[0], vectors[1])
+    assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+    assert not vectors[2].any()
+
+
+def test_search_ranks_by_cosine_similarity():
+    """Test that search returns the best matches first with cosine scores"""
+    index = VectorIndex(FixedEmbedder(), initial_capacity=1)
+    index.add_many([1, 2, 3], ["x", "y", "xy"])
+    assert len(index) == 3
+
+    results = index.search("x", k=2)
+    assert [key for key, _ in results] == [1, 3]
+    assert results[0][1] == pytest.approx(1.0)
+    assert results[1][1] == pytest.approx(2 ** -0.5)
+
+    assert index.search_many(["x", "y"], k=1) == [[(1, pytest.approx(1.0))], [(2, pytest.approx(1.0))]]
+
+
+def test_incremental_updates():
+    """Test that add replaces, remove compacts and clear empties the index"""
+    index = VectorIndex(FixedEmbedder(), initial_capacity=2)
+    index.add_many([1, 2, 3], ["x", "y", "xy"])
+    index.add(2, "z")
+    assert len(index) == 3
+    assert index.search("z", k=1)[0][0] == 2
+
+    index.remove([1, 99])
+    assert len(index) == 2
+    assert {key for key, _ in index.search("x", k=5)} == {2, 3}
+    assert index.search("x", k=1)[0][0] == 3
+
+    index.clear()
+    assert index.search("x") == []
+
+
+def test_hashing_search_finds_related_text():
+    """Test end to end retrieval with the offline embedder"""
+    index = VectorIndex()
+    texts = ["paris is the capital of france", "bananas are yellow", "the eiffel tower is in paris"]
+    index.add_many(range(3), texts)
+    keys = [key for key, _ in index.search("what is the capital of france", k=2)]
+    assert keys[0] == 0
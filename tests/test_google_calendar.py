@@ -0,0 +1,124 @@
+import random
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_httplib2")
+
+from google.auth.credentials import AnonymousCredentials
+from adoptagentai.integrations.google import services
+from adoptagentai.integrations.google.services import GoogleCalendarTool, _IntervalIndex
+
+
+PARIS = ZoneInfo("Europe/Paris")
+
+
+@pytest.fixture
+def make_calendar_tool(fake_calendar_server, make_google_factory):
+    """Factory fixture building GoogleCalendarTools whose services talk to the local Calendar stand-in"""
+    factory = make_google_factory("calendar", "v3", fake_calendar_server.url)
+    with patch.object(services, "get_api_credentials", return_value=AnonymousCredentials()):
+        yield lambda **kwargs: GoogleCalendarTool("default", service_factory=factory, **kwargs)
+
+
+@pytest.fixture
+def calendar_tool(make_calendar_tool):
+    return make_calendar_tool()
+
+
+def _event_lists(server) -> list:
+    return [query for path, query in server.requests if path.endswith("/events")]
+
+
+def test_interval_index_matches_brute_force():
+    """Test that overlap queries return exactly the overlapping intervals, ordered by start"""
+    rng = random.Random(7)
+    intervals = []
+    for item in range(300):
+        start = rng.uniform(0, 1000)
+        intervals.append((start, start + rng.choice([0, rng.uniform(0, 5), rng.uniform(0, 200)]), item))
+    index = _IntervalIndex(intervals)
+    assert len(index) == 300
+
+    for _ in range(200):
+        low = rng.uniform(-50, 1050)
+        high = low + rng.uniform(0, 100)
+        expected = sorted((interval for interval in intervals if interval[0] < high and interval[1] > low), key=lambda interval: (interval[0], interval[1]))
+        assert index.overlapping(low, high) == expected
+    assert _IntervalIndex().overlapping(0, 10) == []
+
+
+def test_queries_are_answered_from_the_cache(calendar_tool, fake_calendar_server):
+    """Test that repeated queries within the refresh interval don't call the API"""
+    fake_calendar_server.put_event("2026-03-02T09:00:00+01:00", "2026-03-02T10:00:00+01:00", "Standup")
+    fake_calendar_server.put_event("2026-03-02T09:30:00+01:00", "2026-03-02T11:00:00+01:00", "Review")
+    fake_calendar_server.put_event("2026-03-02T14:00:00+01:00", "2026-03-02T15:00:00+01:00", "Focus", transparency="transparent")
+    fake_calendar_server.put_event("2026-03-03", "2026-03-04", "Offsite")
+    fake_calendar_server.put_event("2026-03-10T09:00:00Z", "2026-03-10T10:00:00Z", "Later")
+
+    day = (datetime(2026, 3, 2, 8), datetime(2026, 3, 2, 18))
+    for _ in range(20):
+        events = calendar_tool.list_events(*day)
+    assert [event["summary"] for event in events] == ["Standup", "Review", "Focus"]
+    assert len(_event_lists(fake_calendar_server)) == 1
+
+    assert calendar_tool.busy_intervals(*day) == [(datetime(2026, 3, 2, 9, tzinfo=PARIS), datetime(2026, 3, 2, 11, tzinfo=PARIS))]
+    assert calendar_tool.free_intervals(*day, min_duration=timedelta(hours=2)) == [(datetime(2026, 3, 2, 11, tzinfo=PARIS), datetime(2026, 3, 2, 18, tzinfo=PARIS))]
+    free = calendar_tool.free_intervals(*day)
+    assert free[0] == (datetime(2026, 3, 2, 8, tzinfo=PARIS), datetime(2026, 3, 2, 9, tzinfo=PARIS))
+
+    # All-day events cover the whole day in the calendar's time zone
+    assert calendar_tool.free_intervals(datetime(2026, 3, 3, 8, tzinfo=timezone.utc), datetime(2026, 3, 3, 12, tzinfo=timezone.utc)) == []
+    assert [event["summary"] for event in calendar_tool.list_events(datetime(2026, 3, 3, 23, 30), datetime(2026, 3, 4, 1))] == ["Offsite"]
+    assert len(_event_lists(fake_calendar_server)) == 1
+
+
+def test_refresh_uses_sync_token(make_calendar_tool, fake_calendar_server):
+    """Test that stale caches only fetch the events changed since the last sync token"""
+    tool = make_calendar_tool(refresh_interval=0)
+    kept = fake_calendar_server.put_event("2026-03-02T09:00:00Z", "2026-03-02T10:00:00Z", "Kept")
+    moved = fake_calendar_server.put_event("2026-03-02T11:00:00Z", "2026-03-02T12:00:00Z", "Moved")
+    cancelled = fake_calendar_server.put_event("2026-03-02T13:00:00Z", "2026-03-02T14:00:00Z", "Cancelled")
+    window = (datetime(2026, 3, 2, tzinfo=timezone.utc), datetime(2026, 3, 3, tzinfo=timezone.utc))
+    assert len(tool.list_events(*window)) == 3
+
+    fake_calendar_server.put_event("2026-03-02T16:00:00Z", "2026-03-02T17:00:00Z", "Moved", event_id=moved)
+    fake_calendar_server.cancel_event(cancelled)
+    added = fake_calendar_server.put_event("2026-03-02T15:00:00Z", "2026-03-02T15:30:00Z", "Added")
+
+    assert [event["id"] for event in tool.list_events(*window)] == [kept, added, moved]
+    last = _event_lists(fake_calendar_server)[-1]
+    assert last["syncToken"] == ["token-3"]
+    assert last["fields"] == [services.CALENDAR_EVENT_FIELDS]
+    assert tool.sync() == {"updated": [], "deleted": [], "full": False}
+
+
+def test_expired_sync_token_triggers_full_sync(calendar_tool, fake_calendar_server):
+    """Test that a 410 answer to an incremental sync rebuilds the cache"""
+    first = fake_calendar_server.put_event("2026-03-02T09:00:00Z", "2026-03-02T10:00:00Z")
+    fake_calendar_server.page_size = 1
+    second = fake_calendar_server.put_event("2026-03-02T11:00:00Z", "2026-03-02T12:00:00Z")
+    assert calendar_tool.sync()["full"] is True
+    assert len(calendar_tool.calendars["primary"]["events"]) == 2
+
+    fake_calendar_server.cancel_event(first)
+    fake_calendar_server.expired_before = fake_calendar_server.sequence
+    result = calendar_tool.sync()
+
+    assert result["full"] is True
+    assert list(calendar_tool.calendars["primary"]["events"]) == [second]
+
+
+def test_cache_is_persisted(make_calendar_tool, fake_calendar_server, tmp_path):
+    """Test that a restarted tool resumes from the saved sync token"""
+    cache_path = tmp_path / "calendar.json"
+    fake_calendar_server.put_event("2026-03-02T09:00:00Z", "2026-03-02T10:00:00Z", "Saved")
+    make_calendar_tool(cache_path=str(cache_path)).sync()
+
+    fake_calendar_server.requests.clear()
+    restarted = make_calendar_tool(cache_path=str(cache_path))
+    events = restarted.list_events(datetime(2026, 3, 2, tzinfo=timezone.utc), datetime(2026, 3, 3, tzinfo=timezone.utc))
+    assert [event["summary"] for event in events] == ["Saved"]
+    assert [query["syncToken"] for query in _event_lists(fake_calendar_server)] == [["token-1"]]
@@ -0,0 +1,162 @@
+import io
+import mmap
+import os
+import time
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_httplib2")
+
+from google.auth.credentials import AnonymousCredentials
+from adoptagentai.integrations.google.services import GoogleDriveTool, DRIVE_CHUNK_ALIGNMENT, _Throttle, _align_chunk_size
+
+
+CHUNK = DRIVE_CHUNK_ALIGNMENT
+
+
+@pytest.fixture
+def drive_tool(fake_drive_server, make_google_factory):
+    """Fixture building a GoogleDriveTool whose services talk to the local Drive stand-in"""
+    factory = make_google_factory("drive", "v3", fake_drive_server.url)
+    with patch("adoptagentai.integrations.google.services.get_api_credentials", return_value=AnonymousCredentials()):
+        yield GoogleDriveTool("default", service_factory=factory)
+
+
+def _chunk_puts(server) -> list:
+    return [content_range for method, path, content_range in server.requests if method == "PUT"]
+
+
+def test_align_chunk_size():
+    """Test that upload chunks are multiples of 256 KiB"""
+    assert _align_chunk_size(1) == CHUNK
+    assert _align_chunk_size(3 * CHUNK + 5) == 3 * CHUNK
+
+
+def test_upload_file_in_chunks(drive_tool, fake_drive_server, tmp_path):
+    """Test that a file is uploaded from disk in fixed-size chunks of a resumable session"""
+    content = os.urandom(2 * CHUNK + 100)
+    path = tmp_path / "report.bin"
+    path.write_bytes(content)
+    progress = []
+
+    result = drive_tool.upload_file(str(path), chunk_size=CHUNK, progress=lambda done, total: progress.append((done, total)))
+
+    assert result["name"] == "report.bin"
+    assert fake_drive_server.files[result["id"]]["content"] == content
+    assert _chunk_puts(fake_drive_server) == [f"bytes 0-{CHUNK - 1}/{len(content)}", f"bytes {CHUNK}-{2 * CHUNK - 1}/{len(content)}",
+                                              f"bytes {2 * CHUNK}-{len(content) - 1}/{len(content)}"]
+    assert progress == [(CHUNK, len(content)), (2 * CHUNK, len(content)), (len(content), len(content))]
+
+
+def test_upload_file_resumes_interrupted_session(drive_tool, fake_drive_server):
+    """Test that an interrupted upload continues from the bytes the server already has"""
+    content = os.urandom(3 * CHUNK)
+    fake_drive_server.fail_chunks = {2}
+    session = {}
+
+    assert drive_tool.upload_file(io.BytesIO(content), name="big.bin", chunk_size=CHUNK, session=session, num_retries=0) is None
+    assert session["progress"] == CHUNK
+
+    result = drive_tool.upload_file(io.BytesIO(content), name="big.bin", chunk_size=CHUNK, session=session, num_retries=0)
+    assert fake_drive_server.files[result["id"]]["content"] == content
+    assert session["progress"] == len(content)
+    # One session only, the first chunk is not sent again
+    assert sum(1 for method, _, _ in fake_drive_server.requests if method == "POST") == 1
+    puts = _chunk_puts(fake_drive_server)
+    assert f"bytes */{len(content)}" in puts
+    assert puts.count(f"bytes 0-{CHUNK - 1}/{len(content)}") == 1
+
+
+def test_upload_file_from_mmap_replaces_content(drive_tool, fake_drive_server, tmp_path):
+    """Test that a memory-mapped file can replace the content of an existing file"""
+    file_id = fake_drive_server.add_file(b"old", name="data.bin")
+    path = tmp_path / "data.bin"
+    path.write_bytes(os.urandom(CHUNK + 7))
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        result = drive_tool.upload_file(mapped, file_id=file_id, chunk_size=CHUNK)
+    assert result["id"] == file_id
+    assert fake_drive_server.files[file_id]["content"] == path.read_bytes()
+
+
+def test_download_file_parallel_ranges(drive_tool, fake_drive_server, tmp_path):
+    """Test that downloads fetch byte ranges concurrently and write them at their offsets"""
+    content = os.urandom(10_000)
+    file_id = fake_drive_server.add_file(content)
+    fake_drive_server.latency = 0.05
+    path = tmp_path / "download.bin"
+    progress = []
+
+    assert drive_tool.download_file(file_id, str(path), chunk_size=1000, max_workers=4, progress=lambda done, total: progress.append(done)) == len(content)
+
+    assert path.read_bytes() == content
+    ranges = sorted(header for method, path_, header in fake_drive_server.requests if header and method == "GET")
+    assert len(ranges) == 10
+    assert fake_drive_server.max_in_flight > 1
+    assert sorted(progress)[-1] == len(content)
+
+
+def test_download_file_into_buffers(drive_tool, fake_drive_server, tmp_path):
+    """Test that downloads can go into file objects, bytearrays and memory-mapped files"""
+    content = os.urandom(5000)
+    file_id = fake_drive_server.add_file(content)
+
+    stream = io.BytesIO()
+    assert drive_tool.download_file(file_id, stream, chunk_size=1024) == len(content)
+    assert stream.getvalue() == content
+
+    buffer = bytearray(len(content))
+    drive_tool.download_file(file_id, buffer, chunk_size=1024, max_workers=3)
+    assert bytes(buffer) == content
+
+    path = tmp_path / "mapped.bin"
+    path.write_bytes(b"\0" * len(content))
+    with open(path, "r+b") as file, mmap.mmap(file.fileno(), 0) as mapped:
+        drive_tool.download_file(file_id, mapped, chunk_size=1024)
+    assert path.read_bytes() == content
+
+
+def test_download_missing_file(drive_tool):
+    """Test that API errors are reported and give None"""
+    assert drive_tool.download_file("missing", bytearray(10), num_retries=0) is None
+
+
+def test_download_errors_give_none(drive_tool, fake_drive_server, capsys):
+    """Test that Workspace documents and short ranges are reported and give None"""
+    document_id = fake_drive_server.add_file(b"", name="Notes", mime_type="application/vnd.google-apps.document")
+    assert drive_tool.download_file(document_id, bytearray(10)) is None
+    assert "must be exported" in capsys.readouterr().out
+
+    file_id = fake_drive_server.add_file(os.urandom(1000))
+    metadata = fake_drive_server.metadata
+    with patch.object(fake_drive_server, "metadata", lambda file_id: dict(metadata(file_id), size="2000")):
+        assert drive_tool.download_file(file_id, bytearray(2000), chunk_size=1024, max_workers=1) is None
+    assert "Expected 1024 bytes at offset 0" in capsys.readouterr().out
+
+
+def test_parallel_failure_cancels_pending_batches(drive_tool):
+    """Test that a failing batch stops the batches not started yet instead of waiting for all of them"""
+    started = []
+
+    def fetch(batch):
+        started.append(batch)
+        if batch == 0:
+            raise ValueError("range failed")
+        time.sleep(0.01)
+        return batch
+
+    with pytest.raises(ValueError, match="range failed"):
+        drive_tool._run_parallel(fetch, list(range(100)), 2)
+    assert len(started) < 10
+    assert drive_tool._run_parallel(lambda batch: batch * 2, [1, 2, 3], 2) == [2, 4, 6]
+
+
+def test_throttle_caps_throughput():
+    """Test that the throttle spreads transfers beyond its one second burst"""
+    throttle = _Throttle(4_000_000)
+    started = time.monotonic()
+    throttle.wait(4_000_000)
+    assert time.monotonic() - started < 0.1
+    throttle.wait(1_000_000)
+    assert time.monotonic() - started >= 0.2
+    _Throttle(None).wait(10 ** 12)
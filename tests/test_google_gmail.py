@@ -0,0 +1,149 @@
+import json
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_httplib2")
+
+from google.auth.credentials import AnonymousCredentials
+from adoptagentai.integrations.google import services
+from adoptagentai.integrations.google.services import GoogleGmailTool
+
+
+@pytest.fixture
+def make_gmail_tool(fake_gmail_server, make_google_factory):
+    """Factory fixture building GoogleGmailTools whose services talk to the local Gmail stand-in"""
+    factory = make_google_factory("gmail", "v1", fake_gmail_server.url)
+    with patch.object(services, "get_api_credentials", return_value=AnonymousCredentials()):
+        yield lambda **kwargs: GoogleGmailTool("default", service_factory=factory, **kwargs)
+
+
+@pytest.fixture
+def gmail_tool(make_gmail_tool):
+    return make_gmail_tool()
+
+
+def _message_gets(server) -> list:
+    return [path for method, path, _ in server.requests if "/messages/" in path]
+
+
+def test_get_messages_batches_requests(gmail_tool, fake_gmail_server):
+    """Test that messages are fetched many per round trip with a field mask and metadata headers only"""
+    ids = [fake_gmail_server.add_message(f"Subject {n}") for n in range(12)]
+
+    messages = gmail_tool.get_messages(ids + ["missing"], batch_size=5)
+
+    assert list(messages) == ids
+    assert fake_gmail_server.batches == [5, 5, 3]
+    headers = messages[ids[0]]["payload"]["headers"]
+    assert {header["name"] for header in headers} == {"From", "Subject"}
+    _, _, query = next(request for request in fake_gmail_server.requests if "/messages/" in request[1])
+    assert query["fields"] == [services.GMAIL_MESSAGE_FIELDS]
+    assert query["format"] == ["metadata"]
+
+    # Metadata is served from the cache afterwards
+    assert gmail_tool.get_messages(ids[:3]) == {message_id: messages[message_id] for message_id in ids[:3]}
+    assert len(fake_gmail_server.batches) == 3
+
+
+def test_get_messages_retries_throttled_requests(gmail_tool, fake_gmail_server):
+    """Test that throttled requests of a batch are retried in a later batch"""
+    ids = [fake_gmail_server.add_message(f"Subject {n}") for n in range(4)]
+    fake_gmail_server.throttle_ids = {ids[1]: 1, ids[3]: 2}
+
+    with patch.object(services.time, "sleep") as sleep:
+        messages = gmail_tool.get_messages(ids, format="full", fields=None)
+
+    assert list(messages) == ids
+    assert "raw" in messages[ids[0]] and "body" in messages[ids[0]]["payload"]
+    assert fake_gmail_server.batches == [4, 2, 1]
+    assert sleep.call_count == 2
+    # Full messages aren't cached
+    assert gmail_tool.messages == {}
+
+    fake_gmail_server.throttle_ids = {ids[0]: 5}
+    with patch.object(services.time, "sleep"):
+        assert gmail_tool.get_messages(ids[:1], num_retries=1) is None
+
+
+def test_custom_masks_bypass_the_cache(gmail_tool, fake_gmail_server):
+    """Test that messages fetched with other headers are neither cached nor served from the cache"""
+    ids = [fake_gmail_server.add_message(f"Subject {n}") for n in range(2)]
+
+    narrow = gmail_tool.get_messages(ids, metadata_headers=["Subject"])
+    assert {header["name"] for header in narrow[ids[0]]["payload"]["headers"]} == {"Subject"}
+    assert gmail_tool.messages == {}
+
+    full = gmail_tool.get_messages(ids)
+    assert {header["name"] for header in full[ids[0]]["payload"]["headers"]} == {"From", "Subject"}
+    assert set(gmail_tool.messages) == set(ids)
+
+    narrow = gmail_tool.get_messages(ids, metadata_headers=("Subject",))
+    assert {header["name"] for header in narrow[ids[0]]["payload"]["headers"]} == {"Subject"}
+    assert len(fake_gmail_server.batches) == 3
+
+
+def test_sync_replays_history(gmail_tool, fake_gmail_server):
+    """Test that after a full sync only the history is read and only new messages are fetched"""
+    first, second, third = (fake_gmail_server.add_message(f"Subject {n}") for n in range(3))
+
+    result = gmail_tool.sync()
+    assert result["full"] is True
+    assert sorted(result["added"]) == [first, second, third]
+    assert gmail_tool.history_id == str(fake_gmail_server.history_id)
+
+    fourth = fake_gmail_server.add_message("New")
+    fake_gmail_server.delete_message(second)
+    fake_gmail_server.modify_labels(first, add=["STARRED"], remove=["INBOX"])
+    fake_gmail_server.modify_labels(fourth, add=["IMPORTANT"])
+    fake_gmail_server.requests.clear()
+
+    result = gmail_tool.sync()
+
+    assert result == {"added": [fourth], "deleted": [second], "updated": [first], "full": False, "history_id": str(fake_gmail_server.history_id)}
+    assert _message_gets(fake_gmail_server) == [f"/gmail/v1/users/me/messages/{fourth}"]
+    assert not any(path.endswith("/messages") for _, path, _ in fake_gmail_server.requests)
+    assert sorted(gmail_tool.messages) == [first, third, fourth]
+    assert gmail_tool.messages[first]["labelIds"] == ["STARRED"]
+    assert gmail_tool.messages[fourth]["labelIds"] == ["INBOX", "IMPORTANT"]
+
+    # Nothing changed since
+    assert gmail_tool.sync() == {"added": [], "deleted": [], "updated": [], "full": False, "history_id": str(fake_gmail_server.history_id)}
+
+
+def test_sync_follows_history_pages(gmail_tool, fake_gmail_server):
+    """Test that every page of the history is replayed"""
+    fake_gmail_server.history_page_size = 2
+    gmail_tool.sync()
+    ids = [fake_gmail_server.add_message(f"Subject {n}") for n in range(5)]
+
+    assert sorted(gmail_tool.sync()["added"]) == ids
+    assert fake_gmail_server.batches[-1] == 5
+
+
+def test_sync_expired_history_lists_mailbox_again(gmail_tool, fake_gmail_server):
+    """Test that a full sync runs again when the stored historyId is too old"""
+    first = fake_gmail_server.add_message("Old")
+    gmail_tool.sync()
+    second = fake_gmail_server.add_message("New")
+    fake_gmail_server.delete_message(first)
+    fake_gmail_server.min_history_id = fake_gmail_server.history_id
+
+    result = gmail_tool.sync()
+
+    assert result["full"] is True
+    assert list(gmail_tool.messages) == [second]
+
+
+def test_cache_is_persisted(make_gmail_tool, fake_gmail_server, tmp_path):
+    """Test that the metadata cache and historyId survive a restart"""
+    cache_path = tmp_path / "cache" / "gmail.json"
+    message_id = fake_gmail_server.add_message("Kept")
+    make_gmail_tool(cache_path=str(cache_path)).sync()
+    assert json.loads(cache_path.read_text())["history_id"] == str(fake_gmail_server.history_id)
+
+    fake_gmail_server.requests.clear()
+    restarted = make_gmail_tool(cache_path=str(cache_path))
+    assert restarted.messages[message_id]["snippet"] == "kept"
+    assert restarted.sync()["full"] is False
+    assert _message_gets(fake_gmail_server) == []
@@ -0,0 +1,120 @@
+import json
+import os
+import stat
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_httplib2")
+
+from google.auth.credentials import AnonymousCredentials
+from adoptagentai.integrations.google import services
+from adoptagentai.integrations.google.services import GoogleServiceFactory, GoogleSheetsTool
+
+
+@pytest.fixture
+def factory(tmp_path):
+    """Fixture creating a factory with its caches in a temporary directory"""
+    return GoogleServiceFactory(discovery_cache_dir=str(tmp_path / "discovery"), token_dir=str(tmp_path / "tokens"))
+
+
+def test_discovery_document_is_parsed_once(factory):
+    """Test that bundled discovery documents are loaded once per factory"""
+    with patch.object(services, "get_static_doc", wraps=services.get_static_doc) as static_doc:
+        document = factory.discovery_document("sheets", "v4")
+        assert factory.discovery_document("sheets", "v4") is document
+    assert document["name"] == "sheets"
+    static_doc.assert_called_once_with("sheets", "v4")
+
+
+def test_discovery_document_cache_directory(factory):
+    """Test that documents missing from the bundle are fetched once and then read from the cache directory"""
+    content = json.dumps({"name": "custom", "version": "v1", "rootUrl": "https://custom.googleapis.com/", "servicePath": "", "resources": {}})
+    http = MagicMock()
+    http.request.return_value = (MagicMock(status=200), content.encode("utf-8"))
+    with patch.object(services.httplib2, "Http", return_value=http):
+        assert factory.discovery_document("custom", "v1")["name"] == "custom"
+    assert os.path.exists(os.path.join(factory.discovery_cache_dir, "custom.v1.json"))
+
+    # A new factory works offline from the cache directory
+    offline = GoogleServiceFactory(discovery_cache_dir=factory.discovery_cache_dir, token_dir=factory.token_dir)
+    with patch.object(services.httplib2.Http, "request", side_effect=AssertionError("network used")):
+        assert offline.discovery_document("custom", "v1")["name"] == "custom"
+
+
+def test_services_are_shared_per_thread(factory):
+    """Test that tools of one account share a service per thread, and threads don't share transports"""
+    with patch.object(services, "get_api_credentials", return_value=AnonymousCredentials()), \
+         patch.object(services, "build_from_document", wraps=services.build_from_document) as build:
+        first, second = GoogleSheetsTool("default", service_factory=factory), GoogleSheetsTool("DEFAULT", service_factory=factory)
+        build.assert_not_called()
+        assert first.sheets_service is second.sheets_service
+        assert build.call_count == 1
+
+        other = {}
+        thread = threading.Thread(target=lambda: other.setdefault("service", first.sheets_service))
+        thread.start()
+        thread.join()
+        assert other["service"] is not first.sheets_service
+        assert other["service"]._http is not first.sheets_service._http
+        assert build.call_count == 2
+
+
+def _credentials(valid=True, refresh_token="refresh"):
+    """Build fake google-auth user credentials"""
+    credentials = MagicMock(valid=valid, refresh_token=refresh_token)
+    credentials.to_json.return_value = json.dumps({"refresh_token": refresh_token})
+    return credentials
+
+
+def test_credentials_from_refresh_token(factory, monkeypatch):
+    """Test that a refresh token stored with the account's credentials is used without consent, and the token is saved privately"""
+    monkeypatch.setenv("GOOGLE_HEADLESS_CLIENT_ID", "id")
+    monkeypatch.setenv("GOOGLE_HEADLESS_CLIENT_SECRET", "secret")
+    monkeypatch.setenv("GOOGLE_HEADLESS_REFRESH_TOKEN", "refresh")
+    refreshes = []
+
+    def refresh(credentials, request):
+        refreshes.append(credentials)
+        credentials.token = "access"
+
+    with patch.object(services.Credentials, "refresh", refresh), \
+         patch.object(services.InstalledAppFlow, "from_client_config", side_effect=AssertionError("consent asked")):
+        credentials = factory.credentials("Headless")
+        assert factory.credentials("headless") is credentials
+
+    assert (credentials.client_id, credentials.client_secret, credentials.refresh_token) == ("id", "secret", "refresh")
+    assert refreshes == [credentials]
+    path = os.path.join(factory.token_dir, "headless_token.json")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert json.load(open(path))["refresh_token"] == "refresh"
+
+
+def test_credentials_consent_flow_and_token_file(factory):
+    """Test that the consent flow runs only when no usable token exists"""
+    client = {"client_id": "id", "client_secret": "secret"}
+    flow = MagicMock()
+
+    def consent(port):
+        # Other threads keep using the factory while the user answers
+        assert factory._lock.acquire(blocking=False)
+        factory._lock.release()
+        return _credentials()
+    flow.run_local_server.side_effect = consent
+
+    with patch.object(services, "get_api_credentials", return_value=client), \
+         patch.object(services.InstalledAppFlow, "from_client_config", return_value=flow) as from_client_config:
+        factory.credentials("work")
+        config, scopes = from_client_config.call_args.args
+        assert config["installed"]["client_id"] == "id"
+        assert scopes == services.GOOGLE_SCOPES
+
+    # The saved token is reused by a new factory without any consent
+    stored = _credentials()
+    with patch.object(services, "get_api_credentials", return_value=client), \
+         patch.object(services.Credentials, "from_authorized_user_file", return_value=stored) as from_file, \
+         patch.object(services.InstalledAppFlow, "from_client_config", side_effect=AssertionError("consent asked")):
+        new_factory = GoogleServiceFactory(discovery_cache_dir=factory.discovery_cache_dir, token_dir=factory.token_dir)
+        assert new_factory.credentials("work") is stored
+    assert from_file.call_args.args[0] == os.path.join(factory.token_dir, "work_token.json")
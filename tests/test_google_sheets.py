@@ -0,0 +1,175 @@
+import threading
+from array import array
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("google_auth_httplib2")
+
+from google.auth.credentials import AnonymousCredentials
+from adoptagentai.integrations.google.services import GoogleSheetsTool, GoogleServiceFactory, _split_a1_range, _chunk_value_range, _parse_sheet_range
+
+
+@pytest.fixture
+def sheets_tool(fake_sheets_server, tmp_path):
+    """Fixture building a GoogleSheetsTool whose services talk to the local Sheets stand-in"""
+    factory = GoogleServiceFactory(discovery_cache_dir=str(tmp_path / "discovery"), token_dir=str(tmp_path / "tokens"),
+                                   client_options={"sheets": {"api_endpoint": fake_sheets_server.url}})
+    with patch("adoptagentai.integrations.google.services.get_api_credentials", return_value=AnonymousCredentials()):
+        yield GoogleSheetsTool("default", service_factory=factory)
+
+
+def test_split_a1_range():
+    """Test that the start cell of A1 ranges is found, with or without a sheet name"""
+    assert _split_a1_range("Sheet1!B3:D10") == ("Sheet1!", "B", 3)
+    assert _split_a1_range("'My sheet'!aa12") == ("'My sheet'!", "AA", 12)
+    assert _split_a1_range("C7") == ("", "C", 7)
+    assert _split_a1_range("Sheet1!A:D") is None
+    assert _split_a1_range("NamedRange") is None
+
+
+def test_chunk_value_range():
+    """Test that large writes are split into row chunks anchored at their own start rows"""
+    values = [[f"r{row}", row] for row in range(10)]
+    chunks = _chunk_value_range("Data!B5:C14", values, max_bytes=40)
+    assert len(chunks) > 1
+    assert chunks[0]["range"] == "Data!B5"
+    assert [row for chunk in chunks for row in chunk["values"]] == values
+    assert chunks[1]["range"] == f"Data!B{5 + len(chunks[0]['values'])}"
+
+    # Ranges without a start cell can't be split
+    assert _chunk_value_range("Named", values, max_bytes=40) == [{"range": "Named", "values": values}]
+
+
+def test_batch_read_spreadsheet(sheets_tool, fake_sheets_server):
+    """Test that many ranges are read with a single batchGet request"""
+    fake_sheets_server.write("Sheet1!A1", [["a", "b"], ["c", "d"]])
+    fake_sheets_server.write("Other!C3", [["x"]])
+
+    values = sheets_tool.batch_read_spreadsheet("sheet-id", ["Sheet1!A1:B2", "Other!C3", "Sheet1!Z100"])
+    assert values == {"Sheet1!A1:B2": [["a", "b"], ["c", "d"]], "Other!C3": [["x"]], "Sheet1!Z100": []}
+    assert [path for _, path, _ in fake_sheets_server.requests] == ["/v4/spreadsheets/sheet-id/values:batchGet"]
+
+
+def test_batch_read_splits_long_range_lists(sheets_tool, fake_sheets_server):
+    """Test that range lists over the per-request limit are spread over several requests, in order"""
+    ranges = [f"Sheet1!A{row}" for row in range(1, 251)]
+    fake_sheets_server.write("Sheet1!A1", [[row] for row in range(1, 251)])
+
+    values = sheets_tool.batch_read_spreadsheet("sheet-id", ranges, max_workers=3)
+    assert list(values) == ranges
+    assert values["Sheet1!A250"] == [[250]]
+    assert len(fake_sheets_server.requests) == 3
+
+
+def test_batch_update_spreadsheet(sheets_tool, fake_sheets_server):
+    """Test that many ranges are written with one batchUpdate request"""
+    result = sheets_tool.batch_update_spreadsheet("sheet-id", {"Sheet1!A1": [[1, 2]], "Sheet1!A2": [[3, 4]], "Other!B2": [["x"]]})
+    assert result["totalUpdatedCells"] == 5
+    assert result["requests"] == 1
+    assert len(result["responses"]) == 3
+    assert fake_sheets_server.read("Sheet1!A1:B2")["values"] == [[1, 2], [3, 4]]
+    assert len(fake_sheets_server.requests) == 1
+
+
+def test_large_update_is_chunked(sheets_tool, fake_sheets_server):
+    """Test that a write over the request size limit is chunked and every chunk fits the limit"""
+    fake_sheets_server.max_body_bytes = 20_000
+    values = [[f"row {row}", row, "x" * 50] for row in range(2000)]
+
+    threads = set()
+    original = GoogleServiceFactory.service
+
+    def tracking(self, *args, **kwargs):
+        threads.add(threading.get_ident())
+        return original(self, *args, **kwargs)
+
+    with patch.object(GoogleServiceFactory, "service", tracking):
+        result = sheets_tool.batch_update_spreadsheet("sheet-id", [("Sheet1!A1", values)], max_request_bytes=15_000, max_workers=4)
+
+    assert result["totalUpdatedRows"] == 2000
+    assert result["requests"] > 1
+    assert all(length <= 20_000 for _, _, length in fake_sheets_server.requests)
+    assert fake_sheets_server.read("Sheet1!A1:C2000")["values"] == values
+    assert 1 < len(threads) <= 4
+
+
+def test_batch_update_reports_errors(sheets_tool, fake_sheets_server):
+    """Test that HTTP errors are reported like in update_spreadsheet"""
+    fake_sheets_server.max_body_bytes = 10
+    assert sheets_tool.batch_update_spreadsheet("sheet-id", {"Sheet1!A1": [[1]]}) is None
+
+
+def _value_requests(server):
+    """Return the paths of the values requests the server received"""
+    return [path for _, path, _ in server.requests if "/values" in path]
+
+
+def test_parse_sheet_range():
+    """Test that sheet names and open ended A1 ranges are understood"""
+    assert _parse_sheet_range("Data") == ("Data!", "Data", "A", 1, None, None)
+    assert _parse_sheet_range("Data!B3:D") == ("Data!", "Data", "B", 3, "D", None)
+    assert _parse_sheet_range("'It''s'!A:C") == ("'It''s'!", "It's", "A", 1, "C", None)
+    assert _parse_sheet_range("A2:B10") == ("", "", "A", 2, "B", 10)
+    with pytest.raises(ValueError):
+        _parse_sheet_range("Data!not a range")
+
+
+def test_iter_spreadsheet_pages(sheets_tool, fake_sheets_server):
+    """Test that a sheet is read in row windows, one request per page"""
+    rows = [[f"r{row}", row, row % 2 == 0] for row in range(25)]
+    fake_sheets_server.write("Data!A1", rows)
+
+    pages = list(sheets_tool.iter_spreadsheet("sheet-id", "Data", page_rows=10))
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [row for page in pages for row in page] == rows
+    assert len(_value_requests(fake_sheets_server)) == 3
+
+    # Bounded ranges start and stop where asked, with or without prefetching
+    pages = list(sheets_tool.iter_spreadsheet("sheet-id", "Data!B3:C12", page_rows=4, prefetch=False))
+    assert [row for page in pages for row in page] == [row[1:] for row in rows[2:12]]
+
+
+def test_iter_spreadsheet_is_lazy(sheets_tool, fake_sheets_server):
+    """Test that pages are only fetched as they are consumed, and reading stops at the first empty window"""
+    fake_sheets_server.grid_size["Data"] = (100000, 3)
+    fake_sheets_server.write("Data!A1", [[row] for row in range(15)])
+
+    pages = sheets_tool.iter_spreadsheet("sheet-id", "Data", page_rows=10)
+    assert next(pages) == [[row] for row in range(10)]
+    assert len(_value_requests(fake_sheets_server)) <= 2
+    assert sum(len(page) for page in pages) == 5
+    assert len(_value_requests(fake_sheets_server)) == 3
+
+
+def test_iter_spreadsheet_columnar(sheets_tool, fake_sheets_server):
+    """Test that columnar pages hold typed NumPy arrays named by the header row"""
+    np = pytest.importorskip("numpy")
+    fake_sheets_server.write("Data!A1", [["name", "score", "active"]] + [[f"n{row}", row * 1.5, row % 2 == 0] for row in range(12)])
+    fake_sheets_server.write("Data!B6", [[""]])
+    fake_sheets_server.write("Data!B12", [["N/A"]])
+
+    pages = list(sheets_tool.iter_spreadsheet("sheet-id", "Data", page_rows=5, columnar=True, header=True))
+    assert [len(page["name"]) for page in pages] == [4, 5, 3]
+    first = pages[0]
+    assert set(first) == {"name", "score", "active"}
+    assert first["score"].dtype == np.float64
+    assert first["active"].dtype == np.bool_
+    assert list(first["name"]) == ["n0", "n1", "n2", "n3"]
+
+    scores = np.concatenate([page["score"] for page in pages])
+    assert np.isnan(scores[4]) and np.isnan(scores[10])
+    assert np.nansum(scores) == pytest.approx(sum(row * 1.5 for row in range(12)) - 4 * 1.5 - 10 * 1.5)
+
+    # Explicit types win over inference
+    pages = list(sheets_tool.iter_spreadsheet("sheet-id", "Data", page_rows=20, columnar=True, header=True, dtypes={"score": "str"}))
+    assert pages[0]["score"].dtype == object
+
+
+def test_iter_spreadsheet_columnar_without_numpy(sheets_tool, fake_sheets_server):
+    """Test that columnar pages fall back to the array module without NumPy"""
+    fake_sheets_server.write("Data!A1", [[1, "a"], [2, "b"], ["", "c"]])
+    with patch("adoptagentai.integrations.google.services.np", None):
+        page = next(sheets_tool.iter_spreadsheet("sheet-id", "Data", columnar=True, dtypes={"0": "int"}))
+    assert page["0"] == array("q", [1, 2, 0])
+    assert page["1"] == ["a", "b", "c"]
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+# Cumulative time allowed for `import adoptagentai`, in milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get("ADOPTAGENTAI_IMPORT_BUDGET_MS", "150"))
+
+
+def _run(code: str, *flags) -> subprocess.CompletedProcess:
+    """Run code in a fresh interpreter that sees the same import path as the tests"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, env=env, check=True)
+
+
+def _import_time_ms() -> float:
+    """Return the cumulative import time of the package reported by -X importtime"""
+    result = _run("import adoptagentai", "-X", "importtime")
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == "adoptagentai":
+            return int(fields[1]) / 1000
+    raise AssertionError(f"adoptagentai not found in import time output:\n{result.stderr}")
+
+
+def test_import_time_budget():
+    """Test that importing the package stays within the import-time budget"""
+    best = min(_import_time_ms() for _ in range(3))
+    assert best <= IMPORT_BUDGET_MS, f"import adoptagentai took {best:.1f} ms, budget is {IMPORT_BUDGET_MS:.0f} ms"
+
+
+def test_heavy_dependencies_are_lazy():
+    """Test that provider SDKs and optional dependencies are not imported eagerly"""
+    result = _run(
+        "import sys, adoptagentai, adoptagentai.core, adoptagentai.integrations\n"
+        "print(','.join(m for m in ('openai', 'httpx', 'numpy', 'googleapiclient', 'sqlite3') if m in sys.modules))"
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_exports_resolve():
+    """Test that lazily exported names are still importable"""
+    result = _run(
+        "import adoptagentai\n"
+        "from adoptagentai import gpt_4o_strategy, gpt_4o_mini_strategy\n"
+        "from adoptagentai.core import ResponseCache, get_openai_client, MemoryStore\n"
+        "import adoptagentai.core as core\n"
+        "assert all(hasattr(core, name) for name in core.__all__ if name not in ('HashingEmbedder', 'VectorIndex'))\n"
+        "assert all(hasattr(adoptagentai, name) for name in adoptagentai.__all__)"
+    )
+    assert result.returncode == 0
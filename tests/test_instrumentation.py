@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
+from adoptagentai.core.agent import Agent
+from adoptagentai.core.instrumentation import CallRecord, HistogramSink, PrometheusSink, CallbackSink, response_usage
+
+
+@pytest.fixture
+def mock_api_credentials():
+    """Fixture to mock get_api_credentials function"""
+    with patch('adoptagentai.core.agent.get_api_credentials') as mock_get:
+        mock_get.return_value = {"api_key": "test-api-key"}
+        yield mock_get
+
+
+def _response(input_tokens=12, output_tokens=5, cached_tokens=4):
+    """Build a fake Responses API response with usage"""
+    details = SimpleNamespace(cached_tokens=cached_tokens)
+    usage = SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens, input_tokens_details=details)
+    return SimpleNamespace(usage=usage)
+
+
+def _record(model="gpt-4o", total_latency=0.3, error=None, **kwargs):
+    """Build a call record with sensible defaults"""
+    return CallRecord(agent="a", model=model, account="default", strategy="s", started_at=0.0,
+                      queue_time=0.01, network_time=total_latency - 0.01, total_latency=total_latency,
+                      error=error, **kwargs)
+
+
+def test_response_usage():
+    """Test that token usage is read from responses and stream events"""
+    assert response_usage(_response()) == (12, 5, 4)
+    event = SimpleNamespace(type="response.completed", response=_response(3, 2, 0))
+    assert response_usage(event) == (3, 2, 0)
+    assert response_usage("plain text") == (None, None, None)
+
+
+def test_run_agent_records_calls(mock_api_credentials):
+    """Test that run_agent sends one record per call with latency, usage and errors"""
+    records = []
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", metrics_sinks=[CallbackSink(records.append)])
+    agent.strategy = MagicMock(return_value=_response(), __name__="gpt_4o_strategy")
+
+    agent.run_agent("Hello")
+    record = records[-1]
+    assert (record.agent, record.model, record.account, record.strategy) == ("TestAgent", "gpt-4o", "default", "gpt_4o_strategy")
+    assert (record.input_tokens, record.output_tokens, record.cached_tokens) == (12, 5, 4)
+    assert record.error is None and not record.streamed
+    assert 0 <= record.queue_time <= record.total_latency
+    assert record.queue_time + record.network_time == pytest.approx(record.total_latency)
+
+    agent.strategy.side_effect = TimeoutError("slow")
+    assert agent.run_agent("Hello") == "Error executing model."
+    assert records[-1].error == "TimeoutError"
+    assert records[-1].input_tokens is None
+
+
+def test_stream_and_async_calls_are_recorded(mock_api_credentials):
+    """Test that streamed and async calls are recorded with their usage"""
+    records = []
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", metrics_sinks=[CallbackSink(records.append)])
+    events = [MagicMock(type="response.output_text.delta", delta="Hi"), SimpleNamespace(type="response.completed", response=_response(7, 1, 0))]
+    agent.strategy = MagicMock(return_value=iter(events))
+    assert list(agent.run_agent_stream("Hello")) == ["Hi"]
+    assert records[-1].streamed
+    assert records[-1].time_to_first_token is not None
+    assert records[-1].input_tokens == 7
+
+    agent.async_strategy = AsyncMock(return_value=_response())
+    asyncio.run(agent.arun_agent("Hello"))
+    assert records[-1].output_tokens == 5
+
+
+def test_batch_wait_counts_as_queue_time(mock_api_credentials):
+    """Test that time spent waiting for a batch worker is reported as queue time"""
+    records = []
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", metrics_sinks=[CallbackSink(records.append)])
+
+    def slow_strategy(*args, **kwargs):
+        import time
+        time.sleep(0.05)
+        return _response()
+
+    agent.strategy = slow_strategy
+    agent.run_batch(["a", "b"], max_concurrency=1)
+    assert max(record.queue_time for record in records) >= 0.04
+
+
+def test_failing_sink_does_not_fail_call(mock_api_credentials):
+    """Test that an exception raised by a sink is logged and the response still returned"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+    agent.strategy = MagicMock(return_value="response")
+    agent.add_metrics_sink(CallbackSink(MagicMock(side_effect=RuntimeError("sink down"))))
+    assert agent.run_agent("Hello") == "response"
+
+
+def test_no_sinks_no_records(mock_api_credentials):
+    """Test that without sinks no record is built"""
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+    agent.strategy = MagicMock(return_value="response")
+    with patch('adoptagentai.core.agent.CallRecord') as record_class:
+        agent.run_agent("Hello")
+    record_class.assert_not_called()
+
+
+def test_agent_does_not_configure_logging(mock_api_credentials, capsys):
+    """Test that creating and running an agent neither configures logging nor prints"""
+    handlers = list(logging.getLogger().handlers)
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+    agent.strategy = MagicMock(return_value="response")
+    agent.run_agent("Hello")
+    assert logging.getLogger().handlers == handlers
+    assert capsys.readouterr().out == ""
+
+
+def test_histogram_sink():
+    """Test that the histogram sink aggregates latency, tokens and errors per model"""
+    sink = HistogramSink(buckets=(0.1, 0.5, 1.0))
+    for latency in (0.05, 0.2, 0.3, 0.7):
+        sink.record(_record(total_latency=latency, input_tokens=10, output_tokens=2))
+    sink.record(_record(total_latency=2.0, error="TimeoutError"))
+
+    snapshot = sink.snapshot()["gpt-4o"]
+    assert snapshot["calls"] == 5
+    assert snapshot["errors"] == {"TimeoutError": 1}
+    assert snapshot["tokens"] == {"input_tokens": 40, "output_tokens": 8}
+    assert snapshot["latency"]["total_latency"]["buckets"] == {0.1: 1, 0.5: 2, 1.0: 1, float("inf"): 1}
+    assert sink.quantile(0.5, "gpt-4o") == 0.5
+    assert sink.quantile(1.0, "gpt-4o") == float("inf")
+    assert sink.quantile(0.5, "unknown") is None
+
+    sink.reset()
+    assert sink.snapshot() == {}
+
+
+def test_prometheus_sink_render():
+    """Test that the Prometheus sink renders cumulative buckets and counters"""
+    sink = PrometheusSink(buckets=(0.1, 1.0))
+    sink.record(_record(total_latency=0.5, input_tokens=3))
+    sink.record(_record(total_latency=0.05, error="RateLimitError"))
+    text = sink.render()
+
+    assert 'adoptagentai_calls_total{model="gpt-4o"} 2' in text
+    assert 'adoptagentai_errors_total{model="gpt-4o",error="RateLimitError"} 1' in text
+    assert 'adoptagentai_tokens_total{model="gpt-4o",kind="input"} 3' in text
+    assert 'adoptagentai_total_latency_seconds_bucket{model="gpt-4o",le="0.1"} 1' in text
+    assert 'adoptagentai_total_latency_seconds_bucket{model="gpt-4o",le="1.0"} 2' in text
+    assert 'adoptagentai_total_latency_seconds_bucket{model="gpt-4o",le="+Inf"} 2' in text
+    assert 'adoptagentai_total_latency_seconds_count{model="gpt-4o"} 2' in text
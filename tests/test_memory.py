@@ -0,0 +1,247 @@
+import threading
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from adoptagentai.core.memory import MemoryEntry, MemoryStore, SQLiteMemoryBackend
+
+
+@pytest.fixture
+def store():
+    """Fixture providing a store with entries one minute apart"""
+    start = datetime(2025, 1, 1, 12, 0)
+    store = MemoryStore()
+    for i in range(6):
+        store.add(f"entry {i}", "even" if i % 2 == 0 else "odd", start + timedelta(minutes=i))
+    return store
+
+
+def test_memory_entry_compatibility():
+    """Test that entries read and compare like the legacy memory dicts"""
+    now = datetime.now()
+    entry = MemoryEntry("data", "cat", now)
+    assert entry["data"] == "data"
+    assert entry.get("category") == "cat"
+    assert dict(entry) == {"data": "data", "category": "cat", "timestamp": now}
+    assert entry == {"data": "data", "category": "cat", "timestamp": now}
+    assert not hasattr(entry, "__dict__")
+    with pytest.raises(KeyError):
+        entry["id"]
+
+
+def test_memory_entry_is_a_mutable_mapping(store):
+    """Test that entries keep the dict interface, with assignments reindexed by their store"""
+    from collections.abc import Mapping
+
+    entry = store.retrieve("odd")[0]
+    assert isinstance(entry, Mapping)
+    assert list(entry) == ["data", "category", "timestamp"] and "data" in entry and len(entry) == 3
+    assert dict(entry.items()) == entry.to_dict()
+
+    entry["category"] = "even"
+    entry["timestamp"] = datetime(2025, 1, 1, 13, 0)
+    assert [e.data for e in store.retrieve("odd")] == ["entry 3", "entry 5"]
+    assert [e.data for e in store.retrieve("even", limit=1)] == ["entry 1"]
+    assert [e.data for e in store.retrieve(limit=1)] == ["entry 1"]
+    with pytest.raises(KeyError):
+        entry["id"] = 3
+
+    store.append({"data": "appended", "category": "odd", "timestamp": datetime(2025, 1, 1, 14, 0)})
+    store.append(MemoryEntry("entry", "odd", datetime(2025, 1, 1, 15, 0)))
+    assert [e.data for e in store.retrieve("odd")] == ["entry 3", "entry 5", "appended", "entry"]
+
+
+def test_store_compares_like_list():
+    """Test that a store built from dicts equals the original list"""
+    now = datetime.now()
+    memory = [{"data": "a", "category": None, "timestamp": now}, {"data": "b", "category": "x", "timestamp": now}]
+    store = MemoryStore(memory)
+    assert store == memory
+    assert len(store) == 2
+    assert store[1]["data"] == "b"
+    assert MemoryStore() == []
+
+
+def test_store_indexes_like_list(store):
+    """Test that indexing and slicing follow time order and skip cleared entries"""
+    assert store[0].data == "entry 0"
+    assert store[-1].data == "entry 5"
+    assert [e.data for e in store[1:3]] == ["entry 1", "entry 2"]
+    store.clear("even")
+    assert [store[i].data for i in range(len(store))] == ["entry 1", "entry 3", "entry 5"]
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_aware_and_naive_timestamps_mix():
+    """Test that legacy dicts with timezone-aware timestamps are stored as naive local time"""
+    aware = datetime.now(timezone.utc) - timedelta(minutes=1)
+    store = MemoryStore([{"data": "old", "category": "c", "timestamp": aware}])
+    store.add("new", "c")
+    assert [e.data for e in store.retrieve("c")] == ["old", "new"]
+    assert store[0].timestamp == aware.astimezone().replace(tzinfo=None)
+    assert [e.data for e in store.retrieve(since=timedelta(seconds=30))] == ["new"]
+    assert [e.data for e in store.retrieve(until=aware)] == ["old"]
+    store[1]["timestamp"] = aware - timedelta(minutes=1)
+    assert [e.data for e in store] == ["new", "old"]
+
+
+def test_concurrent_adds_and_retrieves():
+    """Test that threads adding and reading at once keep the indexes consistent"""
+    store = MemoryStore()
+
+    def work(worker):
+        for i in range(500):
+            store.add(f"{worker}-{i}", f"category-{i % 3}")
+            store.retrieve(f"category-{i % 3}", limit=5)
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store) == 4000
+    assert len(store.retrieve()) == 4000
+    assert sum(len(store.retrieve(category)) for category in store.categories()) == 4000
+
+
+def test_retrieve_by_category_and_time(store):
+    """Test category, time range and latest-K queries"""
+    assert [e.data for e in store.retrieve("odd")] == ["entry 1", "entry 3", "entry 5"]
+    assert store.retrieve("missing") == []
+
+    start = datetime(2025, 1, 1, 12, 2)
+    end = datetime(2025, 1, 1, 12, 4)
+    assert [e.data for e in store.retrieve(since=start, until=end)] == ["entry 2", "entry 3", "entry 4"]
+    assert [e.data for e in store.retrieve("even", since=start, until=end)] == ["entry 2", "entry 4"]
+
+    assert [e.data for e in store.retrieve(limit=2)] == ["entry 4", "entry 5"]
+    assert [e.data for e in store.retrieve("even", limit=2)] == ["entry 2", "entry 4"]
+    assert store.retrieve(limit=0) == []
+
+    # timedelta is relative to now, so every entry from 2025 is too old
+    assert store.retrieve(since=timedelta(minutes=5)) == []
+
+
+def test_out_of_order_timestamps_are_indexed(store):
+    """Test that an entry older than the newest one lands in time order"""
+    store.add("late", "odd", datetime(2025, 1, 1, 12, 2, 30))
+    assert [e.data for e in store.retrieve("odd")] == ["entry 1", "late", "entry 3", "entry 5"]
+    assert [e.data for e in store.retrieve(limit=1)] == ["entry 5"]
+
+
+def test_clear(store):
+    """Test clearing one category and then everything"""
+    removed = store.clear("even")
+    assert len(removed) == 3
+    assert [e.data for e in store] == ["entry 1", "entry 3", "entry 5"]
+    assert [e.data for e in store.retrieve(limit=2)] == ["entry 3", "entry 5"]
+    assert store.categories() == ["odd"]
+    assert store.clear("even") == []
+
+    store.clear()
+    assert len(store) == 0
+    assert store.retrieve(limit=3) == []
+
+
+def test_sqlite_backend_persists_and_pages(tmp_path):
+    """Test that entries survive a restart and are loaded lazily by category and time"""
+    path = str(tmp_path / "memory.sqlite")
+    start = datetime(2025, 1, 1, 12, 0, 0, 123456)
+    backend = SQLiteMemoryBackend(path, sync_every=1000, sync_interval=3600, page_size=2)
+    store = MemoryStore(backend=backend)
+    for i in range(5):
+        store.add(f"entry {i}", "even" if i % 2 == 0 else "odd", start + timedelta(minutes=i))
+    assert backend._pending == 5
+    backend.close()
+
+    backend = SQLiteMemoryBackend(path, page_size=2)
+    store = MemoryStore(backend=backend)
+    assert len(store) == 5
+    assert store._entries == {}
+
+    latest = store.retrieve(limit=2)
+    assert [e.data for e in latest] == ["entry 3", "entry 4"]
+    assert latest[0].timestamp == start + timedelta(minutes=3)
+
+    assert [e.data for e in store.retrieve("even")] == ["entry 0", "entry 2", "entry 4"]
+    assert "even" in store._loaded_categories
+    assert sorted(store._entries) == [1, 3, 4, 5]
+
+    store.clear("odd")
+    assert [e.data for e in store] == ["entry 0", "entry 2", "entry 4"]
+    store.add("new", "odd")
+    backend.close()
+
+    store = MemoryStore(backend=SQLiteMemoryBackend(path))
+    assert [e.data for e in store.retrieve("odd")] == ["new"]
+    store.clear()
+    assert len(store) == 0
+
+
+def test_clear_category_then_add_with_backend(tmp_path):
+    """Test that entries added after clearing a category are listed once, even if the backend reuses ids"""
+    store = MemoryStore(backend=SQLiteMemoryBackend(str(tmp_path / "memory.sqlite")))
+    for data, category in [("b0", "b"), ("b1", "b"), ("b2", "b"), ("a0", "a"), ("a1", "a")]:
+        store.add(data, category)
+    store.clear("a")
+    store.add("new", "c")
+    assert [e.data for e in store.retrieve()] == ["b0", "b1", "b2", "new"]
+    assert len(store) == 4
+
+    # A store whose backend hands out the id of a cleared entry again
+    store = MemoryStore()
+    for data, category in [("b0", "b"), ("a0", "a")]:
+        store.add(data, category)
+    store.clear("a")
+    store.add_entry(MemoryEntry("new", "c", id=1))
+    assert [e.data for e in store.retrieve()] == ["b0", "new"]
+
+
+def test_sqlite_backend_persists_updates(tmp_path):
+    """Test that item assignments on stored entries are written to the backend"""
+    path = str(tmp_path / "memory.sqlite")
+    backend = SQLiteMemoryBackend(path)
+    store = MemoryStore(backend=backend)
+    store.add("first", "notes")
+    store.add("second", "notes")
+    store.retrieve("notes")[0]["data"] = "edited"
+    store.retrieve("notes")[1]["category"] = "facts"
+    backend.close()
+
+    store = MemoryStore(backend=SQLiteMemoryBackend(path))
+    assert [e.data for e in store.retrieve("notes")] == ["edited"]
+    assert [e.data for e in store.retrieve("facts")] == ["second"]
+
+
+def test_sqlite_backend_batches_commits(tmp_path):
+    """Test that writes are committed once per batch instead of once per entry"""
+    backend = SQLiteMemoryBackend(str(tmp_path / "memory.sqlite"), sync_every=3, sync_interval=3600)
+    store = MemoryStore(backend=backend)
+    with patch.object(backend, "_commit", wraps=backend._commit) as mock_commit:
+        for i in range(7):
+            store.add(f"entry {i}")
+        assert mock_commit.call_count == 2
+        backend.flush()
+        assert mock_commit.call_count == 3
+    backend.close()
+
+
+def test_sqlite_backend_commits_idle_writes(tmp_path):
+    """Test that writes left pending by an idle writer are committed once the sync interval passes"""
+    import sqlite3
+    import time
+
+    path = str(tmp_path / "memory.sqlite")
+    backend = SQLiteMemoryBackend(path, sync_every=100, sync_interval=0.2)
+    store = MemoryStore(backend=backend)
+    for i in range(5):
+        store.add(f"entry {i}")
+
+    # Another connection only sees committed rows, as would a process restarted after a crash
+    reader = sqlite3.connect(path)
+    deadline = time.monotonic() + 5
+    while reader.execute("SELECT COUNT(*) FROM memory").fetchone()[0] < 5 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert reader.execute("SELECT COUNT(*) FROM memory").fetchone()[0] == 5
+    reader.close()
+    backend.close()
@@ -0,0 +1,74 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from adoptagentai.core import modelStrategies
+from adoptagentai.core.agent import Agent
+from adoptagentai.core.modelStrategies import register_strategy, resolve_strategy, resolve_instructions, resolve_model
+from adoptagentai.utils.api_keys import API_REQUIREMENTS
+
+
+@pytest.fixture
+def clean_registry():
+    """Fixture to restore the strategy registry and API requirements after a test"""
+    strategies = {name: dict(entry) for name, entry in modelStrategies._STRATEGIES.items()}
+    requirements = dict(API_REQUIREMENTS)
+    yield
+    modelStrategies._STRATEGIES.clear()
+    modelStrategies._STRATEGIES.update(strategies)
+    API_REQUIREMENTS.clear()
+    API_REQUIREMENTS.update(requirements)
+
+
+def test_resolve_builtin_strategies():
+    """Test exact and prefix resolution of the built-in strategies"""
+    assert resolve_strategy("gpt-4o") is modelStrategies.gpt_4o_strategy
+    assert resolve_strategy("GPT-4o-mini") is modelStrategies.gpt_4o_mini_strategy
+    assert resolve_strategy("gpt-4o-mini-2024-07-18") is modelStrategies.gpt_4o_mini_strategy
+    assert resolve_strategy("gpt-4o-2024-08-06") is modelStrategies.gpt_4o_strategy
+    assert resolve_strategy("gpt-4o", asynchronous=True) is modelStrategies.gpt_4o_strategy_async
+    assert resolve_strategy("gpt-4omni") is None
+    assert resolve_strategy("claude") is None
+    assert resolve_instructions("gpt-4o-mini") == modelStrategies.GPT_4O_MINI_INSTRUCTIONS
+    assert resolve_instructions("unknown") == ""
+    assert resolve_model("GPT-4o-2024-08-06") == "gpt-4o"
+    assert resolve_model("gpt-4o-mini-2024-07-18") == "gpt-4o-mini"
+    assert resolve_model("claude") is None
+
+
+def test_agent_with_dated_model_name(monkeypatch):
+    """Test that a dated model uses the credentials of the registered model serving it"""
+    monkeypatch.setenv("GPT-4O_DATED_API_KEY", "dated-key")
+    agent = Agent(name="TestAgent", model_name="gpt-4o-2024-08-06", model_account_name="dated")
+
+    assert agent.model_credentials == {"api_key": "dated-key"}
+    assert agent.strategy is modelStrategies.gpt_4o_strategy
+
+    agent.update_model("gpt-4o-mini-2024-07-18", "dated")
+    assert agent.model_credentials == {}
+    assert agent.strategy is modelStrategies.gpt_4o_mini_strategy
+
+
+def test_register_strategy(clean_registry):
+    """Test that new providers plug in through the decorator"""
+    @register_strategy("my-model", requirements=["api_key", "endpoint"], instructions="Be nice.")
+    def my_strategy(model_name, prompt, credentials, **kwargs):
+        return prompt
+
+    assert resolve_strategy("my-model-v2") is my_strategy
+    assert resolve_strategy("my-model", asynchronous=True) is None
+    assert resolve_instructions("my-model") == "Be nice."
+    assert API_REQUIREMENTS["my-model"] == ["api_key", "endpoint"]
+
+
+def test_entry_points_are_loaded_once(clean_registry):
+    """Test that strategy modules advertised by installed packages are imported on first lookup"""
+    def load():
+        register_strategy("plugin-model")(MagicMock(name="plugin_strategy"))
+
+    entry_point = MagicMock()
+    entry_point.load.side_effect = load
+    with patch.object(modelStrategies, "_entry_points_loaded", False):
+        with patch("importlib.metadata.entry_points", return_value=[entry_point]) as mock_entry_points:
+            assert resolve_strategy("plugin-model") is not None
+            resolve_strategy("gpt-4o")
+    mock_entry_points.assert_called_once_with(group="adoptagentai.strategies")
+    entry_point.load.assert_called_once()
@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import patch
+from adoptagentai.core import prompting
+from adoptagentai.core.prompting import PromptAssembler, count_tokens, truncate_to_tokens, context_window
+
+
+@pytest.fixture(autouse=True)
+def heuristic_tokenizer():
+    """Fixture to use the built-in token estimate so counts don't depend on tiktoken"""
+    with patch.object(prompting, "tiktoken", None):
+        yield
+
+
+def test_count_tokens():
+    """Test the local token estimate"""
+    assert count_tokens("") == 0
+    assert count_tokens("Hello, world!") == 4
+    assert count_tokens("internationalization") == 4
+
+
+def test_memory_token_counts_are_cached():
+    """Test that memory entries are counted once while prompts are counted on every call"""
+    assembler = PromptAssembler(memory_cache_size=2)
+    memory = [("repeated memory entry", 1.0), ("another entry", 0.5)]
+    with patch.object(prompting, "count_tokens", wraps=count_tokens) as counter:
+        assembler.assemble("gpt-4o", "First prompt", memory)
+        assembler.assemble("gpt-4o", "Second prompt", memory)
+    counted = [call.args[0] for call in counter.call_args_list]
+    assert counted.count("- repeated memory entry") == 1
+    assert counted.count("First prompt") == 1 and counted.count("Second prompt") == 1
+
+    assembler.assemble("gpt-4o", "Third prompt", [("new entry", 1.0)])
+    assert len(assembler._memory_tokens) == 2
+
+
+def test_truncate_to_tokens():
+    """Test that truncation keeps whole words within the limit"""
+    assert truncate_to_tokens("one two three four", 2) == "one two"
+    assert truncate_to_tokens("one two", 5) == "one two"
+    assert truncate_to_tokens("one two", 0) == ""
+
+
+def test_context_window():
+    """Test exact, dated and unknown model names"""
+    assert context_window("gpt-4o") == 128000
+    assert context_window("GPT-4o-mini-2024-07-18") == 128000
+    assert context_window("unknown") == prompting.DEFAULT_CONTEXT_WINDOW
+
+
+def test_assemble_keeps_highest_priority_memory():
+    """Test that the lowest priority memory is trimmed or dropped to fit the budget"""
+    assembler = PromptAssembler(max_input_tokens=40, min_trimmed_tokens=3)
+    memory = [("low priority fact " * 5, 0.1), ("high priority", 0.9), ("medium priority fact here", 0.5)]
+
+    prompt = assembler.assemble("gpt-4o", "What now?", memory, instructions="Be brief.")
+    assert prompt.startswith("Relevant memory:\n- high priority\n- medium priority fact here\n- low priority")
+    assert prompt.endswith("\n\nWhat now?")
+    usage = assembler.last_usage
+    assert usage["memory_kept"] == 3
+    assert usage["memory_trimmed"] == 1
+    assert usage["instructions_tokens"] + usage["prompt_tokens"] + usage["memory_tokens"] <= usage["budget"]
+
+
+def test_assemble_drops_memory_that_does_not_fit():
+    """Test that memory is left out entirely when there is no room"""
+    assembler = PromptAssembler(max_input_tokens=10)
+    assert assembler.assemble("gpt-4o", "What now?", [("a long memory entry " * 10, 1.0)]) == "What now?"
+    assert assembler.last_usage["memory_dropped"] == 1
+
+
+def test_assemble_rejects_oversized_prompt():
+    """Test that a prompt over the budget fails before any call is made"""
+    assembler = PromptAssembler(max_input_tokens=5)
+    with pytest.raises(ValueError) as excinfo:
+        assembler.assemble("gpt-4o", "this prompt is far too long for the budget")
+    assert "over the budget of 5 for gpt-4o" in str(excinfo.value)
@@ -0,0 +1,230 @@
+import asyncio
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from adoptagentai.core.agent import Agent
+from adoptagentai.core.clients import close_clients
+from adoptagentai.core.scheduler import RateLimitScheduler, TokenBucket, retry_after, is_retryable
+
+
+@pytest.fixture
+def server_credentials(fake_openai_server):
+    """Fixture pointing get_api_credentials at the fake server"""
+    with patch('adoptagentai.core.agent.get_api_credentials') as mock_get:
+        mock_get.return_value = {"api_key": "test-api-key", "base_url": fake_openai_server.base_url}
+        yield fake_openai_server
+    close_clients()
+
+
+def _error(status, headers=None):
+    """Build an error shaped like an openai.APIStatusError"""
+    error = RuntimeError("status")
+    error.status_code = status
+    error.response = SimpleNamespace(status_code=status, headers=headers or {})
+    return error
+
+
+def test_token_bucket():
+    """Test that the bucket refills over time and can go into debt"""
+    bucket = TokenBucket(600, capacity=2)
+    now = bucket.updated
+    assert bucket.wait_time(2, now) == 0
+    bucket.consume(2, now)
+    assert bucket.wait_time(1, now) == pytest.approx(0.1)
+    assert bucket.wait_time(1, now + 0.1) == pytest.approx(0)
+
+    # Amounts over the capacity only wait for a full bucket
+    assert bucket.wait_time(50, now + 0.1) == pytest.approx(0.1)
+
+    # Reconciling a bigger actual usage puts the bucket in debt
+    bucket.consume(3, now + 0.2)
+    assert bucket.wait_time(1, now + 0.2) == pytest.approx(0.2)
+
+
+def test_retry_after_headers():
+    """Test that Retry-After values are read in milliseconds, seconds and HTTP dates"""
+    assert retry_after(_error(429, {"retry-after-ms": "250"})) == pytest.approx(0.25)
+    assert retry_after(_error(429, {"retry-after": "2"})) == 2
+    assert 0 < retry_after(_error(429, {"retry-after": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))})) <= 30
+    assert retry_after(_error(429)) is None
+    assert retry_after(ValueError()) is None
+
+
+def test_is_retryable():
+    """Test that throttling and transient errors are retried, client errors aren't"""
+    assert is_retryable(_error(429))
+    assert is_retryable(_error(503))
+    assert not is_retryable(_error(400))
+    assert not is_retryable(ValueError("bad"))
+
+
+def test_priority_order():
+    """Test that waiting calls are let through by priority, then arrival order"""
+    scheduler = RateLimitScheduler(requests_per_minute=600, burst_seconds=0.1)
+    scheduler.acquire("gpt-4o", "default")
+    order = []
+
+    def worker(name, priority):
+        scheduler.acquire("gpt-4o", "default", priority=priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=worker, args=args) for args in (("low", 0), ("high", 5), ("mid", 1))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    assert order == ["high", "mid", "low"]
+
+
+def test_non_retryable_errors_are_not_retried():
+    """Test that a non-retryable error is raised after a single attempt"""
+    scheduler = RateLimitScheduler()
+    function = MagicMock(side_effect=ValueError("bad request"))
+    with pytest.raises(ValueError):
+        scheduler.call("gpt-4o", "default", function)
+    function.assert_called_once()
+
+
+def test_throttled_calls_are_retried(server_credentials):
+    """Test that calls throttled by the server back off and eventually succeed"""
+    server = server_credentials
+    server.limit, server.window = 4, 0.2
+    scheduler = RateLimitScheduler(base_delay=0.05, max_delay=1.0)
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", scheduler=scheduler)
+
+    results = agent.run_batch([f"prompt {i}" for i in range(12)], max_concurrency=6)
+    assert [result.output_text for result in results] == ["ok"] * 12
+    assert server.accepted == 12
+    assert server.throttled > 0
+    stats = scheduler.stats()[("gpt-4o", "DEFAULT")]
+    assert stats["retries"] == server.throttled
+    assert stats["throttled"] == server.throttled
+
+
+def test_rate_limits_avoid_throttling(server_credentials):
+    """Test that limits below the provider's keep every call under it"""
+    server = server_credentials
+    server.limit, server.window = 5, 0.2
+    scheduler = RateLimitScheduler(base_delay=0.05, burst_seconds=0.05)
+    scheduler.set_limits("gpt-4o", "default", requests_per_minute=900, tokens_per_minute=100000)
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", scheduler=scheduler)
+
+    results = agent.run_batch([f"prompt {i}" for i in range(9)], max_concurrency=9)
+    assert all(result.output_text == "ok" for result in results)
+    assert server.throttled == 0
+
+
+def test_retry_budget_is_exhausted():
+    """Test that an account stops retrying failures once the retry budget is spent"""
+    class Unavailable(Exception):
+        status_code = 503
+
+    attempts = []
+
+    def failing():
+        attempts.append(1)
+        raise Unavailable()
+
+    scheduler = RateLimitScheduler(max_retries=10, base_delay=0.001, max_retry_budget=2)
+    with pytest.raises(Unavailable):
+        scheduler.call("gpt-4o", "default", failing)
+    assert len(attempts) == 3
+    assert scheduler.stats()[("gpt-4o", "DEFAULT")]["budget_exhausted"] == 1
+
+
+def test_throttled_retries_do_not_spend_budget(server_credentials):
+    """Test that 429s with a retry-after are retried up to max_retries without drawing from the budget"""
+    server = server_credentials
+    server.limit, server.window = 0, 0.02
+    scheduler = RateLimitScheduler(max_retries=3, base_delay=0.01, max_retry_budget=1)
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", scheduler=scheduler)
+
+    assert agent.run_agent("Hello") == "Error executing model."
+    assert server.throttled == 4
+    stats = scheduler.stats()[("gpt-4o", "DEFAULT")]
+    assert stats["retries"] == 3
+    assert stats["budget_exhausted"] == 0
+
+
+def test_async_calls_are_retried(server_credentials):
+    """Test that async calls share the scheduler and are retried the same way"""
+    server = server_credentials
+    server.limit, server.window = 3, 0.2
+    scheduler = RateLimitScheduler(base_delay=0.05, max_delay=1.0)
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", scheduler=scheduler)
+
+    results = asyncio.run(agent.arun_batch([f"prompt {i}" for i in range(6)], max_concurrency=6))
+    assert [result.output_text for result in results] == ["ok"] * 6
+    assert server.throttled > 0
+
+
+class _FakeStream:
+    """Iterable of stream events remembering whether it was closed, like openai.Stream"""
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def close(self):
+        self.closed = True
+
+
+def test_streamed_calls_settle_reserved_tokens():
+    """Test that the tokens reserved for a streamed call are corrected with the usage of its final event"""
+    scheduler = RateLimitScheduler(tokens_per_minute=600, burst_seconds=60)
+    with patch('adoptagentai.core.agent.get_api_credentials', return_value={"api_key": "key"}):
+        agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", scheduler=scheduler)
+    usage = SimpleNamespace(input_tokens=7, output_tokens=1, input_tokens_details=SimpleNamespace(cached_tokens=0))
+    stream = _FakeStream([SimpleNamespace(type="response.output_text.delta", delta="Hi"),
+                          SimpleNamespace(type="response.completed", response=SimpleNamespace(usage=usage))])
+    agent.strategy = MagicMock(return_value=stream)
+
+    assert list(agent.run_agent_stream("Hello")) == ["Hi"]
+    bucket = scheduler._limiter(scheduler._key("gpt-4o", "default")).tokens
+    assert bucket.tokens == pytest.approx(600 - 8, abs=1)
+    assert stream.closed
+
+
+def test_stopped_streams_are_closed():
+    """Test that a stream the consumer stops reading is closed right away"""
+    with patch('adoptagentai.core.agent.get_api_credentials', return_value={"api_key": "key"}):
+        agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", scheduler=RateLimitScheduler())
+    stream = _FakeStream([SimpleNamespace(type="response.output_text.delta", delta=delta) for delta in "abc"])
+    agent.strategy = MagicMock(return_value=stream)
+
+    chunks = agent.run_agent_stream("Hello")
+    assert next(chunks) == "a"
+    assert not stream.closed
+    chunks.close()
+    assert stream.closed
+
+    class AsyncStream:
+        closed = False
+
+        def __aiter__(self):
+            return self.events()
+
+        async def events(self):
+            for delta in "abc":
+                yield SimpleNamespace(type="response.output_text.delta", delta=delta)
+
+        async def close(self):
+            self.closed = True
+
+    async def first_chunk(async_stream):
+        async def strategy(*args, **kwargs):
+            return async_stream
+        agent.async_strategy = strategy
+        chunks = agent.arun_agent_stream("Hello")
+        first = await chunks.__anext__()
+        await chunks.aclose()
+        return first
+
+    async_stream = AsyncStream()
+    assert asyncio.run(first_chunk(async_stream)) == "a"
+    assert async_stream.closed
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from adoptagentai.core.agent import Agent
+from adoptagentai.core.clients import close_clients
+from adoptagentai.core.tools import Tool, ToolExecutor, function_parameters, function_calls, tool_turn_input
+
+
+def _call(name, arguments, call_id=None):
+    """Build a function_call output item like the Responses API returns"""
+    return SimpleNamespace(type="function_call", name=name, arguments=json.dumps(arguments), call_id=call_id or f"call_{name}")
+
+
+def _outputs(outputs) -> dict:
+    """Map call IDs to their decoded outputs, plain strings staying as they are"""
+    decoded = {}
+    for output in outputs:
+        try:
+            decoded[output["call_id"]] = json.loads(output["output"])
+        except json.JSONDecodeError:
+            decoded[output["call_id"]] = output["output"]
+    return decoded
+
+
+def test_function_parameters():
+    """Test that tool schemas are derived from signatures"""
+    def read_sheet(spreadsheet_id: str, rows: int, scale: float = 1.0, tags: list = None, *args, strict=False, **kwargs):
+        """Read a sheet."""
+
+    assert function_parameters(read_sheet) == {
+        "type": "object",
+        "properties": {"spreadsheet_id": {"type": "string"}, "rows": {"type": "integer"}, "scale": {"type": "number"},
+                       "tags": {"type": "array"}, "strict": {}},
+        "required": ["spreadsheet_id", "rows"],
+    }
+    schema = Tool("read_sheet", read_sheet, timeout=2).schema()
+    assert schema["type"] == "function" and schema["name"] == "read_sheet"
+    assert schema["description"] == "Read a sheet."
+
+
+def test_executor_runs_calls_concurrently():
+    """Test that the calls of one turn overlap and keep their order"""
+    barrier = threading.Barrier(3, timeout=2)
+
+    def lookup(key: str):
+        barrier.wait()
+        return {"key": key, "thread": threading.current_thread().name}
+
+    tools = {"lookup": Tool("lookup", lookup)}
+    calls = [_call("lookup", {"key": key}, f"call_{key}") for key in "abc"]
+    started = time.perf_counter()
+    outputs = ToolExecutor(max_workers=3).execute(calls, tools)
+
+    assert time.perf_counter() - started < 1
+    assert [output["call_id"] for output in outputs] == ["call_a", "call_b", "call_c"]
+    assert all(output["type"] == "function_call_output" for output in outputs)
+    assert _outputs(outputs)["call_b"]["key"] == "b"
+
+
+def test_executor_reports_errors_and_timeouts():
+    """Test that failing, slow, unknown and badly called tools become error outputs"""
+    def fail():
+        raise RuntimeError("quota exceeded")
+
+    tools = {
+        "fail": Tool("fail", fail),
+        "slow": Tool("slow", lambda: time.sleep(1), timeout=0.05),
+        "echo": Tool("echo", lambda text: text),
+    }
+    calls = [_call("fail", {}), _call("slow", {}), _call("missing", {}), _call("echo", {"text": "hi"}),
+             SimpleNamespace(type="function_call", name="echo", arguments="{not json", call_id="call_bad")]
+    started = time.perf_counter()
+    outputs = _outputs(ToolExecutor().execute(calls, tools))
+
+    assert time.perf_counter() - started < 0.5
+    assert outputs["call_fail"] == {"error": "RuntimeError: quota exceeded"}
+    assert "timed out after 0.05 seconds" in outputs["call_slow"]["error"]
+    assert outputs["call_missing"] == {"error": "Unknown tool 'missing'."}
+    assert outputs["call_echo"] == "hi"
+    assert outputs["call_bad"]["error"].startswith("Invalid arguments for tool 'echo'")
+
+
+def test_executor_async():
+    """Test that aexecute awaits coroutine tools on the loop and runs others on threads, with timeouts"""
+    async def fetch(delay: float):
+        await asyncio.sleep(delay)
+        return delay
+
+    tools = {"fetch": Tool("fetch", fetch, timeout=0.5), "blocking": Tool("blocking", lambda: time.sleep(0.2) or "done")}
+    calls = [_call("fetch", {"delay": 0.2}, "call_1"), _call("fetch", {"delay": 0.2}, "call_2"),
+             _call("blocking", {}), _call("fetch", {"delay": 5}, "call_slow")]
+    started = time.perf_counter()
+    outputs = _outputs(asyncio.run(ToolExecutor().aexecute(calls, tools)))
+
+    assert time.perf_counter() - started < 1
+    assert outputs["call_1"] == 0.2 and outputs["call_2"] == 0.2
+    assert outputs["call_blocking"] == "done"
+    assert "timed out" in outputs["call_slow"]["error"]
+
+    # Coroutine tools also run from the thread pool
+    assert _outputs(ToolExecutor().execute([_call("fetch", {"delay": 0})], tools)) == {"call_fetch": 0}
+
+
+def test_tool_turn_input():
+    """Test that the next turn carries the prompt, the response items and the call outputs"""
+    item = MagicMock(spec=["model_dump"])
+    item.model_dump.return_value = {"type": "function_call", "call_id": "call_1"}
+    output = {"type": "function_call_output", "call_id": "call_1", "output": "ok"}
+
+    items = tool_turn_input("Hi", SimpleNamespace(output=[item]), [output])
+    assert items == [{"role": "user", "content": "Hi"}, {"type": "function_call", "call_id": "call_1"}, output]
+    assert function_calls("plain text") == []
+
+
+@pytest.fixture
+def mock_api_credentials():
+    with patch('adoptagentai.core.agent.get_api_credentials') as mock_get:
+        mock_get.return_value = {"api_key": "test-api-key"}
+        yield mock_get
+
+
+def test_agent_tool_loop(mock_api_credentials):
+    """Test that run_agent executes the model's calls and sends the results back until it answers"""
+    calls = []
+
+    def weather(city: str) -> str:
+        """Return the weather of a city."""
+        calls.append(city)
+        return f"Sunny in {city}"
+
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default", tools=[weather])
+    final = SimpleNamespace(output=[SimpleNamespace(type="message")], output_text="Both sunny")
+    first = SimpleNamespace(output=[_call("weather", {"city": "Paris"}, "c1"), _call("weather", {"city": "Lyon"}, "c2")])
+    agent.strategy = MagicMock(side_effect=[first, final])
+
+    assert agent.run_agent("Weather?") is final
+    assert sorted(calls) == ["Lyon", "Paris"]
+    assert agent.list_tools() == ["weather"]
+
+    first_call, second_call = agent.strategy.call_args_list
+    assert first_call.args[1] == "Weather?"
+    assert first_call.kwargs["tools"][0]["name"] == "weather"
+    assert first_call.kwargs["tool_choice"] == "auto" and first_call.kwargs["parallel_tool_calls"] is True
+    follow_up = second_call.args[1]
+    assert follow_up[0] == {"role": "user", "content": "Weather?"}
+    assert follow_up[-2:] == [{"type": "function_call_output", "call_id": "c1", "output": "Sunny in Paris"},
+                              {"type": "function_call_output", "call_id": "c2", "output": "Sunny in Lyon"}]
+
+    # The loop stops after max_tool_rounds
+    agent.max_tool_rounds = 1
+    agent.strategy = MagicMock(return_value=first)
+    assert agent.run_agent("Weather?") is first
+    assert agent.strategy.call_count == 2
+
+    agent.remove_tool("weather")
+    assert agent.tools == {}
+
+
+def test_agent_tool_rounds_limit(mock_api_credentials):
+    """Test that tools never run past max_tool_rounds, whose results the model would not see"""
+    runs = []
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+    agent.register_tool("record", lambda: runs.append(1) or "done")
+    calling = SimpleNamespace(output=[_call("record", {})])
+
+    for rounds in (0, 2):
+        runs.clear()
+        agent.max_tool_rounds = rounds
+        agent.strategy = MagicMock(return_value=calling)
+        assert agent.run_agent("Go") is calling
+        assert len(runs) == rounds
+        assert agent.strategy.call_count == rounds + 1
+
+    async def fake_strategy(model_name, prompt, credentials, **kwargs):
+        return calling
+
+    runs.clear()
+    agent.async_strategy = fake_strategy
+    assert asyncio.run(agent.arun_agent("Go")) is calling
+    assert len(runs) == 2
+
+
+def test_agent_tool_loop_async(mock_api_credentials):
+    """Test that arun_agent runs the calls through the async executor"""
+    async def add(a: int, b: int) -> int:
+        return a + b
+
+    agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+    agent.register_tool("add", add, timeout=1)
+    final = SimpleNamespace(output=[])
+    responses = [SimpleNamespace(output=[_call("add", {"a": 2, "b": 3})]), final]
+    seen = []
+
+    async def fake_strategy(model_name, prompt, credentials, **kwargs):
+        seen.append(prompt)
+        return responses.pop(0)
+
+    agent.async_strategy = fake_strategy
+    assert asyncio.run(agent.arun_agent("Sum?")) is final
+    assert seen[1][-1] == {"type": "function_call_output", "call_id": "call_add", "output": "5"}
+
+
+def test_agent_tool_loop_against_server(fake_openai_server):
+    """Test the loop end to end through the OpenAI client and the real strategy"""
+    def respond(request):
+        if not any(item.get("type") == "function_call_output" for item in request["input"] if isinstance(item, dict)):
+            return {"output": [{"type": "function_call", "id": "fc_1", "call_id": "call_1", "name": "lookup",
+                                "arguments": json.dumps({"key": "answer"}), "status": "completed"}]}
+        return {}
+    fake_openai_server.respond = respond
+
+    with patch('adoptagentai.core.agent.get_api_credentials') as mock_get:
+        mock_get.return_value = {"api_key": "test-api-key", "base_url": fake_openai_server.base_url}
+        agent = Agent(name="TestAgent", model_name="gpt-4o", model_account_name="default")
+        agent.register_tool("lookup", lambda key: {"value": 42}, description="Look a key up.")
+        response = agent.run_agent("What is the answer?")
+    close_clients()
+
+    assert response.output_text == "ok"
+    first, second = fake_openai_server.requests
+    assert first["tools"][0]["name"] == "lookup" and first["parallel_tool_calls"] is True
+    assert second["input"][1]["type"] == "function_call"
+    assert second["input"][2] == {"type": "function_call_output", "call_id": "call_1", "output": json.dumps({"value": 42})}